@@ -1,62 +1,85 @@
 import tkinter as tk
 from tkinter import messagebox
-import pickle
-import numpy as np
-from PIL import Image, ImageTk
-import urllib.request
-import io
-import subprocess
-import csv
-import os
+import sqlite3
+import time
+
+import metrics
+from attributions import format_factors
+from content import INFO_CARDS
+from inference_server import InferenceClient
+from model_registry import registry
+from prediction_cache import CachedPredictor
+from prediction_logger import LOG_PATH, PredictionLogger
+from prediction_store import STORE_PATH, PredictionStore
+from symptom_model import FEATURES, MODEL_PATH, RISK_COLORS, validate_values
+from ui_tasks import TaskRunner
 
 
 class SymptomPredictorApp:
-    def __init__(self, root):
+    def __init__(self, root, shell=None):
         self.root = root
-        self.root.title("RespireX | Symptom-Based Prediction")
-        self.root.geometry("1000x700")
-        self.root.configure(bg="#111")
+        self.shell = shell
+        self.frame = tk.Frame(root, bg="#111")
 
                 # ✅ Back to Dashboard Navigation
-        header = tk.Frame(self.root, bg="#111")
+        header = tk.Frame(self.frame, bg="#111")
         header.pack(fill="x", pady=5)
         back_label = tk.Label(header, text="← Back to Dashboard", font=("Orbitron", 10),
                               fg="#00f6ff", bg="#111", cursor="hand2")
         back_label.pack(side="left", padx=10)
         back_label.bind("<Button-1>", self.go_back_to_dashboard)
 
-        # Load model and scaler
-        try:
-            with open("model.pkl", "rb") as f:
-                self.scaler, self.model = pickle.load(f)
-        except Exception as e:
-            messagebox.showerror("Model Load Error", str(e))
-            self.scaler = None
-            self.model = None
+        # Predictions run on a worker thread so the window never freezes
+        self.tasks = TaskRunner(self.root, on_busy=self._set_busy)
+        self.predictor = None
+        self.logger = None
 
         # Card content
-        self.info_cards = [
-            {"title": "Coughing of Blood", "text": "Coughing up blood (hemoptysis) is a red flag symptom often associated with lung cancer. It typically occurs when tumors erode nearby blood vessels in the airways, causing bleeding. Although it can also occur in infections or bronchitis, its presence in smokers or high-risk patients is taken very seriously in predictive modeling. Its rarity in benign conditions makes it a high-weight factor."},
-            {"title": "Chest Pain", "text": "Persistent chest pain, particularly when breathing or coughing, may indicate tumor pressure or invasion into the chest wall or pleura. This symptom is more predictive when it occurs alongside shortness of breath or coughing of blood. While pain can stem from many causes, its chronic and localized form is significant in lung cancer diagnosis models."},
-            {"title": "Weight Loss", "text": "Unexplained weight loss is often an early systemic sign of cancer, including lung cancer. Tumors can cause metabolic changes that burn calories rapidly, even when the patient is not trying to lose weight. In prediction models, sudden weight loss can elevate risk even if other symptoms appear mild."},
-            {"title": "Shortness of Breath", "text": "Shortness of breath (dyspnea) is a common symptom caused by airway obstruction, fluid buildup, or reduced lung capacity due to tumors. Its onset—especially in non-asthmatic patients—can be an early indicator of pulmonary compromise, adding weight in lung cancer prediction algorithms."},
-            {"title": "Smoking", "text": "Smoking is the single most significant risk factor for lung cancer. Tobacco smoke contains carcinogens that directly damage lung tissue over time. Prediction models treat heavy smoking history as a dominant feature. Even moderate smoking increases risk sharply when combined with other symptoms."},
-            {"title": "Genetic Risk", "text": "Family history and inherited genetic mutations can predispose individuals to lung cancer even without environmental exposures. In models, genetic risk adds predictive value when combined with factors like smoking and environmental pollution."},
-            {"title": "Wheezing", "text": "Wheezing occurs when airflow through the lungs is restricted, often by narrowed airways or tumor growth. While also common in asthma or infections, new or worsening wheezing in older adults may signal lung abnormalities. Its context is key in prediction."},
-            {"title": "Fatigue", "text": "Chronic fatigue can indicate systemic cancer-related changes. While non-specific, when paired with other symptoms, fatigue can signal the body’s immune response to tumor presence. It's a supportive but important predictive feature."},
-            {"title": "Air Pollution", "text": "Exposure to air pollution, especially in urban or industrial environments, increases lung cancer risk over time. Pollutants like PM2.5 particles and toxic gases damage lung cells and contribute to inflammation. Prediction models treat long-term pollution exposure as an environmental risk marker."},
-            {"title": "Passive Smoker", "text": "Passive or second-hand smoke exposure can cause similar cellular damage as active smoking. Non-smokers living with smokers or working in smoky environments often face elevated risks. This factor is crucial in detecting high-risk non-smokers in machine learning models."}
-        ]
+        self.info_cards = INFO_CARDS
         self.current_card = 0
 
         self.create_info_card_ui()
         self.create_prediction_ui()
 
+        # Use the resident inference server if one is running, otherwise the process-wide
+        # registry (model and scaler are loaded once per process, however often we navigate
+        # here). A local load runs in the background; Predict is enabled once it finishes
+        remote = InferenceClient.discover(need=("symptom",))
+        if remote is None:
+            self.predict_btn.config(state="disabled", text="Loading model…")
+            self.loader = TaskRunner(self.root, poll_ms=50)
+            self.loader.submit(lambda task: registry.get("symptom"), self._model_ready, on_error=self._model_failed)
+        else:
+            self._model_ready(remote)
+
         # Start card auto-rotation
         self.root.after(30000, self.auto_rotate_card)
 
+    def _model_ready(self, predictor):
+        self.predictor = predictor
+        # Rows carry the version of the model that made them (from the file when served remotely)
+        self.logger = PredictionLogger(LOG_PATH, MODEL_PATH, version=getattr(predictor, "version", None))
+        try:
+            self.logger.sinks.append(PredictionStore(STORE_PATH).sink)
+        except sqlite3.Error:
+            pass  # history queries are optional; the CSV log still works
+        self.logger.start()
+        if isinstance(predictor, CachedPredictor):
+            # Rows logged after a hot reload or a rollback carry the swapped-in model's version
+            predictor.model.on_swap.append(lambda new, old: setattr(self.logger, "version", new.version))
+        self.predict_btn.config(text="Predict", state="disabled" if self.tasks.busy else "normal")
+
+    def _model_failed(self, e):
+        self.predict_btn.config(text="Predict")
+        messagebox.showerror("Model Load Error", str(e))
+
+    def on_show(self):
+        self.root.title("RespireX | Symptom-Based Prediction")
+        self.root.geometry("1000x700")
+        self.root.configure(bg="#111")
+
     def create_info_card_ui(self):
-        wrapper = tk.Frame(self.root, bg="#111")
+        wrapper = tk.Frame(self.frame, bg="#111")
         wrapper.pack(pady=20, fill='x')
 
         self.left_btn = tk.Button(wrapper, text="←", font=("Orbitron", 14), width=4, bg="#111", borderwidth=0,
@@ -99,13 +122,10 @@ class SymptomPredictorApp:
         self.root.after(30000, self.auto_rotate_card)
 
     def create_prediction_ui(self):
-        form_frame = tk.Frame(self.root, bg="#111")
+        form_frame = tk.Frame(self.frame, bg="#111")
         form_frame.pack(pady=10)
 
-        self.features = [
-            "Coughing of Blood", "Chest Pain", "Weight Loss", "Shortness of Breath",
-            "Smoking", "Genetic Risk", "Wheezing", "Fatigue", "Air Pollution", "Passive Smoker"
-        ]
+        self.features = list(FEATURES)
         self.entries = {}
 
         for feature in self.features:
@@ -117,7 +137,7 @@ class SymptomPredictorApp:
             entry.pack(side='left')
             self.entries[feature] = entry
 
-        btn_frame = tk.Frame(self.root, bg="#111")
+        btn_frame = tk.Frame(self.frame, bg="#111")
         btn_frame.pack(pady=15)
 
         self.predict_btn = tk.Button(btn_frame, text="Predict", font=("Orbitron", 12, "bold"),
@@ -132,68 +152,80 @@ class SymptomPredictorApp:
                                      command=self.reset_fields)
         self.reset_btn.pack(side='left', padx=10, ipadx=10, ipady=5)
 
-        self.result_label = tk.Label(self.root, text="", font=("Orbitron", 12), fg="#00f6ff", bg="#111")
-        self.result_label.pack(pady=10)
+        self.cancel_btn = tk.Button(btn_frame, text="Cancel", font=("Orbitron", 12, "bold"),
+                                    bg="#222", fg="#00f6ff", relief="flat", state="disabled",
+                                    activebackground="#333", activeforeground="#00f6ff",
+                                    command=self.tasks.cancel)
+        self.cancel_btn.pack(side='left', padx=10, ipadx=10, ipady=5)
+
+        self.status_label = tk.Label(self.frame, text="", font=("Orbitron", 10), fg="#888", bg="#111")
+        self.status_label.pack()
+
+        self.result_label = tk.Label(self.frame, text="", font=("Orbitron", 12), fg="#00f6ff", bg="#111")
+        self.result_label.pack(pady=(10, 0))
+        # Symptoms that pushed the patient toward the predicted risk the most
+        self.factors_label = tk.Label(self.frame, text="", font=("Orbitron", 10), fg="#cccccc", bg="#111")
+        self.factors_label.pack(pady=(2, 10))
+
+    def _set_busy(self, busy):
+        self.predict_btn.config(state="normal" if not busy and self.predictor is not None else "disabled")
+        self.cancel_btn.config(state="normal" if busy else "disabled")
+        self.status_label.config(text="⏳ Predicting…" if busy else "")
 
     def reset_fields(self):
         for entry in self.entries.values():
             entry.delete(0, tk.END)
         self.result_label.config(text="")
+        self.factors_label.config(text="")
 
     def predict(self):
-        if not self.model or not self.scaler:
+        if self.tasks.busy:
+            return  # ✅ Ignore repeat clicks while a prediction is running
+        if self.predictor is None:
             messagebox.showerror("Model Error", "Model or scaler not loaded.")
             return
 
+        clicked = time.perf_counter()
         try:
-            values = []
-            for feature in self.features:
-                val = self.entries[feature].get().strip()
-                try:
-                    num = int(val)
-                    if not (0 <= num <= 9):
-                        raise ValueError
-                    values.append(num)
-                except:
-                    raise ValueError(f"Invalid input for {feature}. Enter a whole number between 0–9.")
-            
-
-            features_scaled = self.scaler.transform([values])
-            pred = self.model.predict(features_scaled)[0]
-            risk_mapping = {0: "Low Risk", 1: "Medium Risk", 2: "High Risk"}
-            color = {"Low Risk": "#00ff88", "Medium Risk": "#ffe266", "High Risk": "#ff4c4c"}
-            result = risk_mapping.get(pred, "Unknown")
-
-            self.result_label.config(text=f"Predicted Risk: {result}", fg=color.get(result, "white"))
-
-        # ✅ Log to CSV
-            import csv, os
-            log_file = "prediction_log.csv"
-            fields = self.features + ["Predicted Risk"]
-            row = values + [result]
-            file_exists = os.path.isfile(log_file)
-            with open(log_file, mode='a', newline='') as f:
-                writer = csv.writer(f)
-                if not file_exists:
-                    writer.writerow(fields)
-                writer.writerow(row)
-
-        # ✅ Clear fields after prediction
-            for entry in self.entries.values():
-                entry.delete(0, tk.END)
-
+            with metrics.span("symptom.validate"):
+                values = validate_values([self.entries[f].get() for f in self.features], self.features)
         except ValueError as ve:
             messagebox.showwarning("Input Error", str(ve))
-        except Exception as e:
+            return
+
+        def work(task):
+            with metrics.span("symptom.model"):
+                result = self.predictor.explain_one(values, top=3)
+            # ✅ Log to CSV (queued; written by the background logger thread)
+            if not task.cancelled():
+                with metrics.span("symptom.log_enqueue"):
+                    self.logger.log(values, result[0])
+            return result
+
+        def failed(e):
+            metrics.inc("symptom.errors")
             messagebox.showerror("Prediction Error", str(e))
 
+        self.tasks.submit(work, lambda result: self._show_result(result, clicked), on_error=failed)
+
+    def _show_result(self, result, clicked=None):
+        result, factors = result
+        with metrics.span("symptom.render"):
+            self.result_label.config(text=f"Predicted Risk: {result}", fg=RISK_COLORS.get(result, "white"))
+            self.factors_label.config(text=f"Top factors: {format_factors(factors)}" if factors else "")
+
+            # ✅ Clear fields after prediction
+            for entry in self.entries.values():
+                entry.delete(0, tk.END)
+        if clicked is not None:
+            metrics.observe("symptom.predict", time.perf_counter() - clicked)  # click to result on screen
+        metrics.inc("symptom.predictions")
+
     def go_back_to_dashboard(self, *_):
-        self.root.destroy()
-        subprocess.Popen(["python3", "app.py"])
+        self.shell.show("dashboard")
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = SymptomPredictorApp(root)
-    root.mainloop()
+    from shell import run
+    run("symptom", {"symptom": SymptomPredictorApp})
 
@@ -1,79 +1,205 @@
-import os
-import tensorflow as tf
-from tensorflow.keras.applications import EfficientNetB0
-from tensorflow.keras.layers import Dense, GlobalAveragePooling2D
-from tensorflow.keras.models import Model
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-
-# ----------- Step 1: Set Dataset Paths ----------- #
-# Make sure the directory structure is like:
-# /lung_cancer_MRI_dataset/train/
-# /lung_cancer_MRI_dataset/validate/
-
-dataset_root = '/lung_cancer_MRI_dataset'
-train_dir = 'lung_cancer_MRI_dataset/train'
-val_dir = 'lung_cancer_MRI_dataset/validate'
-
-# ----------- Step 2: Image Data Preprocessing ----------- #
-img_size = (224, 224)
-batch_size = 32
-
-train_datagen = ImageDataGenerator(
-    rescale=1.0 / 255.0,
-    rotation_range=20,
-    width_shift_range=0.2,
-    height_shift_range=0.2,
-    shear_range=0.2,
-    zoom_range=0.2,
-    horizontal_flip=True,
-    fill_mode='nearest'
-)
-
-val_datagen = ImageDataGenerator(rescale=1.0 / 255.0)
-
-train_generator = train_datagen.flow_from_directory(
-    train_dir,
-    target_size=img_size,
-    batch_size=batch_size,
-    class_mode='categorical'
-)
-
-val_generator = val_datagen.flow_from_directory(
-    val_dir,
-    target_size=img_size,
-    batch_size=batch_size,
-    class_mode='categorical'
-)
-
-# ----------- Step 3: Build the Model ----------- #
-base_model = EfficientNetB0(weights='imagenet', include_top=False, input_shape=(224, 224, 3))
-base_model.trainable = False  # Freeze feature extractor
-
-x = base_model.output
-x = GlobalAveragePooling2D()(x)
-x = Dense(1024, activation='relu')(x)
-predictions = Dense(train_generator.num_classes, activation='softmax')(x)
-
-model = Model(inputs=base_model.input, outputs=predictions)
-
-# ----------- Step 4: Compile ----------- #
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-model.summary()
-
-# ----------- Step 5: Train ----------- #
-epochs = 10
-history = model.fit(
-    train_generator,
-    steps_per_epoch=train_generator.samples // batch_size,
-    validation_data=val_generator,
-    validation_steps=val_generator.samples // batch_size,
-    epochs=epochs
-)
-
-# ----------- Step 6: Evaluate ----------- #
-loss, accuracy = model.evaluate(val_generator)
-print(f"\n🎯 Validation Accuracy: {accuracy * 100:.2f}%")
-
-# ----------- Step 7: Save Model ----------- #
-model.save('lung_cancer_model.keras')
-print("💾 Model saved as 'lung_cancer_model.keras'")
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.applications import EfficientNetB0
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Input
+from tensorflow.keras.models import Model
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+# ----------- Step 1: Set Dataset Paths ----------- #
+# Make sure the directory structure is like:
+# /lung_cancer_MRI_dataset/train/
+# /lung_cancer_MRI_dataset/validate/
+
+dataset_root = '/lung_cancer_MRI_dataset'
+train_dir = 'lung_cancer_MRI_dataset/train'
+val_dir = 'lung_cancer_MRI_dataset/validate'
+feature_cache_dir = '.respirex_cache/features'
+
+parser = argparse.ArgumentParser(description="Train the MRI classifier (EfficientNetB0 backbone + dense head).")
+parser.add_argument('--mode', choices=['cached', 'finetune'], default='cached',
+                    help="cached: run the frozen backbone once and train the head on stored embeddings; "
+                         "finetune: push every image through the backbone every epoch (the original loop)")
+parser.add_argument('--epochs', type=int, default=10)
+parser.add_argument('--augment-copies', type=int, default=4,
+                    help="augmented passes over the training set to cache (plus one clean pass)")
+parser.add_argument('--unfreeze-top', type=int, default=0,
+                    help="finetune mode: also train the top N backbone layers (lower learning rate)")
+parser.add_argument('--benchmark', action='store_true',
+                    help="train both ways and compare wall time and validation accuracy (saves nothing)")
+parser.add_argument('--output', default='lung_cancer_model.keras')
+args = parser.parse_args()
+
+# ----------- Step 2: Image Data Preprocessing ----------- #
+img_size = (224, 224)
+batch_size = 32
+
+augmentation = dict(
+    rotation_range=20,
+    width_shift_range=0.2,
+    height_shift_range=0.2,
+    shear_range=0.2,
+    zoom_range=0.2,
+    horizontal_flip=True,
+    fill_mode='nearest'
+)
+
+train_datagen = ImageDataGenerator(rescale=1.0 / 255.0, **augmentation)
+clean_datagen = ImageDataGenerator(rescale=1.0 / 255.0)
+val_datagen = ImageDataGenerator(rescale=1.0 / 255.0)
+
+train_generator = train_datagen.flow_from_directory(
+    train_dir,
+    target_size=img_size,
+    batch_size=batch_size,
+    class_mode='categorical'
+)
+
+val_generator = val_datagen.flow_from_directory(
+    val_dir,
+    target_size=img_size,
+    batch_size=batch_size,
+    class_mode='categorical'
+)
+num_classes = train_generator.num_classes
+
+
+# ----------- Step 3: Build the Model ----------- #
+def build_model(unfreeze_top=0):
+    """Backbone + head as separate models that share layers, plus the full model the app loads."""
+    base_model = EfficientNetB0(weights='imagenet', include_top=False, input_shape=(224, 224, 3))
+    base_model.trainable = False  # Freeze feature extractor
+    if unfreeze_top:
+        base_model.trainable = True
+        for layer in base_model.layers[:-unfreeze_top]:
+            layer.trainable = False
+        for layer in base_model.layers:  # BatchNorm statistics stay frozen while fine-tuning
+            if isinstance(layer, tf.keras.layers.BatchNormalization):
+                layer.trainable = False
+
+    pool = GlobalAveragePooling2D()
+    hidden = Dense(1024, activation='relu')
+    classifier = Dense(num_classes, activation='softmax')
+
+    embeddings = pool(base_model.output)
+    model = Model(inputs=base_model.input, outputs=classifier(hidden(embeddings)))
+    backbone = Model(inputs=base_model.input, outputs=embeddings)
+    head_input = Input(shape=(embeddings.shape[-1],))
+    head = Model(inputs=head_input, outputs=classifier(hidden(head_input)))
+    return model, backbone, head
+
+
+# ----------- Step 4: Cache Backbone Embeddings ----------- #
+def cache_key(generator, copies, augment):
+    """Changes whenever the images, the augmentation settings or the number of passes change."""
+    h = hashlib.sha256()
+    for path in generator.filepaths:
+        st = os.stat(path)
+        h.update(f"{path}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    h.update(json.dumps([img_size, copies, augment, 'EfficientNetB0/imagenet'], sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def cached_features(backbone, directory, datagens, name):
+    """Embeddings and labels for every (image, augmentation pass), stored as memory-mapped .npy files.
+
+    Pass k uses seed k, so a cached pass is exactly reproducible. Built once and reused by
+    later runs until the images or settings change.
+    """
+    probe = datagens[0].flow_from_directory(directory, target_size=img_size, batch_size=batch_size,
+                                            class_mode='categorical', shuffle=False)
+    key = cache_key(probe, len(datagens), augmentation if len(datagens) > 1 else None)
+    folder = os.path.join(feature_cache_dir, f"{name}-{key}")
+    x_path, y_path = os.path.join(folder, 'x.npy'), os.path.join(folder, 'y.npy')
+    if os.path.exists(y_path):
+        return np.load(x_path, mmap_mode='r'), np.load(y_path, mmap_mode='r'), 0.0
+
+    start = time.perf_counter()
+    os.makedirs(folder, exist_ok=True)
+    n, dim = probe.samples, backbone.output_shape[-1]
+    tmp_x = x_path + '.partial.npy'
+    x = np.lib.format.open_memmap(tmp_x, mode='w+', dtype=np.float32, shape=(n * len(datagens), dim))
+    y = np.empty((n * len(datagens), num_classes), np.float32)
+    row = 0
+    for seed, datagen in enumerate(datagens):
+        gen = datagen.flow_from_directory(directory, target_size=img_size, batch_size=batch_size,
+                                          class_mode='categorical', shuffle=False, seed=seed)
+        for _ in range(len(gen)):
+            images, labels = next(gen)
+            x[row:row + len(images)] = backbone(images, training=False).numpy()
+            y[row:row + len(images)] = labels
+            row += len(images)
+        print(f"🧊 Cached {name} pass {seed + 1}/{len(datagens)} ({row:,} embeddings)")
+    x.flush()
+    del x
+    os.replace(tmp_x, x_path)
+    np.save(y_path, y)  # written last: its presence marks a complete cache entry
+    return np.load(x_path, mmap_mode='r'), np.load(y_path, mmap_mode='r'), time.perf_counter() - start
+
+
+# ----------- Step 5: Train ----------- #
+def train_cached(epochs):
+    model, backbone, head = build_model()
+    x_train, y_train, train_cache_s = cached_features(
+        backbone, train_dir, [clean_datagen] + [train_datagen] * args.augment_copies, 'train')
+    x_val, y_val, val_cache_s = cached_features(backbone, val_dir, [val_datagen], 'validate')
+    print(f"🧊 Embedding cache: {len(x_train):,} train / {len(x_val):,} validation "
+          f"({train_cache_s + val_cache_s:.1f}s to build, 0 if reused)")
+
+    head.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    start = time.perf_counter()
+    head.fit(x_train, y_train, batch_size=batch_size, epochs=epochs, shuffle=True,
+             validation_data=(x_val, y_val))
+    train_s = time.perf_counter() - start
+    _, accuracy = head.evaluate(x_val, y_val, verbose=0)
+    return model, {'cache_s': train_cache_s + val_cache_s, 'train_s': train_s, 'accuracy': accuracy}
+
+
+def train_finetune(epochs, unfreeze_top=0):
+    model, _, _ = build_model(unfreeze_top)
+    optimizer = tf.keras.optimizers.Adam(1e-4) if unfreeze_top else 'adam'
+    model.compile(optimizer=optimizer, loss='categorical_crossentropy', metrics=['accuracy'])
+    model.summary()
+
+    start = time.perf_counter()
+    model.fit(
+        train_generator,
+        steps_per_epoch=train_generator.samples // batch_size,
+        validation_data=val_generator,
+        validation_steps=val_generator.samples // batch_size,
+        epochs=epochs
+    )
+    train_s = time.perf_counter() - start
+    _, accuracy = model.evaluate(val_generator)
+    return model, {'cache_s': 0.0, 'train_s': train_s, 'accuracy': accuracy}
+
+
+if args.benchmark:
+    results = {
+        'cached head': train_cached(args.epochs)[1],
+        'end-to-end': train_finetune(args.epochs, args.unfreeze_top)[1],
+    }
+    print(f"\n{'mode':<12} {'cache s':>8} {'train s':>8} {'s/epoch':>8} {'val acc':>8}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['cache_s']:8.1f} {r['train_s']:8.1f} {r['train_s'] / args.epochs:8.2f} "
+              f"{r['accuracy'] * 100:7.2f}%")
+    raise SystemExit(0)
+
+if args.mode == 'cached':
+    model, stats = train_cached(args.epochs)
+else:
+    model, stats = train_finetune(args.epochs, args.unfreeze_top)
+
+# ----------- Step 6: Evaluate ----------- #
+print(f"\n🎯 Validation Accuracy: {stats['accuracy'] * 100:.2f}% "
+      f"(training {stats['train_s']:.1f}s, {stats['train_s'] / args.epochs:.2f}s/epoch)")
+
+# ----------- Step 7: Save Model ----------- #
+# Same architecture either way (the head layers are shared with the full model)
+model.save(args.output)
+print(f"💾 Model saved as '{args.output}'")
@@ -1,33 +1,104 @@
+import time
+_T0 = time.perf_counter()  # process start, for time-to-first-paint
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import numpy as np
-import tensorflow as tf
 import os
-import subprocess
 import math
+import sys
+
+import case_index
+import gradcam
+import metrics
+import mri_model
+from batch_classify import classify_paths, classify_paths_remote, collect_images
+from inference_server import InferenceClient
+from model_registry import registry
+from prediction_cache import PredictionCache
+from startup_timer import StartupTimer
+from ui_tasks import TaskRunner
 
 class MRIClassifierApp:
-    def __init__(self, root):
+    def __init__(self, root, shell=None, timer=None):
         self.root = root
-        self.root.title("RespireX | MRI Scan Classifier")
-        self.root.geometry("1100x700")
-        self.root.configure(bg="#111")
+        self.shell = shell
+        self.timer = timer or StartupTimer("mri")
+        self.frame = tk.Frame(root, bg="#111")
 
         self.class_names = ['Benign', 'Malignant', 'Normal']
         self.image_path = None
-        self.model = None
-
-        try:
-            self.model = tf.keras.models.load_model("my_model.keras")
-        except Exception as e:
-            messagebox.showerror("Model Load Error", str(e))
+        self.decoded = None  # the selected image, decoded once: preview + model tensor
+        self.image_key = None
+        self.img_tk = None
+        self.heat_tk = None  # preview with the Grad-CAM overlay, once predicted
+        # Scan digest -> (probabilities, embedding, heatmap image), for the current model
+        self.results = PredictionCache(gradcam.CACHE_SIZE)
+        self._tensor_buf = mri_model.new_buffer()
+        self.mri_slot = None  # HotModel: swaps in a new model file without a restart
+        self.cases = None
+        self.cases_error = None  # set when the case archive cannot be read; only similar cases are off
+        self.embedding = None  # embedding of the last prediction, for "Add to Case Archive"
+        self.last_prediction = None
+        # Image decode and inference run on a worker thread so the window stays responsive
+        self.tasks = TaskRunner(self.root, on_busy=self._set_busy)
+
+        self.model_error = None
+
+        # Use the resident inference server if one is running, otherwise load the model here
+        self.remote = InferenceClient.discover(need=("mri",))
 
         self._build_ui()
+        self.timer.mark_first_paint(self.root)
+
+        # TensorFlow import, model load and a warm-up pass happen in the background;
+        # Predict is enabled once they finish
+        if self.remote is None:
+            self.predict_btn.config(state="disabled", text="Loading model…")
+            self.loader = TaskRunner(self.root, poll_ms=50)
+            self.loader.submit(self._load_model, self._model_ready, on_error=self._model_failed)
+        else:
+            self.timer.mark("model_ready")
+
+    @property
+    def model(self):
+        return self.mri_slot.current if self.mri_slot is not None else None
+
+    def _load_model(self, task):
+        # Loaded and warmed once per process by the registry, including the similar-case
+        # wrapper, so neither the first click nor a hot reload traces anything here
+        return registry.get("mri")
+
+    def _model_ready(self, slot):
+        self.mri_slot = slot
+        self.mri_slot.on_swap.append(lambda new, old: self.results.clear())
+        self.timer.mark("model_ready")
+        self.predict_btn.config(text="Predict", state="disabled" if self.tasks.busy else "normal")
+        # Loaded on its own, so a missing or broken archive never stops classification
+        self.loader.submit(lambda task: case_index.archive(), self._cases_ready, on_error=self._cases_failed)
+
+    def _cases_ready(self, cases):
+        self.cases = cases
+
+    def _cases_failed(self, e):
+        self.cases_error = str(e)
+        print(f"[cases] similar-case search is off: {e}", file=sys.stderr)
+        self._reset_similar()
+
+    def _model_failed(self, e):
+        self.model_error = str(e)
+        self.predict_btn.config(text="Predict")
+        messagebox.showerror("Model Load Error", self.model_error)
+
+    def on_show(self):
+        self.root.title("RespireX | MRI Scan Classifier")
+        self.root.geometry("1100x700")
+        self.root.configure(bg="#111")
 
     def _build_ui(self):
         # Header
-        header = tk.Frame(self.root, bg="#111")
+        header = tk.Frame(self.frame, bg="#111")
         header.pack(fill="x", pady=5)
         back_btn = tk.Label(header, text="← Back to Dashboard", font=("Orbitron", 10), fg="#00f6ff", bg="#111", cursor="hand2")
         back_btn.pack(side="left", padx=10)
@@ -36,7 +107,7 @@ class MRIClassifierApp:
         title = tk.Label(header, text="MRI Scan Classifier", font=("Orbitron", 20, "bold"), fg="#00f6ff", bg="#111")
         title.pack(pady=5)
 
-        content = tk.Frame(self.root, bg="#111")
+        content = tk.Frame(self.frame, bg="#111")
         content.pack(fill="both", expand=True)
 
         # Left Panel - Image
@@ -46,6 +117,14 @@ class MRIClassifierApp:
         self.preview_panel = tk.Label(self.left_panel, bg="#111")
         self.preview_panel.pack(pady=10)
 
+        # Grad-CAM overlay: where the model looked for its top class (local Keras model only)
+        self.show_heatmap = tk.BooleanVar(value=True)
+        self.heatmap_check = tk.Checkbutton(self.left_panel, text="Show heatmap", variable=self.show_heatmap,
+                                            command=self._show_preview, font=("Orbitron", 10), fg="white",
+                                            bg="#111", selectcolor="#222", activebackground="#111",
+                                            activeforeground="#00f6ff", state="disabled")
+        self.heatmap_check.pack()
+
         self.image_info_label = tk.Label(self.left_panel, text="", fg="white", bg="#111", font=("Orbitron", 10))
         self.image_info_label.pack(pady=5)
 
@@ -58,6 +137,13 @@ class MRIClassifierApp:
         tk.Button(btn_frame, text="Clear Image", font=("Orbitron", 12), bg="#222", fg="#00f6ff",
                   relief="flat", command=self.clear_image).pack(side='left', padx=10)
 
+        self.folder_btn = tk.Button(btn_frame, text="Classify Folder", font=("Orbitron", 12), bg="#222",
+                                    fg="#00f6ff", relief="flat", command=self.classify_folder)
+        self.folder_btn.pack(side='left', padx=10)
+
+        self.batch_status = tk.Label(self.left_panel, text="", fg="white", bg="#111", font=("Orbitron", 10))
+        self.batch_status.pack(pady=5)
+
         # Right Panel - Prediction
         self.right_panel = tk.Frame(content, bg="#111")
         self.right_panel.pack(side="right", fill="both", expand=True, padx=20, pady=10)
@@ -76,74 +162,271 @@ class MRIClassifierApp:
         self.top_result = tk.Label(self.right_panel, text="", font=("Orbitron", 14, "bold"), fg="#00f6ff", bg="#111")
         self.top_result.pack(pady=15)
 
+        # Similar reviewed cases (local Keras model only: needs the pooled embedding)
+        tk.Label(self.right_panel, text="Similar Reviewed Cases", font=("Orbitron", 12, "bold"),
+                 fg="#00f6ff", bg="#111").pack(pady=(5, 2))
+        self.similar_list = tk.Listbox(self.right_panel, height=5, width=48, bg="#222", fg="white",
+                                       font=("Orbitron", 9), relief="flat", highlightthickness=0,
+                                       selectbackground="#005f5f")
+        self.similar_list.pack(pady=2)
+        self.similar_list.bind("<Double-Button-1>", self._open_similar)
+        self.similar_paths = []
+        self.archive_btn = tk.Button(self.right_panel, text="Add to Case Archive", font=("Orbitron", 10),
+                                     bg="#222", fg="#00f6ff", relief="flat", state="disabled",
+                                     command=self.add_to_archive)
+        self.archive_btn.pack(pady=2)
+
         self.predict_btn = tk.Button(self.right_panel, text="Predict", font=("Orbitron", 12), bg="#222", fg="#00f6ff",
                                      relief="flat", command=self.predict)
         self.predict_btn.pack(pady=10)
 
+        self.cancel_btn = tk.Button(self.right_panel, text="Cancel", font=("Orbitron", 12), bg="#222", fg="#00f6ff",
+                                    relief="flat", state="disabled", command=self.tasks.cancel)
+        self.cancel_btn.pack(pady=5)
+
+        self.busy_bar = ttk.Progressbar(self.right_panel, length=300, mode="indeterminate")
+
     def go_back_to_dashboard(self, *_):
-        self.root.destroy()
-        subprocess.Popen(["python3", "app.py"])
+        self.shell.show("dashboard")
 
     def upload_image(self):
         path = filedialog.askopenfilename(filetypes=[("Image Files", "*.jpg *.png *.jpeg")])
-        if not path:
+        if path:
+            self.open_image(path)
+
+    def open_image(self, path):
+        # Decode once for both the preview and Predict; while a prediction is still reading
+        # the shared buffer, this image gets its own
+        try:
+            decoded = mri_model.decode_once(path, out=None if self.tasks.busy else self._tensor_buf)
+        except Exception as e:
+            messagebox.showerror("Image Error", f"Could not open this image:\n{e}")
             return
 
+        for stage, ms in decoded.timings.items():
+            metrics.observe(f"mri.{stage}", ms / 1e3)  # read, decode, resize, normalize
+
         self.image_path = path
-        img = Image.open(path).resize((224, 224))
-        self.img_tk = ImageTk.PhotoImage(img)
-        self.preview_panel.config(image=self.img_tk)
+        self.decoded = decoded
+        self.image_key = gradcam.image_key(decoded.data)
+        with metrics.span("mri.preview"):
+            self.img_tk = ImageTk.PhotoImage(decoded.preview)
+            self.preview_panel.config(image=self.img_tk)
 
-        file_info = os.stat(path)
-        size_kb = math.ceil(file_info.st_size / 1024)
+        size_kb = math.ceil(len(decoded.data) / 1024)
         file_name = os.path.basename(path)
         file_type = os.path.splitext(path)[1].upper().replace(".", "")
+        width, height = decoded.source_size
 
         self.image_info_label.config(
-            text=f"File: {file_name}\nType: {file_type} | Size: {size_kb} KB | Resolution: 224x224")
+            text=f"File: {file_name}\nType: {file_type} | Size: {size_kb} KB | Resolution: {width}x{height}")
+
+        self._reset_results()
+        if not self.remote and self.model is not None and self.results.get(self.image_key) is not None:
+            self.predict()  # seen this scan before: the result and heatmap come straight from the cache
 
+    def _reset_results(self):
+        self.heat_tk = None
+        self.heatmap_check.config(state="disabled")
+        self._show_preview()
         self.top_result.config(text="")
         for bar in self.progress_bars.values():
             bar["value"] = 0
+        self.embedding = None
+        self._reset_similar()
+
+    def _reset_similar(self):
+        self.similar_list.delete(0, "end")
+        self.similar_paths = []
+        if self.cases_error is not None:
+            self.similar_list.insert("end", "Case archive unavailable")
+        self.archive_btn.config(state="disabled")
+
+    def classify_folder(self):
+        if self.tasks.busy:
+            return
+        folder = filedialog.askdirectory(title="Select a folder of MRI scans")
+        if not folder:
+            return
+        paths = collect_images([folder])
+        if not paths:
+            messagebox.showwarning("No Images", "No .jpg/.jpeg/.png images found in that folder.")
+            return
+        output = filedialog.asksaveasfilename(title="Save results as", defaultextension=".csv",
+                                              initialfile="mri_batch_results.csv",
+                                              filetypes=[("CSV Files", "*.csv")])
+        if not output:
+            return
+
+        self.batch_status.config(text=f"Classifying 0/{len(paths)}…")
+
+        def work(task):
+            if self.remote:
+                # Same server as single predictions; no second model copy in this process
+                return classify_paths_remote(paths, self.remote, output, progress=task.report, cancel=task.cancelled)
+            model = self.model or registry.get("mri").current
+            return classify_paths(paths, model, output, progress=task.report, cancel=task.cancelled)
+
+        def done(stats):
+            self.batch_status.config(
+                text=f"{stats['images']} images in {stats['seconds']:.1f}s "
+                     f"({stats['images_per_sec']:.1f} img/s), {stats['errors']} unreadable")
+
+        def failed(e):
+            self.batch_status.config(text="")
+            messagebox.showerror("Batch Error", str(e))
+
+        self.tasks.submit(work, done, on_error=failed,
+                          on_progress=lambda d, t: self.batch_status.config(text=f"Classifying {d}/{t}…"))
 
     def clear_image(self):
         self.image_path = None
+        self.decoded = None
+        self.image_key = None
+        self.img_tk = None
         self.preview_panel.config(image="")
         self.image_info_label.config(text="")
-        self.top_result.config(text="")
-        for bar in self.progress_bars.values():
-            bar["value"] = 0
+        self._reset_results()
 
     def predict(self):
-        if not self.image_path:
+        if self.tasks.busy:
+            return  # ignore repeat clicks while a job is running
+        if self.decoded is None:
             messagebox.showwarning("No Image", "Please upload an image first.")
             return
 
-        if not self.model:
-            messagebox.showerror("Model Error", "Model not loaded.")
+        if not self.model and not self.remote:
+            if self.model_error is None:
+                messagebox.showinfo("Model Loading", "The model is still loading, please try again in a moment.")
+            else:
+                messagebox.showerror("Model Error", "Model not loaded.")
             return
 
-        try:
-            img = Image.open(self.image_path).resize((224, 224)).convert("RGB")
-            img_array = np.array(img) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
-            prediction = self.model.predict(img_array)[0]
+        decoded, path, key = self.decoded, self.image_path, self.image_key
+        clicked = time.perf_counter()
+
+        def work(task):
+            # No file I/O here: the bytes and the tensor were prepared when the image was chosen
+            t = time.perf_counter()
+            embedding, similar, heatmap = None, [], None
+            generation = self.results.generation  # read before the model: a swap after this drops our put
+            model = self.model  # one model for the whole prediction, even if a reload lands meanwhile
+            cached = None if self.remote else self.results.get(key)
+            if cached is not None:
+                prediction, embedding, heatmap = cached  # this scan, this model: no inference at all
+                metrics.inc("mri.cache_hits")
+            else:
+                # Same model returning (probabilities, embedding, heatmap), traced at load time
+                fn = None if self.remote else gradcam.heatmap_model(model)
+                if self.remote:
+                    probs = self.remote.classify_image(decoded.data)["probabilities"]
+                    prediction = np.array([probs[cls] for cls in self.class_names])
+                elif fn is not None:
+                    # One forward pass gives the class probabilities, the embedding for similar-case
+                    # search and the Grad-CAM heatmap of the top class
+                    probs, emb, cams = gradcam.predict_with_heatmaps(fn, decoded.tensor)
+                    prediction, embedding = probs[0], emb[0]
+                else:
+                    # Same call path as the warm-up pass, so no retracing on the first click
+                    prediction = mri_model.predict_batch(model, decoded.tensor)[0]
+                decoded.timings["inference"] = (time.perf_counter() - t) * 1e3
+                metrics.observe("mri.inference", decoded.timings["inference"] / 1e3)
+                if fn is not None:
+                    with metrics.span("mri.heatmap"):
+                        heatmap = gradcam.overlay(decoded.preview, cams[0])
+                if not self.remote:
+                    self.results.put(key, (prediction, embedding, heatmap), generation)
+            if embedding is not None and self.cases:
+                with metrics.span("mri.similar"):
+                    similar = self.cases.search(embedding, k=5, exclude_path=os.path.abspath(path))
+            return prediction, embedding, similar, heatmap
+
+        def done(result):
+            if decoded is not self.decoded:
+                return  # the image was changed or cleared while this one was running
+            prediction, self.embedding, similar, heatmap = result
+            self.last_prediction = prediction
+            with metrics.span("mri.render"):
+                self.show_prediction(prediction)
+                self.show_similar(similar)
+                self.show_heatmap_overlay(heatmap)
+            metrics.observe("mri.predict", time.perf_counter() - clicked)  # click to result on screen
+            metrics.inc("mri.predictions")
+            self.timer.mark("first_prediction")
+
+        def failed(e):
+            metrics.inc("mri.errors")
+            messagebox.showerror("Prediction Error", str(e))
 
-            top_index = np.argmax(prediction)
-            top_class = self.class_names[top_index]
-            top_conf = prediction[top_index] * 100
+        self.tasks.submit(work, done, on_error=failed)
 
-            for i, cls in enumerate(self.class_names):
-                conf = prediction[i] * 100
-                self.progress_bars[cls]["value"] = conf
+    def show_prediction(self, prediction):
+        top_index = np.argmax(prediction)
+        top_class = self.class_names[top_index]
+        top_conf = prediction[top_index] * 100
 
-            color = "#00ff88" if top_class == "Normal" else ("#ffe266" if top_class == "Benign" else "#ff4c4c")
-            self.top_result.config(text=f"{top_class} ({top_conf:.2f}%)", fg=color)
+        for i, cls in enumerate(self.class_names):
+            conf = prediction[i] * 100
+            self.progress_bars[cls]["value"] = conf
 
-        except Exception as e:
-            messagebox.showerror("Prediction Error", str(e))
+        color = "#00ff88" if top_class == "Normal" else ("#ffe266" if top_class == "Benign" else "#ff4c4c")
+        self.top_result.config(text=f"{top_class} ({top_conf:.2f}%)", fg=color)
+
+    def show_heatmap_overlay(self, heatmap):
+        self.heat_tk = ImageTk.PhotoImage(heatmap) if heatmap is not None else None
+        self.heatmap_check.config(state="normal" if heatmap is not None else "disabled")
+        self._show_preview()
+
+    def _show_preview(self):
+        """The scan alone or with its heatmap; both images are kept, so toggling redraws nothing."""
+        show_heat = self.heat_tk is not None and self.show_heatmap.get()
+        self.preview_panel.config(image=self.heat_tk if show_heat else (self.img_tk or ""))
+
+    def show_similar(self, similar):
+        if self.cases_error is not None:
+            return
+        self.similar_list.delete(0, "end")
+        self.similar_paths = [case["path"] for _, case in similar]
+        for score, case in similar:
+            self.similar_list.insert("end", f"{score * 100:5.1f}%  {case['label']:<9}  {os.path.basename(case['path'])}")
+        if self.embedding is not None and not similar:
+            self.similar_list.insert("end", "No archived cases yet")
+        self.archive_btn.config(state="normal" if self.embedding is not None else "disabled")
+
+    def _open_similar(self, event=None):
+        sel = self.similar_list.curselection()
+        if not sel or sel[0] >= len(self.similar_paths):
+            return
+        path = self.similar_paths[sel[0]]
+        if not os.path.isfile(path):
+            messagebox.showwarning("Missing Image", f"{path} is no longer on disk.")
+            return
+        self.open_image(path)
+
+    def add_to_archive(self):
+        if self.embedding is None or self.tasks.busy:
+            return
+        label, conf = mri_model.top_class(self.last_prediction)
+        record = {"path": os.path.abspath(self.image_path), "label": label, "confidence": f"{conf:.4f}"}
+        embedding = self.embedding
+        self.archive_btn.config(state="disabled")
+        # Usually a quick append, but it can trigger re-clustering of a large archive
+        self.tasks.submit(lambda task: self.cases.add(embedding, [record]),
+                          lambda ids: self.batch_status.config(text=f"Added to case archive ({len(self.cases):,} cases)"),
+                          on_error=lambda e: messagebox.showerror("Archive Error", str(e)))
+
+    def _set_busy(self, busy):
+        state = "disabled" if busy else "normal"
+        self.predict_btn.config(state="normal" if not busy and (self.model or self.remote) else "disabled")
+        self.folder_btn.config(state=state)
+        self.cancel_btn.config(state="normal" if busy else "disabled")
+        if busy:
+            self.busy_bar.pack(pady=5)
+            self.busy_bar.start(15)
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = MRIClassifierApp(root)
-    root.mainloop()
+    from shell import run
+    run("mri", {"mri": lambda root, shell: MRIClassifierApp(root, shell, StartupTimer("mri", start=_T0))})
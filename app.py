@@ -1,14 +1,18 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 from PIL import Image, ImageTk
-import urllib.request, io, subprocess
 
 import random
 
+import banner_cache
+from search_index import app_index, snippet
+from ui_tasks import TaskRunner
+
 # ---------- Theme Colors ----------
 BG_DARK = "#111"
 FG_NEON = "#00f6ff"
 FG_TEXT = "#ffffff"
+SEARCH_DELAY_MS = 150  # wait for a pause in typing before searching
 
 # ---------- Content Sections ----------
 
@@ -84,21 +88,24 @@ class CollapsibleSection(tk.Frame):
 
 # ---------- Dashboard Class ----------
 class Dashboard:
-    def __init__(self, root):
+    def __init__(self, root, shell=None):
         self.root = root
-        self.root.title("RespireX | Dashboard")
-        self.root.geometry("1280x800")
+        self.shell = shell
+        self.frame = tk.Frame(root, bg=BG_DARK)
         self.dark_mode = True
         self.fullscreen = False
 
         self._build_ui()
         self._bind_keys()
 
-    def _build_ui(self):
-        self.root.configure(bg=BG_DARK)
+    def on_show(self):
+        self.root.title("RespireX | Dashboard")
+        self.root.geometry("1280x800")
+        self.root.configure(bg=BG_DARK if self.dark_mode else "#f7f7f7")
 
+    def _build_ui(self):
         # Header
-        header = tk.Frame(self.root, bg=BG_DARK)
+        header = self.header = tk.Frame(self.frame, bg=BG_DARK)
         header.pack(fill="x", pady=2)
         tk.Label(header, text="🫁 RespireX", font=("Orbitron", 20, "bold"),
                  bg=BG_DARK, fg=FG_NEON).pack(side="left", padx=10)
@@ -107,10 +114,15 @@ class Dashboard:
                                    font=("Orbitron", 10), bg=BG_DARK, fg=FG_NEON)
         self.breadcrumb.pack(side="left", padx=10)
 
-        # Search bar
+        # Search bar (searches as you type; 🔍 or Enter searches immediately)
         self.search_var = tk.StringVar()
-        tk.Entry(header, textvariable=self.search_var, width=20, bg="#222", fg=FG_TEXT,
-                 insertbackground=FG_TEXT, relief="flat", font=("Orbitron", 10)).pack(side="right", padx=5)
+        self._search_after = None
+        entry = tk.Entry(header, textvariable=self.search_var, width=20, bg="#222", fg=FG_TEXT,
+                         insertbackground=FG_TEXT, relief="flat", font=("Orbitron", 10))
+        entry.pack(side="right", padx=5)
+        entry.bind("<KeyRelease>", self._schedule_search)
+        entry.bind("<Return>", lambda e: self._run_search())
+        entry.bind("<Escape>", lambda e: (self.search_var.set(""), self._run_search()))
         tk.Button(header, text="🔍", command=self._run_search, bg="#222", fg=FG_NEON, relief="flat").pack(side="right")
 
         # Sitemap & theme
@@ -119,8 +131,10 @@ class Dashboard:
         tk.Button(header, text="🗺", bg="#222", fg=FG_NEON, relief="flat",
                   command=self._show_sitemap).pack(side="right")
 
+        self._build_search_results()
+
         # Sidebar
-        sidebar = tk.Frame(self.root, bg=BG_DARK, width=200)
+        sidebar = tk.Frame(self.frame, bg=BG_DARK, width=200)
         sidebar.pack(side="left", fill="y")
 
         tk.Button(sidebar, text="🏠  Dashboard", font=("Orbitron", 10), bg="#222",
@@ -131,7 +145,7 @@ class Dashboard:
                   fg=FG_NEON, relief="flat", command=self._launch_mri).pack(fill="x", pady=4, padx=5)
 
         # Scrollable main content
-        main = tk.Frame(self.root, bg=BG_DARK)
+        main = tk.Frame(self.frame, bg=BG_DARK)
         main.pack(side="left", fill="both", expand=True)
 
         canvas = tk.Canvas(main, bg=BG_DARK, highlightthickness=0)
@@ -153,20 +167,24 @@ class Dashboard:
         self._build_collapsible_sections()
 
     def _build_banner(self):
-        try:
-            url = "https://img.freepik.com/premium-photo/virtual-human-lungs-dark-blue-background-low-poly.jpg"
-            with urllib.request.urlopen(url) as u:
-                raw_data = u.read()
-            image = Image.open(io.BytesIO(raw_data))
-            image = image.resize((600, 250))
-            self.banner_img = ImageTk.PhotoImage(image)
-            tk.Label(self.content_frame, image=self.banner_img, bg=BG_DARK).pack(pady=10)
-        except Exception:
-            pass
+        # Cached banner (already 600x250) if we have one, else an instant local placeholder;
+        # the network is only touched in the background and only when nothing is cached
+        image = banner_cache.load_cached()
+        self.banner_img = ImageTk.PhotoImage(image or banner_cache.placeholder())
+        self.banner_label = tk.Label(self.content_frame, image=self.banner_img, bg=BG_DARK)
+        self.banner_label.pack(pady=10)
+        if image is None:
+            self.banner_task = TaskRunner(self.root, poll_ms=200)
+            self.banner_task.submit(lambda task: banner_cache.fetch_and_cache(), self._show_banner,
+                                    on_error=lambda e: None)  # offline: keep the placeholder
 
         tk.Label(self.content_frame, text="Lung Cancer Detection & Education Hub",
                  font=("Orbitron", 16, "bold"), fg=FG_NEON, bg=BG_DARK).pack(pady=10)
 
+    def _show_banner(self, image):
+        self.banner_img = ImageTk.PhotoImage(image)
+        self.banner_label.config(image=self.banner_img)
+
     def _build_buttons(self):
         wrap = tk.Frame(self.content_frame, bg=BG_DARK)
         wrap.pack(pady=10)
@@ -187,26 +205,102 @@ class Dashboard:
             section.pack(fill="x", padx=10, pady=5)
             self.sections.append(section)
 
+    # ---------- Search ----------
+    def _build_search_results(self):
+        # Hidden until there is a query; packed right under the header
+        self.results_frame = tk.Frame(self.frame, bg=BG_DARK)
+        self.results_count = tk.Label(self.results_frame, font=("Orbitron", 9), fg=FG_NEON, bg=BG_DARK, anchor="w")
+        self.results_count.pack(fill="x", padx=10)
+        self.results_text = tk.Text(self.results_frame, height=8, wrap="word", bg="#181818", fg=FG_TEXT,
+                                    relief="flat", font=("Orbitron", 9), cursor="arrow", padx=8, pady=4)
+        self.results_text.pack(fill="x", padx=10, pady=(0, 6))
+        self.results_text.tag_configure("title", foreground=FG_NEON, font=("Orbitron", 10, "bold"))
+        self.results_text.tag_configure("hit", background="#005f5f")
+        self.results_text.tag_configure("source", foreground="#888")
+        self.results_text.config(state="disabled")
+
+    def _schedule_search(self, event=None):
+        if event is not None and event.keysym in ("Return", "Escape"):
+            return
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+        self._search_after = self.root.after(SEARCH_DELAY_MS, self._run_search)
+
     def _run_search(self):
-        query = self.search_var.get().strip().lower()
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+            self._search_after = None
+        query = self.search_var.get().strip()
         if not query:
+            self.results_frame.pack_forget()
+            return
+
+        # The index is built on the first query (a few ms) and reused afterwards
+        results = app_index(CONTENT_SECTIONS).search(query)
+        self._show_results(query, results)
+
+    def _show_results(self, query, results):
+        text = self.results_text
+        text.config(state="normal")
+        text.delete("1.0", "end")
+        self.results_count.config(text=f"{len(results)} result(s) for “{query}”")
+        for n, result in enumerate(results):
+            doc = result.doc
+            tag = f"result-{n}"
+            start = text.index("end-1c")
+            self._insert_marked(text, doc.title, result.title_spans, ("title", tag))
+            where = "Dashboard" if doc.source == "dashboard" else "Symptoms Predictor"
+            text.insert("end", f"  · {where}\n", ("source", tag))
+            body, spans = snippet(doc.text, result.text_spans)
+            self._insert_marked(text, body, spans, (tag,))
+            text.insert("end", "\n\n", tag)
+            text.tag_bind(tag, "<Button-1>", lambda e, d=doc: self._open_result(d))
+            text.tag_bind(tag, "<Enter>", lambda e: text.config(cursor="hand2"))
+            text.tag_bind(tag, "<Leave>", lambda e: text.config(cursor="arrow"))
+            if n == 0:
+                text.see(start)
+        if not results:
+            text.insert("end", "No matches. Try fewer or shorter words.")
+        text.config(state="disabled")
+        if not self.results_frame.winfo_ismapped():
+            self.results_frame.pack(fill="x", after=self.header)
+
+    @staticmethod
+    def _insert_marked(text, body, spans, tags):
+        pos = 0
+        for s, e in spans:
+            if s < pos:
+                continue
+            text.insert("end", body[pos:s], tags)
+            text.insert("end", body[s:e], tags + ("hit",))
+            pos = e
+        text.insert("end", body[pos:], tags)
+
+    def _open_result(self, doc):
+        if doc.source == "symptom":
+            screen = self.shell.show("symptom")
+            screen.current_card = doc.key
+            screen.display_card(doc.key)
             return
-        for section in self.sections:
-            if query in section.title.lower() or query in section.content.lower():
-                section.toggle_btn.config(bg="#005f5f")
-                self.canvas.yview_moveto(section.winfo_y() / self.content_frame.winfo_height())
-                self.root.after(1000, lambda btn=section.toggle_btn: btn.config(bg="#222"))
-                break
+        section = self.sections[doc.key]
+        if not section.expanded:
+            section.toggle()
+        self.root.update_idletasks()
+        section.toggle_btn.config(bg="#005f5f")
+        self.canvas.yview_moveto(section.winfo_y() / self.content_frame.winfo_height())
+        self.root.after(1000, lambda btn=section.toggle_btn: btn.config(bg="#222"))
 
     def _toggle_theme(self):
         self.dark_mode = not self.dark_mode
         self.root.configure(bg=BG_DARK if self.dark_mode else "#f7f7f7")
+        self.frame.configure(bg=BG_DARK if self.dark_mode else "#f7f7f7")
 
     def _show_sitemap(self):
         messagebox.showinfo("Sitemap", "\n".join(h for h, _ in CONTENT_SECTIONS))
 
     def _bind_keys(self):
-        self.root.bind("/", lambda e: self.root.focus_get().tk_focusNext().focus())
+        # Bound on the shared root, so only act while the dashboard is the visible screen
+        self.root.bind("/", lambda e: self.frame.winfo_ismapped() and self.root.focus_get().tk_focusNext().focus())
         self.root.bind("<F11>", lambda e: self._toggle_fullscreen())
 
     def _toggle_fullscreen(self):
@@ -214,16 +308,13 @@ class Dashboard:
         self.root.attributes("-fullscreen", self.fullscreen)
 
     def _launch_symptom(self):
-        subprocess.Popen(["python3", "Symptom_predictor_ui.py"])
-        self.root.destroy()  # ✅ Close dashboard after launching
+        self.shell.show("symptom")  # ✅ Same process; the screen is built once and kept
 
     def _launch_mri(self):
-        subprocess.Popen(["python3", "Xray_predictor_ui.py"])
-        self.root.destroy()  # ✅ Close dashboard after launching
+        self.shell.show("mri")
 
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    Dashboard(root)
-    root.mainloop()
+    from shell import run
+    run("dashboard", {"dashboard": Dashboard})
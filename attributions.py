@@ -0,0 +1,150 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+BLOCK_ROWS = 1024  # rows per gather; keeps the (rows, trees, features * classes) temporary near 10 MB
+
+
+# ---------- Tree Decomposition ----------
+def node_contributions(forest):
+    """Per-node (features, classes) contributions accumulated along the path from the root.
+
+    Walking from a node to its child moves the class distribution by
+    ``value[child] - value[node]``; that change is credited to the feature split at the
+    node. Summing the credits down to a leaf gives, for every leaf, how much each
+    feature moved that tree's vote away from its root distribution.
+    """
+    n_nodes, n_classes = forest.value.shape
+    contrib = np.zeros((n_nodes, forest.n_features, n_classes), dtype=np.float64)
+    internal = forest.left != np.arange(n_nodes)
+    frontier = np.asarray(forest.roots, dtype=np.intp)
+    for _ in range(forest.max_depth):
+        frontier = frontier[internal[frontier]]
+        if not len(frontier):
+            break
+        children = []
+        for child in (forest.left[frontier], forest.right[frontier]):
+            contrib[child] = contrib[frontier]
+            contrib[child, forest.feature[frontier]] += forest.value[child] - forest.value[frontier]
+            children.append(child)
+        frontier = np.concatenate(children)
+    return contrib
+
+
+class ForestAttributions:
+    """Saabas-style feature attributions for a CompiledForest, precomputed per node.
+
+    For each row, ``bias + contributions.sum(features) == predict_proba`` exactly
+    (up to float32 rounding): the bias is the forest's average root distribution and
+    each feature's share is the average over trees of the credits on the row's path.
+    Because every leaf's path credits are computed once up front, attributing a batch
+    is the same leaf traversal as predicting, plus one gather per block of rows.
+    """
+
+    def __init__(self, forest, features=None):
+        self.forest = forest
+        self.features = list(features) if features is not None else [f"x{i}" for i in range(forest.n_features)]
+        self.n_features = forest.n_features
+        self.n_classes = forest.value.shape[1]
+        self.bias = forest.value[forest.roots].mean(axis=0)
+        # Flattened (nodes, features * classes) float32: one contiguous row per leaf to gather
+        self.table = node_contributions(forest).astype(np.float32).reshape(len(forest.feature), -1)
+
+    def contributions(self, X):
+        """(rows, features, classes) contributions for every class, in one vectorized pass per block."""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        out = np.empty((len(X), self.n_features * self.n_classes), dtype=np.float32)
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            out[start:start + len(block)] = self.table[self.forest.leaves(block)].mean(axis=1)
+        return out.reshape(len(X), self.n_features, self.n_classes)
+
+    def explain_one(self, values, top=3):
+        """(predicted class index, probabilities, [(feature, contribution), ...]) for one patient.
+
+        Contributions are toward the predicted class, largest first, and only those that
+        raised its probability are listed.
+        """
+        leaves = self.forest.leaves(np.asarray(values)[None, :])[0]
+        contrib = self.table[leaves].mean(axis=0).reshape(self.n_features, self.n_classes)
+        proba = self.forest.value[leaves].mean(axis=0)
+        k = int(np.argmax(proba))
+        order = np.argsort(-contrib[:, k])[:top]
+        return k, proba, [(self.features[i], float(contrib[i, k])) for i in order if contrib[i, k] > 0]
+
+
+def top_contributors(contrib, class_index, features, top=3):
+    """For a (rows, features, classes) batch: the `top` feature names and values per row.
+
+    `class_index` is one class for all rows or an array with one per row (e.g. the predicted class).
+    """
+    if np.ndim(class_index):
+        per_class = np.take_along_axis(contrib, np.asarray(class_index)[:, None, None], axis=2)[:, :, 0]
+    else:
+        per_class = contrib[:, :, class_index]
+    order = np.argsort(-per_class, axis=1)[:, :top]
+    return np.asarray(features, dtype=object)[order], np.take_along_axis(per_class, order, axis=1)
+
+
+def format_factors(factors):
+    """[("Smoking", 0.21), ...] -> 'Smoking +21%, ...' (percentage points of the predicted class)."""
+    return ", ".join(f"{name} +{value * 100:.0f}%" for name, value in factors if value >= 0.005)
+
+
+# ---------- Check & Benchmark ----------
+def check_additivity(attr, n_rows=20_000, seed=0):
+    """Largest |bias + sum(contributions) - predict_proba| over random 0–9 rows."""
+    X = np.random.default_rng(seed).integers(0, 10, size=(n_rows, attr.n_features))
+    recon = attr.bias + attr.contributions(X).sum(axis=1)
+    return float(np.abs(recon - attr.forest.predict_proba(X)).max())
+
+
+def benchmark(attr, batch_rows=100_000, repeats=200, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, 10, size=(repeats, attr.n_features))
+    attr.explain_one(rows[0])
+    samples = []
+    for row in rows:
+        t0 = time.perf_counter()
+        attr.explain_one(row)
+        samples.append(time.perf_counter() - t0)
+    batch = rng.integers(0, 10, size=(batch_rows, attr.n_features))
+    t0 = time.perf_counter()
+    attr.contributions(batch)
+    elapsed = time.perf_counter() - t0
+    return {"row_p50_us": float(np.median(samples) * 1e6), "row_p99_us": float(np.percentile(samples, 99) * 1e6),
+            "rows_per_sec": batch_rows / elapsed}
+
+
+def main(argv=None):
+    from symptom_model import FEATURES, MODEL_PATH, SymptomPredictor
+
+    parser = argparse.ArgumentParser(description="Check and benchmark symptom model feature attributions.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=100_000, help="rows for the batch benchmark")
+    parser.add_argument("--explain", metavar="LEVELS", help="explain one patient, e.g. 3,4,5,2,7,1,0,9,6,8")
+    args = parser.parse_args(argv)
+
+    predictor = SymptomPredictor.from_file(args.model)
+    t0 = time.perf_counter()
+    attr = predictor.attributions
+    print(f"Precomputed {attr.table.shape[0]:,} node contributions ({attr.table.nbytes / 1e6:.1f} MB) "
+          f"in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+    if args.explain:
+        label, factors = predictor.explain_one([int(v) for v in args.explain.split(",")], top=len(FEATURES))
+        print(f"{label}: {format_factors(factors)}")
+        return 0
+    drift = check_additivity(attr)
+    print(f"Additivity: max |bias + Σ contributions - probability| = {drift:.2e}")
+    r = benchmark(attr, args.rows)
+    print(f"One patient: p50 {r['row_p50_us']:.1f} µs, p99 {r['row_p99_us']:.1f} µs | "
+          f"batch: {r['rows_per_sec']:,.0f} patients/s")
+    return 0 if drift < 1e-4 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
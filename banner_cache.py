@@ -0,0 +1,92 @@
+import hashlib
+import io
+import json
+import os
+import time
+import urllib.request
+
+from PIL import Image, ImageDraw
+
+BANNER_URL = "https://img.freepik.com/premium-photo/virtual-human-lungs-dark-blue-background-low-poly.jpg"
+BANNER_SIZE = (600, 250)
+CACHE_DIR = ".respirex_cache"
+FETCH_TIMEOUT = 5.0
+MAX_DOWNLOAD_BYTES = 5 * 1024 * 1024
+MAX_PIXELS = 40_000_000  # refuse decompression bombs before resizing
+
+
+def _paths(cache_dir, url):
+    key = hashlib.sha256(url.encode()).hexdigest()[:16]
+    base = os.path.join(cache_dir, f"banner-{key}")
+    return base + ".png", base + ".json"
+
+
+# ---------- Placeholder ----------
+def placeholder(size=BANNER_SIZE):
+    """Locally drawn stand-in shown while nothing is cached; costs no I/O."""
+    w, h = size
+    img = Image.new("RGB", size, "#111")
+    draw = ImageDraw.Draw(img)
+    for y in range(h):
+        shade = int(20 + 40 * y / h)
+        draw.line([(0, y), (w, y)], fill=(0, shade, shade + 10))
+    draw.text((w // 2 - 24, h // 2 - 6), "RespireX", fill="#00f6ff")
+    return img
+
+
+# ---------- Cache ----------
+def load_cached(url=BANNER_URL, cache_dir=CACHE_DIR, size=BANNER_SIZE):
+    """Return the cached, already-resized banner, or None if missing or failing validation."""
+    img_path, meta_path = _paths(cache_dir, url)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(img_path, "rb") as f:
+            data = f.read()
+    except (OSError, ValueError):
+        return None
+    if meta.get("url") != url or meta.get("sha256") != hashlib.sha256(data).hexdigest():
+        return None
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except Exception:
+        return None
+    return img if img.size == tuple(size) else None
+
+
+def fetch_and_cache(url=BANNER_URL, cache_dir=CACHE_DIR, size=BANNER_SIZE, timeout=FETCH_TIMEOUT):
+    """Download the banner (size- and time-limited), resize it once and store the result.
+
+    Meant to run off the Tk thread. Raises on any network or decode problem; the
+    caller keeps showing the placeholder in that case.
+    """
+    with urllib.request.urlopen(url, timeout=timeout) as u:
+        ctype = u.headers.get("Content-Type", "")
+        if ctype and not ctype.startswith("image/"):
+            raise ValueError(f"Banner URL returned {ctype}, not an image")
+        raw = u.read(MAX_DOWNLOAD_BYTES + 1)
+    if len(raw) > MAX_DOWNLOAD_BYTES:
+        raise ValueError("Banner image exceeds the download size limit")
+
+    img = Image.open(io.BytesIO(raw))
+    if img.width * img.height > MAX_PIXELS:
+        raise ValueError("Banner image dimensions are too large")
+    img.draft("RGB", size)  # JPEG: decode at reduced scale when possible
+    img = img.convert("RGB").resize(size)
+
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    data = buf.getvalue()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    img_path, meta_path = _paths(cache_dir, url)
+    # Write to temp names and rename so a crash never leaves a half-written cache entry
+    for path, payload, mode in ((img_path, data, "wb"),
+                                (meta_path, json.dumps({"url": url, "sha256": hashlib.sha256(data).hexdigest(),
+                                                        "fetched_at": time.time(), "source_bytes": len(raw)}), "w")):
+        tmp = path + ".tmp"
+        with open(tmp, mode) as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    return img
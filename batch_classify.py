@@ -0,0 +1,197 @@
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+import urllib.error
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+import mri_model
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
+RESULT_FIELDS = ["File", "Prediction", "Confidence"] + [f"P({c})" for c in mri_model.CLASS_NAMES] + ["Error"]
+
+
+def collect_images(sources):
+    """Expand directories (recursively) and file paths into a sorted list of image files."""
+    paths = []
+    for src in sources:
+        if os.path.isdir(src):
+            for dirpath, _, files in os.walk(src):
+                paths.extend(os.path.join(dirpath, f) for f in files
+                             if os.path.splitext(f)[1].lower() in IMAGE_EXTS)
+        elif os.path.isfile(src):
+            paths.append(src)
+    return sorted(paths)
+
+
+# ---------- Parallel Decode ----------
+def _decode_chunk(paths):
+    """Runs in a worker process: decode + resize to uint8 (a quarter of float32's pickle size)."""
+    out = []
+    for path in paths:
+        try:
+            out.append((path, np.asarray(mri_model.load_image(path), dtype=np.uint8), None))
+        except Exception as e:
+            out.append((path, None, str(e)))
+    return out
+
+
+def iter_batches(paths, batch_size=32, workers=None, chunk_size=4, prefetch_batches=2):
+    """Yield (paths, uint8 batch, [(path, error)]) in input order.
+
+    Decoding runs in a spawn-context process pool (TensorFlow is not fork-safe). At most
+    enough chunks for `prefetch_batches` batches, and at least two per worker, are in
+    flight, so the next batch is being decoded while the current one is in the model and
+    memory stays bounded however many images there are.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = (paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size))
+    max_inflight = max(2 * workers, prefetch_batches * batch_size // chunk_size)
+
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+        window = deque(pool.submit(_decode_chunk, c) for c in islice(chunks, max_inflight))
+        ready, failed = [], []
+        while window:
+            for path, arr, err in window.popleft().result():
+                if arr is None:
+                    failed.append((path, err))
+                else:
+                    ready.append((path, arr))
+            nxt = next(chunks, None)
+            if nxt is not None:
+                window.append(pool.submit(_decode_chunk, nxt))
+            while len(ready) >= batch_size or (ready and not window):
+                batch, ready = ready[:batch_size], ready[batch_size:]
+                yield [p for p, _ in batch], np.stack([a for _, a in batch]), failed
+                failed = []
+        if failed:
+            yield [], None, failed
+
+
+# ---------- Folder Classification ----------
+def classify_paths(paths, model, output_path, batch_size=32, workers=None, progress=None, cancel=None):
+    """Classify every image in `paths` and write one CSV row per image.
+
+    `progress(done, total)` is called after each batch; if `cancel()` returns True the
+    run stops after the current batch. Returns stats including end-to-end images/sec.
+    """
+    start = time.perf_counter()
+    done = errors = 0
+    model_seconds = 0.0
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_FIELDS)
+        for batch_paths, batch, failed in iter_batches(paths, batch_size, workers):
+            for path, err in failed:
+                writer.writerow([path, "", ""] + [""] * len(mri_model.CLASS_NAMES) + [err])
+            errors += len(failed)
+            if batch is not None:
+                t0 = time.perf_counter()
+                probs = mri_model.predict_batch(model, batch.astype(np.float32) / 255.0)
+                model_seconds += time.perf_counter() - t0
+                for path, row in zip(batch_paths, probs):
+                    label, conf = mri_model.top_class(row)
+                    writer.writerow([path, label, f"{conf:.6f}"] + [f"{p:.6f}" for p in row] + [""])
+            done += len(batch_paths) + len(failed)
+            if progress:
+                progress(done, len(paths))
+            if cancel and cancel():
+                break
+
+    elapsed = time.perf_counter() - start
+    return {
+        "images": done - errors,
+        "errors": errors,
+        "seconds": elapsed,
+        "model_seconds": model_seconds,
+        "images_per_sec": (done - errors) / elapsed if elapsed > 0 else 0.0,
+        "cancelled": done < len(paths),
+    }
+
+
+def classify_paths_remote(paths, client, output_path, concurrency=8, progress=None, cancel=None, chunk_size=32):
+    """classify_paths through a running inference server (an InferenceClient); same CSV and stats.
+
+    Scan bytes are sent as they are from `concurrency` threads. The server decodes them,
+    and its micro-batcher turns the concurrent requests into shared forward passes.
+    """
+    def one(path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            return path, None, str(e)
+        try:
+            probs = client.classify_image(data)["probabilities"]
+        except urllib.error.HTTPError as e:
+            if e.code != 400:
+                raise  # the server, not this image, is the problem
+            return path, None, json.loads(e.read() or b"{}").get("error", str(e))
+        return path, [probs[c] for c in mri_model.CLASS_NAMES], None
+
+    start = time.perf_counter()
+    done = errors = 0
+    with open(output_path, "w", newline="") as f, ThreadPoolExecutor(concurrency) as pool:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_FIELDS)
+        for i in range(0, len(paths), chunk_size):
+            for path, row, err in pool.map(one, paths[i:i + chunk_size]):
+                if row is None:
+                    writer.writerow([path, "", ""] + [""] * len(mri_model.CLASS_NAMES) + [err])
+                    errors += 1
+                else:
+                    label, conf = mri_model.top_class(row)
+                    writer.writerow([path, label, f"{conf:.6f}"] + [f"{p:.6f}" for p in row] + [""])
+                done += 1
+            if progress:
+                progress(done, len(paths))
+            if cancel and cancel():
+                break
+
+    elapsed = time.perf_counter() - start
+    return {
+        "images": done - errors,
+        "errors": errors,
+        "seconds": elapsed,
+        "model_seconds": elapsed,  # all of it is spent waiting on the server
+        "images_per_sec": (done - errors) / elapsed if elapsed > 0 else 0.0,
+        "cancelled": done < len(paths),
+    }
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a folder (or list) of MRI scans in batches.")
+    parser.add_argument("sources", nargs="+", help="image files and/or directories")
+    parser.add_argument("-o", "--output", default="mri_batch_results.csv")
+    parser.add_argument("--model", default=mri_model.MODEL_PATH)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="decode processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    paths = collect_images(args.sources)
+    if not paths:
+        print("No .jpg/.jpeg/.png images found.", file=sys.stderr)
+        return 1
+    model = mri_model.load_model(args.model)
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr)
+
+    stats = classify_paths(paths, model, args.output, args.batch_size, args.workers, progress)
+    print(f"\nClassified {stats['images']:,} images ({stats['errors']} unreadable) in {stats['seconds']:.1f}s: "
+          f"{stats['images_per_sec']:.1f} images/s end to end, "
+          f"{stats['model_seconds']:.1f}s in the model", file=sys.stderr)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference_server import InferenceClient, RemoteSymptomPredictor
+from symptom_model import ENGINES, FEATURES, MODEL_PATH, SymptomPredictor, invalid_rows
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+# ---------- Chunked Scoring ----------
+def iter_chunks(input_path, chunk_size=DEFAULT_CHUNK_SIZE, header=True):
+    """Yield DataFrames of at most `chunk_size` rows holding the ten feature columns."""
+    if header:
+        reader = pd.read_csv(input_path, chunksize=chunk_size)
+    else:
+        # Headerless files (like the old prediction_log.csv) carry the features in order
+        reader = pd.read_csv(input_path, chunksize=chunk_size, header=None,
+                             usecols=range(len(FEATURES)), names=FEATURES)
+    for chunk in reader:
+        missing = [f for f in FEATURES if f not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input is missing feature columns: {', '.join(missing)}")
+        yield chunk
+
+
+def score_chunk(predictor, chunk, skip_invalid=False, row_offset=0):
+    """Score one chunk; returns (output DataFrame, number of rows dropped as invalid)."""
+    X = chunk[FEATURES].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    bad = invalid_rows(X)
+    dropped = 0
+    if bad.any():
+        if not skip_invalid:
+            row = row_offset + int(np.argmax(bad)) + 1
+            raise ValueError(f"Row {row}: every feature must be a whole number between 0–9.")
+        dropped = int(bad.sum())
+        chunk = chunk[~bad]
+        X = X[~bad]
+
+    out = chunk.copy()
+    if len(X):
+        proba = predictor.predict_proba(X)
+        labels = np.asarray(predictor.classes, dtype=object)
+        out["Predicted Risk"] = labels[np.argmax(proba, axis=1)]
+        for i, name in enumerate(predictor.classes):
+            out[f"P({name})"] = proba[:, i]
+    else:
+        out["Predicted Risk"] = []
+        for name in predictor.classes:
+            out[f"P({name})"] = []
+    return out, dropped
+
+
+def score_csv(input_path, output_path, model_path=MODEL_PATH, chunk_size=DEFAULT_CHUNK_SIZE,
+              header=True, skip_invalid=False, predictor=None, engine="auto"):
+    """Stream `input_path` through the model chunk by chunk and write results to `output_path`.
+
+    Only one chunk is held in memory at a time. Returns a stats dict with row counts,
+    elapsed seconds and rows per second.
+    """
+    if predictor is None:
+        predictor = SymptomPredictor.from_file(model_path, engine=engine)
+    if predictor.classes is None:
+        # Remote predictors learn the class order from their first reply
+        predictor.predict_proba(np.zeros((1, len(FEATURES))))
+
+    start = time.perf_counter()
+    rows = dropped = 0
+    first = True
+    for chunk in iter_chunks(input_path, chunk_size, header):
+        out, n_bad = score_chunk(predictor, chunk, skip_invalid, row_offset=rows + dropped)
+        out.to_csv(output_path, mode="w" if first else "a", header=first, index=False,
+                   float_format="%.6f")
+        first = False
+        rows += len(out)
+        dropped += n_bad
+
+    if first:
+        # Empty input still gets a header so downstream tools see the schema
+        cols = FEATURES + ["Predicted Risk"] + [f"P({c})" for c in predictor.classes]
+        pd.DataFrame(columns=cols).to_csv(output_path, index=False)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "skipped": dropped,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-score patients with the symptom risk model.")
+    parser.add_argument("input", help="CSV with the ten symptom columns")
+    parser.add_argument("output", help="where to write labels and class probabilities")
+    parser.add_argument("--model", default=MODEL_PATH, help="path to model.pkl")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows per vectorized chunk (bounds memory use)")
+    parser.add_argument("--no-header", action="store_true",
+                        help="input has no header row; first ten columns are the features in order")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="drop rows outside 0–9 instead of stopping")
+    parser.add_argument("--engine", choices=ENGINES, default="auto",
+                        help="auto (default) picks the faster engine for the chunk size: the compiled "
+                             "forest below a few thousand rows, sklearn above")
+    parser.add_argument("--server", metavar="URL",
+                        help="score through a running inference_server.py instead of loading model.pkl")
+    args = parser.parse_args(argv)
+
+    predictor = None
+    if args.server:
+        client = InferenceClient.discover(args.server, need=("symptom",))
+        if client is None:
+            print(f"No ready inference server at {args.server}", file=sys.stderr)
+            return 1
+        predictor = RemoteSymptomPredictor(client)
+
+    try:
+        stats = score_csv(args.input, args.output, args.model, args.chunk_size,
+                          header=not args.no_header, skip_invalid=args.skip_invalid,
+                          predictor=predictor, engine=args.engine)
+    except ValueError as e:
+        print(f"Input Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/s), skipped {stats['skipped']:,}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from importlib import metadata
+
+import numpy as np
+
+RESULTS_PATH = "benchmark_results.json"
+REGRESSION_THRESHOLD = 0.10  # flag metrics more than 10% worse than the baseline
+UI_SCRIPTS = {"dashboard": "app.py", "symptom_ui": "Symptom_predictor_ui.py", "mri_ui": "Xray_predictor_ui.py"}
+MRI_BATCH_SIZES = (1, 8, 32)
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class Skip(Exception):
+    """Raised by a benchmark that cannot run here (missing model, library or display)."""
+
+
+def _samples(fn, repeats, warmup=1):
+    for _ in range(warmup):
+        fn()
+    out = np.empty(repeats)
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        out[i] = time.perf_counter() - t0
+    return out
+
+
+def _latency(samples, unit="ms"):
+    scale = {"ms": 1e3, "us": 1e6}[unit]
+    return {f"p50_{unit}": float(np.median(samples) * scale), f"p99_{unit}": float(np.percentile(samples, 99) * scale)}
+
+
+# ---------- Symptom Model ----------
+def bench_symptom_single(ctx):
+    """One validated row through the app's predictor, as a button click does."""
+    from symptom_model import MODEL_PATH, SymptomPredictor
+
+    load = _samples(lambda: SymptomPredictor.from_file(MODEL_PATH), 3, warmup=0)
+    predictor = SymptomPredictor.from_file(MODEL_PATH)
+    rows = ctx["rng"].integers(0, 10, size=(256, 10)).tolist()
+    it = iter(range(10 ** 9))
+    samples = _samples(lambda: predictor.predict_one(rows[next(it) % len(rows)]), ctx["repeats"] * 20)
+    return {"load_s": float(np.median(load)), **_latency(samples, "us")}
+
+
+def bench_symptom_batch(ctx):
+    """predict_proba over a large array, as batch_predict.py scores each chunk."""
+    from symptom_model import MODEL_PATH, SymptomPredictor
+
+    predictor = SymptomPredictor.from_file(MODEL_PATH)
+    n = 20_000 if ctx["quick"] else 200_000
+    X = ctx["rng"].integers(0, 10, size=(n, 10))
+    samples = _samples(lambda: predictor.predict_proba(X), max(3, ctx["repeats"] // 4))
+    return {"rows": n, "rows_per_s": float(n / np.median(samples)), **_latency(samples)}
+
+
+# ---------- MRI Pipeline ----------
+def _synthetic_scans(directory, n, size=(1024, 1024), seed=0):
+    """Smooth grey noise saved as JPEG and PNG, standing in for real scans."""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(n):
+        small = rng.integers(0, 256, size=(size[1] // 32, size[0] // 32), dtype=np.uint8)
+        img = Image.fromarray(small, "L").resize(size, Image.BILINEAR).convert("RGB")
+        path = os.path.join(directory, f"scan{i:04d}.{'png' if i % 4 == 3 else 'jpg'}")
+        img.save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def _scans(ctx):
+    if "scans" not in ctx:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise Skip("Pillow is not installed")
+        ctx["scans"] = _synthetic_scans(ctx["tmp"], 64 if ctx["quick"] else 256)
+    return ctx["scans"]
+
+
+def bench_mri_decode(ctx):
+    """decode_once on one 1024x1024 scan: median ms per stage (read, decode, resize, normalize)."""
+    scans = [p for p in _scans(ctx) if p.endswith(".jpg")][:8]
+    import mri_model
+
+    buf = mri_model.new_buffer()
+    runs = [mri_model.decode_once(scans[i % len(scans)], buf).timings for i in range(ctx["repeats"])]
+    out = {f"{stage}_ms": float(np.median([r[stage] for r in runs])) for stage in runs[0]}
+    out["total_ms"] = float(np.median([sum(r.values()) for r in runs]))
+    return out
+
+
+def bench_mri_preprocess(ctx):
+    """Folder-classification preprocessing (process-pool decode + normalize) at several batch sizes."""
+    from batch_classify import iter_batches
+
+    scans = _scans(ctx)
+    out = {}
+    for bs in MRI_BATCH_SIZES:
+        t0 = time.perf_counter()
+        n = 0
+        for paths, batch, _ in iter_batches(scans, bs):
+            if batch is not None:
+                batch.astype(np.float32) / 255.0
+                n += len(paths)
+        out[f"batch{bs}_images_per_s"] = n / (time.perf_counter() - t0)
+    return out
+
+
+def bench_mri_inference(ctx):
+    """Forward pass of the configured MRI model (Keras or TFLite) at several batch sizes."""
+    import mri_model
+
+    if not os.path.exists(mri_model.MODEL_PATH):
+        raise Skip(f"no MRI model at {mri_model.MODEL_PATH}")
+    try:
+        t0 = time.perf_counter()
+        model = mri_model.load_model(mri_model.MODEL_PATH)
+        load_s = time.perf_counter() - t0
+    except ImportError as e:
+        raise Skip(str(e))
+    out = {"load_s": load_s}
+    for bs in MRI_BATCH_SIZES:
+        batch = ctx["rng"].random((bs,) + mri_model.IMG_SIZE + (3,), dtype=np.float32)
+        samples = _samples(lambda: mri_model.predict_batch(model, batch), max(3, ctx["repeats"] // 4), warmup=2)
+        out[f"batch{bs}_p50_ms"] = float(np.median(samples) * 1e3)
+        out[f"batch{bs}_images_per_s"] = float(bs / np.median(samples))
+    return out
+
+
+def bench_mri_heatmap(ctx):
+    """Grad-CAM cost per image: single-pass heatmap vs predict + embedding, and vs a separate Grad-CAM pass."""
+    import mri_model
+
+    if not os.path.exists(mri_model.MODEL_PATH):
+        raise Skip(f"no MRI model at {mri_model.MODEL_PATH}")
+    try:
+        import gradcam
+        model = mri_model.load_model(mri_model.MODEL_PATH)
+        r = gradcam.benchmark(model, max(5, ctx["repeats"] // 2))
+    except (ImportError, ValueError) as e:
+        raise Skip(str(e))  # ValueError: e.g. a TFLite export, with no layers to take a heatmap from
+    return {"forward_ms": r["forward only"], "heatmap_ms": r["heatmap, single pass"],
+            "two_pass_ms": r["predict, then separate Grad-CAM"], "overlay_ms": r["overlay"]}
+
+
+# ---------- Prediction Log ----------
+def bench_log_write(ctx):
+    """Caller-side cost of PredictionLogger.log and end-to-end rows written per second."""
+    from prediction_logger import PredictionLogger
+
+    n = 20_000 if ctx["quick"] else 200_000
+    logger = PredictionLogger(os.path.join(ctx["tmp"], "log.csv"), queue_size=n + 1, version="benchmark").start()
+    values = [3, 4, 5, 2, 7, 1, 0, 9, 6, 8]
+    calls = np.empty(n)
+    t0 = time.perf_counter()
+    for i in range(n):
+        t = time.perf_counter()
+        logger.log(values, "Low Risk")
+        calls[i] = time.perf_counter() - t
+    logger.close(timeout=60)
+    elapsed = time.perf_counter() - t0
+    if logger.written != n:
+        raise RuntimeError(f"logger wrote {logger.written} of {n} rows ({logger.dropped} dropped)")
+    return {"rows": n, "rows_per_s": n / elapsed, **_latency(calls, "us")}
+
+
+# ---------- Cold Start ----------
+def _display(ctx):
+    """A DISPLAY for the UI subprocesses; starts Xvfb when there is none. Raises Skip otherwise."""
+    if "display_env" in ctx:
+        return ctx["display_env"]
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY"):
+        if not shutil.which("Xvfb"):
+            raise Skip("no display and Xvfb is not installed")
+        display = f":{90 + os.getpid() % 100}"
+        ctx["xvfb"] = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(1.0)
+        env["DISPLAY"] = display
+    env["RESPIREX_EXIT_AFTER"] = "first_paint"  # StartupTimer exits the process at its first paint
+    env["RESPIREX_SERVER"] = "http://127.0.0.1:9"  # never attach to a running inference server
+    ctx["display_env"] = env
+    return env
+
+
+def _cold_start(script, env, timeout=120.0):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, script], cwd=HERE, env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    try:
+        for line in proc.stderr:
+            if "first_paint" in line:
+                painted = time.perf_counter() - t0
+                proc.wait(timeout)
+                return painted
+            if time.perf_counter() - t0 > timeout:
+                break
+        raise RuntimeError(f"{script} exited without painting (exit code {proc.poll()})")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def _bench_ui(name):
+    def bench(ctx):
+        env = _display(ctx)
+        samples = [_cold_start(UI_SCRIPTS[name], env) for _ in range(1 if ctx["quick"] else 3)]
+        return {"first_paint_s": float(np.median(samples)), "worst_s": float(max(samples))}
+    bench.__doc__ = f"Process spawn to first paint of {UI_SCRIPTS[name]} (Python start and imports included)."
+    return bench
+
+
+BENCHMARKS = {
+    "symptom_single": bench_symptom_single,
+    "symptom_batch": bench_symptom_batch,
+    "mri_decode": bench_mri_decode,
+    "mri_preprocess": bench_mri_preprocess,
+    "mri_inference": bench_mri_inference,
+    "mri_heatmap": bench_mri_heatmap,
+    "log_write": bench_log_write,
+    **{f"cold_start_{name}": _bench_ui(name) for name in UI_SCRIPTS},
+}
+
+
+# ---------- Running & Results ----------
+def _version(dist):
+    try:
+        return metadata.version(dist)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=HERE, capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment():
+    """What a result depends on besides the code: machine, interpreter, libraries, models."""
+    from symptom_model import MODEL_PATH, model_version
+
+    try:
+        import mri_model
+        mri_path = mri_model.MODEL_PATH
+    except ImportError:  # no Pillow
+        mri_path = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "hostname": platform.node(),
+        "packages": {d: _version(d) for d in ("numpy", "scikit-learn", "joblib", "pillow", "tensorflow",
+                                                "tflite-runtime", "pandas")},
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "symptom_model": {"path": MODEL_PATH, "version": model_version(MODEL_PATH)},
+        "mri_model": {"path": mri_path, "present": bool(mri_path) and os.path.exists(mri_path)},
+        "env": {k: v for k, v in os.environ.items() if k.startswith("RESPIREX_")},
+    }
+
+
+def run(names=None, quick=False, repeats=None, seed=0, progress=print):
+    """Run the named benchmarks (default: all) and return the results document."""
+    names = list(names or BENCHMARKS)
+    ctx = {"quick": quick, "repeats": repeats or (20 if quick else 100), "rng": np.random.default_rng(seed),
+           "tmp": tempfile.mkdtemp(prefix="respirex-bench-")}
+    doc = {"created": datetime.now().isoformat(timespec="seconds"), "quick": quick, "seed": seed,
+           "environment": environment(), "results": {}, "skipped": {}, "failed": {}}
+    try:
+        for name in names:
+            t0 = time.perf_counter()
+            try:
+                doc["results"][name] = BENCHMARKS[name](ctx)
+                status = "ok"
+            except Skip as e:
+                doc["skipped"][name] = str(e)
+                status = f"skipped ({e})"
+            except Exception as e:
+                doc["failed"][name] = f"{type(e).__name__}: {e}"
+                status = f"FAILED ({e})"
+            progress(f"{name:<24} {status} in {time.perf_counter() - t0:.1f}s")
+    finally:
+        if "xvfb" in ctx:
+            ctx["xvfb"].terminate()
+        shutil.rmtree(ctx["tmp"], ignore_errors=True)
+    return doc
+
+
+def save(doc, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(doc, f, indent=2)
+    os.replace(tmp, path)
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_s")
+
+
+def gated(metric):
+    """Tail latencies are too noisy run-to-run to fail a comparison on; they are shown, not flagged."""
+    return not metric.startswith(("p99_", "worst_")) and metric != "rows"
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Per-metric change from baseline to current; gated metrics worse by more than `threshold` are regressions."""
+    rows = []
+    for name, metrics in current["results"].items():
+        base = baseline.get("results", {}).get(name, {})
+        for metric, value in metrics.items():
+            if metric not in base or metric == "rows" or not base[metric]:
+                continue
+            change = (value - base[metric]) / base[metric]
+            worse = -change if higher_is_better(metric) else change
+            rows.append({"benchmark": name, "metric": metric, "baseline": base[metric], "current": value,
+                         "change": change, "gated": gated(metric), "regression": gated(metric) and worse > threshold})
+    return rows
+
+
+def environment_differences(baseline, current):
+    keys = ("python", "machine", "processor", "cpu_count", "hostname", "packages", "symptom_model", "mri_model")
+    a, b = baseline.get("environment", {}), current.get("environment", {})
+    return [k for k in keys if a.get(k) != b.get(k)]
+
+
+def print_comparison(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Print the comparison table; returns the number of regressions."""
+    rows = compare(baseline, current, threshold)
+    diff = environment_differences(baseline, current)
+    if diff:
+        print(f"Note: environment differs from the baseline ({', '.join(diff)}); numbers may not be comparable.")
+    print(f"{'benchmark':<24} {'metric':<22} {'baseline':>10} {'current':>10} {'change':>8}")
+    for r in rows:
+        flag = "  REGRESSION" if r["regression"] else ("" if r["gated"] else "  (info)")
+        print(f"{r['benchmark']:<24} {r['metric']:<22} {r['baseline']:10.4g} {r['current']:10.4g} "
+              f"{r['change'] * 100:+7.1f}%{flag}")
+    missing = sorted(set(baseline.get("results", {})) - set(current["results"]))
+    if missing:
+        print(f"Not in this run: {', '.join(missing)}")
+    regressions = sum(r["regression"] for r in rows)
+    print(f"{regressions} regression(s) beyond {threshold * 100:.0f}%")
+    return regressions
+
+
+# ---------- CLI ----------
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark RespireX's hot paths and compare runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="run benchmarks and save the results as JSON")
+    p.add_argument("names", nargs="*", metavar="NAME", help="benchmarks to run (default: all; see `list`)")
+    p.add_argument("-o", "--output", default=RESULTS_PATH)
+    p.add_argument("--quick", action="store_true", help="smaller inputs and fewer repeats")
+    p.add_argument("--repeats", type=int, default=None)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--baseline", help="compare against this results file when done (exit 1 on regression)")
+    p.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    p = sub.add_parser("compare", help="flag regressions in CURRENT relative to BASELINE")
+    p.add_argument("baseline")
+    p.add_argument("current", nargs="?", default=RESULTS_PATH)
+    p.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    sub.add_parser("list", help="list the benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, fn in BENCHMARKS.items():
+            print(f"{name:<24} {(fn.__doc__ or '').strip().split(chr(10))[0]}")
+        return 0
+    if args.command == "compare":
+        return 1 if print_comparison(_load(args.baseline), _load(args.current), args.threshold) else 0
+
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s) {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+    doc = run(args.names, args.quick, args.repeats, args.seed, progress=lambda m: print(m, file=sys.stderr))
+    save(doc, args.output)
+    print(f"Saved {args.output}")
+    if args.baseline:
+        return 1 if print_comparison(_load(args.baseline), doc, args.threshold) else 0
+    return 1 if doc["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
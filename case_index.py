@@ -0,0 +1,442 @@
+import argparse
+import csv
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from datetime import datetime
+
+import numpy as np
+
+ARCHIVE_DIR = "case_archive"
+CASE_FIELDS = ["path", "label", "confidence", "added"]
+EXACT_LIMIT = 1_000  # below this a full scan is only a few ms, so no clustering is needed
+RETRAIN_GROWTH = 4  # re-cluster once the archive is this many times what the centroids saw
+PENDING_LIMIT = 20_000  # vectors added since the inverted lists were last sorted
+CHUNK = 16_384
+# 2: embeddings from the pooling layer that feeds the dense head. Version 1 archives may hold
+# a squeeze-and-excite block's pooling instead and must be rebuilt (`case_index.py rebuild`)
+EMBEDDING_VERSION = 2
+
+
+def _normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12)
+
+
+# ---------- Embeddings ----------
+_duals = weakref.WeakKeyDictionary()
+
+
+def head_pool(model):
+    """The GlobalAveragePooling2D feeding the dense head. It is the last one: when the
+    backbone is not nested, EfficientNet's squeeze-and-excite blocks have their own."""
+    import tensorflow as tf
+
+    return next((l for l in reversed(model.layers) if isinstance(l, tf.keras.layers.GlobalAveragePooling2D)), None)
+
+
+def embedding_model(model):
+    """Wrap the Keras MRI model so one forward pass returns (probabilities, pooled embedding).
+
+    The embedding is the GlobalAveragePooling2D output feeding the dense head. Returns
+    None for models without Keras layers (e.g. a TFLite export). The wrapper is built
+    once per model and kept for as long as the model is, so a hot reload can trace it
+    before the swap.
+    """
+    if not getattr(model, "layers", None):
+        return None
+    if model in _duals:
+        return _duals[model]
+    import tensorflow as tf
+
+    pool = head_pool(model)
+    dual = None if pool is None else tf.keras.Model(model.inputs, [model.outputs[0], pool.output])
+    _duals[model] = dual
+    return dual
+
+
+def predict_with_embeddings(dual, batch):
+    batch = np.asarray(batch, dtype=np.float32)
+    if batch.ndim == 3:
+        batch = batch[None]
+    probs, emb = dual(batch, training=False)
+    return np.asarray(probs), np.asarray(emb)
+
+
+# ---------- Clustering ----------
+def _nearest(x, centroids):
+    """Index of the most similar centroid for each (normalized) row, computed in chunks."""
+    out = np.empty(len(x), np.int32)
+    for i in range(0, len(x), CHUNK):
+        block = np.asarray(x[i:i + CHUNK], dtype=np.float32)
+        out[i:i + CHUNK] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def _kmeans(x, k, iters=8, seed=0):
+    """Spherical k-means (cosine) on normalized rows."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = _nearest(x, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        empty = np.bincount(assign, minlength=k) == 0
+        sums[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]  # re-seed dead clusters
+        centroids = _normalize(sums)
+    return centroids
+
+
+# ---------- Case Archive Index ----------
+class CaseIndex:
+    """Archive of reviewed MRI scans searchable by embedding similarity (cosine).
+
+    On disk (`root`): vectors.f16 holds the normalized embeddings as a raw float16 matrix
+    (2.5 KB per scan for EfficientNetB0's 1280 dims), cases.csv one row of metadata per
+    vector, and once the archive passes EXACT_LIMIT an IVF index: k-means centroids plus
+    each vector's cluster in assign.i32. All three files are append-only, so `add` is
+    incremental. New vectors are assigned to their nearest centroid and kept in a small
+    pending set until the lists are re-sorted. A query scores the centroids, then only
+    the `nprobe` closest clusters; smaller archives are scanned exactly.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR, nprobe=16):
+        self.root = root
+        self.nprobe = nprobe
+        self.dim = None
+        self.cases = []
+        self.centroids = None
+        self.trained_on = 0
+        self._vectors = None
+        self._assign = np.empty(0, np.int32)
+        self._order = self._bounds = None
+        self._sorted_upto = 0
+        self.stale = False  # embeddings from an older EMBEDDING_VERSION: not searched until rebuilt
+        self._lock = threading.Lock()
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def __len__(self):
+        return len(self.cases)
+
+    # ----- persistence -----
+    def _load(self):
+        try:
+            with open(self._path("meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.dim, self.trained_on = meta["dim"], meta.get("trained_on", 0)
+        self.stale = meta.get("embedding_version", 1) != EMBEDDING_VERSION
+        with open(self._path("cases.csv"), newline="") as f:
+            self.cases = list(csv.DictReader(f))
+        # A crash between the appends can leave one file longer than the other
+        n = min(len(self.cases), os.path.getsize(self._path("vectors.f16")) // (2 * self.dim))
+        del self.cases[n:]
+        self._remap()
+        if os.path.exists(self._path("centroids.npy")):
+            self.centroids = np.load(self._path("centroids.npy"))
+            self._assign = np.fromfile(self._path("assign.i32"), dtype=np.int32)[:n]
+            if len(self._assign) < n:
+                self._assign = np.concatenate([self._assign, _nearest(self._vectors[len(self._assign):], self.centroids)])
+            self._sort_lists()
+
+    def _remap(self):
+        n = len(self.cases)
+        self._vectors = np.memmap(self._path("vectors.f16"), np.float16, "r", shape=(n, self.dim)) if n else None
+
+    def _write_meta(self):
+        with open(self._path("meta.json"), "w") as f:
+            json.dump({"dim": self.dim, "trained_on": self.trained_on, "embedding_version": EMBEDDING_VERSION}, f)
+
+    def _sort_lists(self):
+        self._order = np.argsort(self._assign, kind="stable").astype(np.int64)
+        self._bounds = np.searchsorted(self._assign[self._order], np.arange(len(self.centroids) + 1))
+        self._sorted_upto = len(self._assign)
+
+    # ----- building -----
+    def add(self, embeddings, records):
+        """Append embeddings (n, dim) with one metadata dict per row; returns the new case ids."""
+        emb = _normalize(np.atleast_2d(embeddings))
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = [{f: str(r.get(f, now if f == "added" else "")) for f in CASE_FIELDS} for r in records]
+        if len(rows) != len(emb):
+            raise ValueError("One record is needed per embedding")
+        if self.stale:
+            raise ValueError("The case archive was built with an older embedding; "
+                             "run `python case_index.py rebuild` before adding to it.")
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            if self.dim is None:
+                self.dim = emb.shape[1]
+                self._write_meta()
+            elif emb.shape[1] != self.dim:
+                raise ValueError(f"Embedding size {emb.shape[1]} does not match the archive ({self.dim})")
+            start = len(self.cases)
+            with open(self._path("vectors.f16"), "ab") as f:
+                f.write(emb.astype(np.float16).tobytes())
+            new_file = not os.path.exists(self._path("cases.csv"))
+            with open(self._path("cases.csv"), "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=CASE_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(rows)
+            self.cases.extend(rows)
+            if self.centroids is not None:
+                assign = _nearest(emb, self.centroids)
+                with open(self._path("assign.i32"), "ab") as f:
+                    f.write(assign.tobytes())
+                self._assign = np.concatenate([self._assign, assign])
+                if len(self._assign) - self._sorted_upto > PENDING_LIMIT:
+                    self._sort_lists()
+            self._remap()
+            n = len(self.cases)
+            needs_training = n >= EXACT_LIMIT and (self.centroids is None or n > RETRAIN_GROWTH * self.trained_on)
+        if needs_training:
+            self.train()
+        return list(range(start, start + len(rows)))
+
+    def train(self, nlist=None, sample_per_list=20, iters=8, seed=0):
+        """(Re)cluster the archive into `nlist` lists (default ~4·sqrt(n)) and re-assign every vector."""
+        with self._lock:
+            n = len(self.cases)
+            if n == 0:
+                return
+            nlist = nlist or int(min(4096, max(16, 4 * math.sqrt(n))))
+            rng = np.random.default_rng(seed)
+            sample = np.sort(rng.choice(n, min(n, nlist * sample_per_list), replace=False))
+            centroids = _kmeans(np.asarray(self._vectors[sample], dtype=np.float32), min(nlist, len(sample)), iters, seed)
+            assign = _nearest(self._vectors, centroids)
+
+            np.save(self._path("centroids.npy"), centroids)
+            tmp = self._path("assign.i32.tmp")
+            assign.tofile(tmp)
+            os.replace(tmp, self._path("assign.i32"))
+            self.centroids, self._assign, self.trained_on = centroids, assign, n
+            self._write_meta()
+            self._sort_lists()
+
+    # ----- querying -----
+    def _candidates(self, q):
+        if self.centroids is None:
+            return None
+        nprobe = min(self.nprobe, len(self.centroids))
+        probe = np.argpartition(self.centroids @ q, -nprobe)[-nprobe:]
+        ids = [self._order[self._bounds[c]:self._bounds[c + 1]] for c in probe]
+        pending = np.arange(self._sorted_upto, len(self._assign))
+        ids.append(pending[np.isin(self._assign[pending], probe)])
+        return np.sort(np.concatenate(ids))  # sorted ids read the memmap sequentially
+
+    def search(self, embedding, k=5, exclude_path=None):
+        """Top-k most similar archived cases as [(similarity, case dict)], best first."""
+        q = _normalize(np.ravel(embedding))
+        with self._lock:
+            if not self.cases or self.stale:
+                return []
+            ids = self._candidates(q)
+            if ids is None:
+                scores = np.concatenate([np.asarray(self._vectors[i:i + CHUNK], np.float32) @ q
+                                         for i in range(0, len(self.cases), CHUNK)])
+                ids = np.arange(len(scores))
+            else:
+                scores = np.asarray(self._vectors[ids], np.float32) @ q
+            want = min(len(ids), k + (1 if exclude_path else 0))
+            top = np.argpartition(-scores, want - 1)[:want] if want < len(ids) else np.arange(len(ids))
+            top = top[np.argsort(-scores[top])]
+            results = [(float(scores[t]), self.cases[int(ids[t])]) for t in top]
+        if exclude_path:
+            results = [r for r in results if r[1]["path"] != exclude_path]
+        return results[:k]
+
+
+_archive = None
+
+
+def archive():
+    """The default on-disk case archive, opened once per process."""
+    global _archive
+    if _archive is None:
+        _archive = CaseIndex(ARCHIVE_DIR)
+        if _archive.stale:
+            print(f"[cases] {ARCHIVE_DIR} holds embeddings from an older model layer and is not searched; "
+                  f"run `python case_index.py rebuild`", file=sys.stderr)
+    return _archive
+
+
+def rebuild(root, dual, batch_size=32):
+    """Re-embed every archived scan with `dual` into a fresh archive that replaces `root`.
+
+    Labels and dates are kept. Scans no longer on disk are dropped. Returns (kept, dropped).
+    """
+    from batch_classify import iter_batches
+
+    by_path = {case["path"]: case for case in CaseIndex(root).cases}
+    tmp, backup = root.rstrip(os.sep) + ".rebuild", root.rstrip(os.sep) + ".old"
+    shutil.rmtree(tmp, ignore_errors=True)
+    fresh, dropped = CaseIndex(tmp), 0
+    for batch_paths, batch, failed in iter_batches(list(by_path), batch_size):
+        for path, err in failed:
+            print(f"dropped {path}: {err}", file=sys.stderr)
+        dropped += len(failed)
+        if batch is not None:
+            _, emb = predict_with_embeddings(dual, batch.astype(np.float32) / 255.0)
+            fresh.add(emb, [by_path[p] for p in batch_paths])
+    shutil.rmtree(backup, ignore_errors=True)
+    os.replace(root, backup)
+    os.replace(tmp, root)
+    shutil.rmtree(backup)
+    return len(fresh), dropped
+
+
+# ---------- CLI ----------
+def _load_dual(model_path):
+    import mri_model
+
+    dual = embedding_model(mri_model.load_model(model_path or mri_model.MODEL_PATH))
+    if dual is None:
+        sys.exit("Similar-case search needs the Keras model (it reads the GlobalAveragePooling2D layer).")
+    return dual
+
+
+def cmd_add(args):
+    import mri_model
+    from batch_classify import collect_images, iter_batches
+
+    paths = collect_images(args.sources)
+    dual, index = _load_dual(args.model), CaseIndex(args.archive)
+    added = 0
+    t0 = time.perf_counter()
+    for batch_paths, batch, failed in iter_batches(paths, args.batch_size):
+        for path, err in failed:
+            print(f"skipped {path}: {err}", file=sys.stderr)
+        if batch is None:
+            continue
+        probs, emb = predict_with_embeddings(dual, batch.astype(np.float32) / 255.0)
+        records = []
+        for path, p in zip(batch_paths, probs):
+            label, conf = mri_model.top_class(p)
+            records.append({"path": os.path.abspath(path), "label": args.label or label, "confidence": f"{conf:.4f}"})
+        index.add(emb, records)
+        added += len(records)
+        print(f"\r{added}/{len(paths)}", end="", file=sys.stderr)
+    print(f"\nAdded {added:,} scans in {time.perf_counter() - t0:.1f}s; archive now holds {len(index):,}")
+
+
+def cmd_search(args):
+    import mri_model
+
+    dual, index = _load_dual(args.model), CaseIndex(args.archive, nprobe=args.nprobe)
+    probs, emb = predict_with_embeddings(dual, mri_model.preprocess(args.image))
+    label, conf = mri_model.top_class(probs[0])
+    print(f"{args.image}: {label} ({conf * 100:.1f}%)")
+    t0 = time.perf_counter()
+    results = index.search(emb[0], args.k, exclude_path=os.path.abspath(args.image))
+    print(f"Top {len(results)} of {len(index):,} archived cases in {(time.perf_counter() - t0) * 1e3:.2f} ms:")
+    for score, case in results:
+        print(f"  {score:.3f}  {case['label']:<9}  {case['path']}")
+
+
+def cmd_rebuild(args):
+    if not os.path.exists(os.path.join(args.archive, "meta.json")):
+        sys.exit(f"No case archive at {args.archive}")
+    t0 = time.perf_counter()
+    kept, dropped = rebuild(args.archive, _load_dual(args.model), args.batch_size)
+    print(f"Re-embedded {kept:,} cases in {time.perf_counter() - t0:.1f}s ({dropped} missing or unreadable)")
+
+
+def cmd_train(args):
+    index = CaseIndex(args.archive)
+    t0 = time.perf_counter()
+    index.train(args.nlist)
+    print(f"Clustered {len(index):,} cases into {len(index.centroids)} lists in {time.perf_counter() - t0:.1f}s")
+
+
+def cmd_bench(args):
+    """Synthetic clustered embeddings: add rate, clustering time, query latency and recall vs exact."""
+    rng = np.random.default_rng(0)
+    centers = _normalize(rng.standard_normal((args.clusters, args.dim)))
+    noise = args.spread / math.sqrt(args.dim)  # per-dimension std, so the noise vector has norm ~spread
+    queries = _normalize(centers[rng.integers(0, args.clusters, args.queries)]
+                         + noise * rng.standard_normal((args.queries, args.dim)))
+    with tempfile.TemporaryDirectory(dir=args.tmp) as root:
+        index = CaseIndex(root, nprobe=args.nprobe)
+        t0 = time.perf_counter()
+        for start in range(0, args.n, 50_000):
+            m = min(50_000, args.n - start)
+            x = centers[rng.integers(0, args.clusters, m)] + noise * rng.standard_normal((m, args.dim), np.float32)
+            index.add(x, [{"path": f"scan{start + i}.jpg", "label": "Benign"} for i in range(m)])
+        if len(index) >= EXACT_LIMIT and index.trained_on < len(index):
+            index.train()
+        build = time.perf_counter() - t0
+
+        exact = []
+        for q in queries:  # brute-force ground truth in chunks
+            s = np.concatenate([np.asarray(index._vectors[i:i + CHUNK], np.float32) @ q
+                                for i in range(0, len(index), CHUNK)])
+            exact.append(set(np.argpartition(-s, args.k)[:args.k].tolist()))
+
+        latencies, hits = [], 0
+        for q, truth in zip(queries, exact):
+            t = time.perf_counter()
+            res = index.search(q, args.k)
+            latencies.append(time.perf_counter() - t)
+            hits += len(truth & {int(c["path"][4:-4]) for _, c in res})
+        mode = f"{len(index.centroids)} lists, nprobe {index.nprobe}" if index.centroids is not None else "exact scan"
+        print(f"{len(index):,} x {args.dim} float16 ({index._vectors.nbytes / 1e9:.2f} GB), {mode}: "
+              f"built in {build:.1f}s")
+        print(f"query p50 {np.percentile(latencies, 50) * 1e3:.2f} ms, p99 {np.percentile(latencies, 99) * 1e3:.2f} ms, "
+              f"recall@{args.k} {hits / (args.k * len(queries)):.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive of reviewed MRI scans searchable by similarity.")
+    parser.add_argument("--archive", default=ARCHIVE_DIR)
+    parser.add_argument("--model", default=None, help="Keras MRI model (default: the app's)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("add", help="embed scans and add them to the archive")
+    p.add_argument("sources", nargs="+", help="image files and/or directories")
+    p.add_argument("--label", help="reviewed label for all of them (default: the model's prediction)")
+    p.add_argument("--batch-size", type=int, default=32)
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("search", help="most similar archived scans for one image")
+    p.add_argument("image")
+    p.add_argument("-k", type=int, default=5)
+    p.add_argument("--nprobe", type=int, default=16)
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("rebuild", help="re-embed every archived scan with the current model")
+    p.add_argument("--batch-size", type=int, default=32)
+    p.set_defaults(func=cmd_rebuild)
+
+    p = sub.add_parser("train", help="re-cluster the IVF index")
+    p.add_argument("--nlist", type=int, default=None)
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser("bench", help="latency and recall on synthetic embeddings")
+    p.add_argument("--n", type=int, default=200_000)
+    p.add_argument("--dim", type=int, default=1280)
+    p.add_argument("--clusters", type=int, default=500)
+    p.add_argument("--spread", type=float, default=0.8, help="within-cluster noise relative to the cluster centre")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("-k", type=int, default=5)
+    p.add_argument("--nprobe", type=int, default=16)
+    p.add_argument("--tmp", default=None, help="directory for the temporary archive")
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+# Inputs are symptom levels 0–9, so every folded threshold fits in an int8 cut point
+LEVEL_DTYPE = np.int8
+COMPILER_VERSION = 2  # bump whenever compile() produces different arrays for the same model
+BLOCK_ROWS = 512  # rows per traversal block; keeps the (rows, trees) node arrays in cache
+
+
+# ---------- Compiled Forest ----------
+class CompiledForest:
+    """A RandomForestClassifier flattened into contiguous node arrays.
+
+    All trees share one set of arrays; `roots` holds each tree's first node. Leaves
+    point back at themselves so every row can be stepped `max_depth` times without
+    checking which rows have finished. The StandardScaler is folded into `cut`, so
+    rows are compared as raw integer levels: go left when ``x[feature] <= cut``.
+    """
+
+    def __init__(self, feature, cut, left, right, value, roots, classes, max_depth, n_features):
+        self.feature = feature
+        self.cut = cut
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = max_depth
+        self.n_trees = len(roots)
+        self.n_features = n_features
+        self._walk = None
+
+    @classmethod
+    def compile(cls, scaler, model):
+        """Flatten a fitted (scaler, RandomForestClassifier) pair into a CompiledForest."""
+        n_features = model.n_features_in_
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+
+        features, cuts, lefts, rights, values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            idx = np.arange(n)
+
+            feat = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+            # scaled <= thr  <=>  raw <= thr * scale + mean  <=>  raw <= floor(...) for ints
+            raw = tree.threshold * scale[feat] + mean[feat]
+            cut = np.floor(raw)
+            # A threshold can sit exactly on a level, where float64 rounding lands the fold one
+            # level off; settle it the way the tree compares: scaled in float64, then cast to float32
+            scaled = lambda level: ((level - mean[feat]) / scale[feat]).astype(np.float32)
+            cut = np.where(scaled(cut + 1) <= tree.threshold, cut + 1, cut)
+            cut = np.where(scaled(cut) > tree.threshold, cut - 1, cut)
+            cut = np.clip(cut, -1, 127)
+            cut = np.where(is_leaf, 0, cut).astype(LEVEL_DTYPE)
+
+            left = np.where(is_leaf, idx, tree.children_left) + offset
+            right = np.where(is_leaf, idx, tree.children_right) + offset
+
+            # Each tree votes with its leaf's class fractions, as in predict_proba
+            val = tree.value[:, 0, :].astype(np.float64)
+            val /= np.maximum(val.sum(axis=1, keepdims=True), 1e-300)
+
+            features.append(feat)
+            cuts.append(cut)
+            lefts.append(left.astype(np.int32))
+            rights.append(right.astype(np.int32))
+            values.append(val)
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            cut=np.concatenate(cuts),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=int(max_depth),
+            n_features=int(n_features),
+        )
+
+    # ---------- Persistence ----------
+    ARRAYS = ("feature", "cut", "left", "right", "value", "roots", "classes")
+
+    def arrays(self):
+        """The node arrays plus shape info, as plain NumPy arrays (for npz or model artifacts)."""
+        out = {name: getattr(self, name) for name in self.ARRAYS}
+        out["meta"] = np.array([self.max_depth, self.n_features])
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Inverse of `arrays()`. Arrays are used as given, so memory-mapped ones stay mapped."""
+        max_depth, n_features = (int(v) for v in arrays["meta"])
+        return cls(*(arrays[name] for name in cls.ARRAYS), max_depth, n_features)
+
+    def save(self, path):
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays({name: data[name] for name in data.files})
+
+    # ---------- Inference ----------
+    def _tables(self):
+        """Walk tables, built on first use.
+
+        `step[node * width + level]` is the node a row at that level moves to from `node`
+        (premultiplied by `width`), so each step is three lookups and no comparison. Rows
+        are clipped to [lo, hi]: a level below every cut goes left everywhere and one
+        above every cut goes right, so only the levels in between need a column.
+        """
+        if self._walk is None:
+            internal = self.left != np.arange(len(self.left))
+            cuts = self.cut[internal].astype(np.intp)
+            lo, hi = (int(cuts.min()), int(cuts.max()) + 1) if len(cuts) else (0, 0)
+            width = hi - lo + 1
+            levels = np.arange(lo, hi + 1)
+            step = np.where(levels <= self.cut[:, None].astype(np.intp), self.left[:, None], self.right[:, None])
+            columns = [np.ascontiguousarray(self.value[:, k]) for k in range(self.value.shape[1])]
+            self._walk = (lo, hi, width, (step.astype(np.intp) * width).ravel(),
+                          np.repeat(self.feature.astype(np.intp), width),
+                          self.roots.astype(np.intp) * width, columns)
+        return self._walk
+
+    def leaves(self, X):
+        """Return the (rows, trees) array of leaf node ids reached by each row."""
+        lo, hi, width, step, feature, roots, _ = self._tables()
+        X = np.asarray(X)
+        n_rows, n_cols = X.shape
+        flat = (np.clip(X.astype(np.intp), lo, hi) - lo).ravel()
+        base = (np.arange(n_rows, dtype=np.intp) * n_cols)[:, None]
+        node = np.broadcast_to(roots, (n_rows, self.n_trees)).copy()
+        idx = np.empty_like(node)
+        for _ in range(self.max_depth):
+            np.add(base, feature.take(node), out=idx)  # where in its row each tree looks
+            np.add(node, flat.take(idx), out=idx)
+            step.take(idx, out=node)
+        return node // width
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        columns = self._tables()[-1]
+        out = np.empty((len(X), len(columns)), dtype=np.float64)
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            leaves = self.leaves(block)
+            # One 1-D gather per class is several times faster than gathering (rows, trees, classes)
+            for k, column in enumerate(columns):
+                out[start:start + len(block), k] = column.take(leaves).sum(axis=1)
+        out /= self.n_trees
+        return out
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# ---------- Parity & Benchmark ----------
+def check_parity(forest, scaler, model, n_rows=100_000, seed=42):
+    """Compare against the pickled model on random 0–9 rows; returns (agreement, max |Δp|)."""
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 10, size=(n_rows, forest.n_features))
+    ref = model.predict_proba(scaler.transform(X.astype(np.float64)))
+    got = forest.predict_proba(X)
+    agreement = float(np.mean(model.classes_[ref.argmax(axis=1)] == forest.classes[got.argmax(axis=1)]))
+    return agreement, float(np.abs(ref - got).max())
+
+
+def _time_per_call(fn, repeats):
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples))
+
+
+def benchmark(forest, scaler, model, batch_rows=100_000, repeats=200, seed=0):
+    """Single-row median latency and batch throughput for sklearn vs the compiled engine."""
+    rng = np.random.default_rng(seed)
+    n_features = forest.n_features
+    row = rng.integers(0, 10, size=(1, n_features))
+    batch = rng.integers(0, 10, size=(batch_rows, n_features))
+
+    sk_row = _time_per_call(lambda: model.predict(scaler.transform(row.astype(np.float64))), repeats)
+    cf_row = _time_per_call(lambda: forest.predict(row), repeats)
+    sk_batch = _time_per_call(lambda: model.predict(scaler.transform(batch.astype(np.float64))), 3)
+    cf_batch = _time_per_call(lambda: forest.predict(batch), 3)
+    return {
+        "sklearn_row_us": sk_row * 1e6,
+        "compiled_row_us": cf_row * 1e6,
+        "sklearn_rows_per_sec": batch_rows / sk_batch,
+        "compiled_rows_per_sec": batch_rows / cf_batch,
+    }
+
+
+def crossover(forest, scaler, model, seed=0, max_rows=65_536):
+    """Smallest batch size (doubling from 64) at which sklearn outpaces the compiled engine, or None."""
+    rng = np.random.default_rng(seed)
+    rows = 64
+    while rows <= max_rows:
+        batch = rng.integers(0, 10, size=(rows, forest.n_features))
+        repeats = max(3, 20_000 // rows)
+        sk = _time_per_call(lambda: model.predict_proba(scaler.transform(batch.astype(np.float64))), repeats)
+        cf = _time_per_call(lambda: forest.predict_proba(batch), repeats)
+        if sk < cf:
+            return rows
+        rows *= 2
+    return None
+
+
+def main(argv=None):
+    from symptom_model import MODEL_PATH, load_model
+
+    parser = argparse.ArgumentParser(description="Compile model.pkl into array form, check parity and benchmark.")
+    parser.add_argument("--model", default=MODEL_PATH, help="path to model.pkl")
+    parser.add_argument("--save", help="write the compiled arrays to this .npz file")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows for the parity check and batch benchmark")
+    parser.add_argument("--no-benchmark", action="store_true", help="only compile and check parity")
+    args = parser.parse_args(argv)
+
+    scaler, model = load_model(args.model)
+    t0 = time.perf_counter()
+    forest = CompiledForest.compile(scaler, model)
+    print(f"Compiled {forest.n_trees} trees, {len(forest.feature):,} nodes, "
+          f"max depth {forest.max_depth} in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    agreement, drift = check_parity(forest, scaler, model, args.rows)
+    print(f"Parity: {agreement * 100:.4f}% label agreement, max probability drift {drift:.2e}")
+    if args.save:
+        forest.save(args.save)
+        print(f"Saved compiled forest to {args.save}")
+    if agreement < 1.0:
+        return 1
+
+    if not args.no_benchmark:
+        r = benchmark(forest, scaler, model, args.rows)
+        print(f"Single row : sklearn {r['sklearn_row_us']:9.1f} µs | compiled {r['compiled_row_us']:9.1f} µs")
+        print(f"Batch      : sklearn {r['sklearn_rows_per_sec']:9,.0f} rows/s | "
+              f"compiled {r['compiled_rows_per_sec']:9,.0f} rows/s")
+        rows = crossover(forest, scaler, model)
+        print(f"Crossover  : sklearn is faster from {rows:,} rows" if rows else
+              "Crossover  : compiled is faster at every batch size tried")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
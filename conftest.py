@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="session")
+def fitted_forest():
+    """A small (scaler, RandomForestClassifier) pair trained on synthetic 0–9 symptom levels."""
+    pytest.importorskip("sklearn")
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 10, size=(600, 10))
+    score = X[:, 0] + X[:, 4] + X[:, 9] + rng.integers(0, 4, size=len(X))
+    y = np.digitize(score, [10, 18])  # three classes, like Low/Medium/High
+    scaler = StandardScaler().fit(X.astype(np.float64))
+    model = RandomForestClassifier(n_estimators=12, max_depth=6, random_state=0)
+    model.fit(scaler.transform(X.astype(np.float64)), y)
+    return scaler, model
@@ -0,0 +1,15 @@
+# Static text shown in the app. No imports, so the dashboard search can load it cheaply.
+
+# ---------- Symptom Info Cards ----------
+INFO_CARDS = [
+    {"title": "Coughing of Blood", "text": "Coughing up blood (hemoptysis) is a red flag symptom often associated with lung cancer. It typically occurs when tumors erode nearby blood vessels in the airways, causing bleeding. Although it can also occur in infections or bronchitis, its presence in smokers or high-risk patients is taken very seriously in predictive modeling. Its rarity in benign conditions makes it a high-weight factor."},
+    {"title": "Chest Pain", "text": "Persistent chest pain, particularly when breathing or coughing, may indicate tumor pressure or invasion into the chest wall or pleura. This symptom is more predictive when it occurs alongside shortness of breath or coughing of blood. While pain can stem from many causes, its chronic and localized form is significant in lung cancer diagnosis models."},
+    {"title": "Weight Loss", "text": "Unexplained weight loss is often an early systemic sign of cancer, including lung cancer. Tumors can cause metabolic changes that burn calories rapidly, even when the patient is not trying to lose weight. In prediction models, sudden weight loss can elevate risk even if other symptoms appear mild."},
+    {"title": "Shortness of Breath", "text": "Shortness of breath (dyspnea) is a common symptom caused by airway obstruction, fluid buildup, or reduced lung capacity due to tumors. Its onset—especially in non-asthmatic patients—can be an early indicator of pulmonary compromise, adding weight in lung cancer prediction algorithms."},
+    {"title": "Smoking", "text": "Smoking is the single most significant risk factor for lung cancer. Tobacco smoke contains carcinogens that directly damage lung tissue over time. Prediction models treat heavy smoking history as a dominant feature. Even moderate smoking increases risk sharply when combined with other symptoms."},
+    {"title": "Genetic Risk", "text": "Family history and inherited genetic mutations can predispose individuals to lung cancer even without environmental exposures. In models, genetic risk adds predictive value when combined with factors like smoking and environmental pollution."},
+    {"title": "Wheezing", "text": "Wheezing occurs when airflow through the lungs is restricted, often by narrowed airways or tumor growth. While also common in asthma or infections, new or worsening wheezing in older adults may signal lung abnormalities. Its context is key in prediction."},
+    {"title": "Fatigue", "text": "Chronic fatigue can indicate systemic cancer-related changes. While non-specific, when paired with other symptoms, fatigue can signal the body’s immune response to tumor presence. It's a supportive but important predictive feature."},
+    {"title": "Air Pollution", "text": "Exposure to air pollution, especially in urban or industrial environments, increases lung cancer risk over time. Pollutants like PM2.5 particles and toxic gases damage lung cells and contribute to inflammation. Prediction models treat long-term pollution exposure as an environmental risk marker."},
+    {"title": "Passive Smoker", "text": "Passive or second-hand smoke exposure can cause similar cellular damage as active smoking. Non-smokers living with smokers or working in smoky environments often face elevated risks. This factor is crucial in detecting high-risk non-smokers in machine learning models."}
+]
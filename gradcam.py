@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import sys
+import time
+import weakref
+
+import numpy as np
+
+from case_index import head_pool
+from mri_model import IMG_SIZE
+
+HEATMAP_ALPHA = 0.5  # opacity of the hottest regions; cold regions leave the scan untouched
+CACHE_SIZE = 64  # images whose prediction and heatmap the MRI screen keeps
+
+
+# ---------- Single-pass Grad-CAM ----------
+_heatmap_fns = weakref.WeakKeyDictionary()
+
+
+def _forward(model, pool):
+    """batch -> (probabilities, last conv activations, pooled embedding) in one pass through `model`."""
+    import tensorflow as tf
+
+    if isinstance(model, tf.keras.Sequential):
+        # A nested backbone's output is not a tensor of this graph; call the layers in turn instead
+        i = model.layers.index(pool)
+
+        def forward(batch):
+            x = batch
+            for layer in model.layers[:i]:
+                x = layer(x, training=False)
+            conv = x
+            x = pooled = pool(conv)
+            for layer in model.layers[i + 1:]:
+                x = layer(x, training=False)
+            return x, conv, pooled
+        return forward
+    net = tf.keras.Model(model.input, [model.outputs[0], pool.input, pool.output])
+    return lambda batch: net(batch, training=False)
+
+
+def heatmap_model(model):
+    """Wrap the Keras MRI model as batch -> (probabilities, pooled embedding, heatmap).
+
+    The heatmap is Grad-CAM on the last convolutional activations (the input of the
+    GlobalAveragePooling2D layer). It comes out of the same forward pass as the
+    probabilities: the pass runs under a gradient tape, and only the top class's
+    probability is differentiated, back to those activations and no further. That
+    backward pass covers just the pooling and dense head, so it is small next to the
+    EfficientNet forward pass. Returns None for models without Keras layers (e.g. a
+    TFLite export). Built and traced once per model and kept for as long as the model is.
+    """
+    if not getattr(model, "layers", None):
+        return None
+    if model in _heatmap_fns:
+        return _heatmap_fns[model]
+    import tensorflow as tf
+
+    pool = head_pool(model)
+    fn = None
+    if pool is not None:
+        forward = _forward(model, pool)
+
+        @tf.function(input_signature=[tf.TensorSpec((None,) + IMG_SIZE + (3,), tf.float32)])
+        def fn(batch):
+            with tf.GradientTape() as tape:
+                probs, conv, pooled = forward(batch)
+                top = tf.argmax(probs, axis=1, output_type=tf.int32)
+                score = tf.gather(probs, top, axis=1, batch_dims=1)
+            grads = tape.gradient(score, conv)
+            weights = tf.reduce_mean(grads, axis=(1, 2))  # one weight per channel
+            cam = tf.nn.relu(tf.einsum("nhwc,nc->nhw", conv, weights))
+            cam = tf.math.divide_no_nan(cam, tf.reduce_max(cam, axis=(1, 2), keepdims=True))
+            return probs, pooled, cam
+
+    _heatmap_fns[model] = fn
+    return fn
+
+
+def predict_with_heatmaps(fn, batch):
+    """(n, 3) probabilities, (n, d) embeddings and (n, h, w) heatmaps scaled to 0–1."""
+    batch = np.asarray(batch, dtype=np.float32)
+    if batch.ndim == 3:
+        batch = batch[None]
+    probs, emb, cams = fn(batch)
+    return np.asarray(probs), np.asarray(emb), np.asarray(cams)
+
+
+# ---------- Overlay ----------
+def _jet():
+    x = np.linspace(0.0, 1.0, 256)
+    rgb = [np.clip(1.5 - np.abs(4 * x - c), 0, 1) for c in (3, 2, 1)]
+    return (np.stack(rgb, axis=1) * 255).astype(np.uint8)
+
+
+JET = _jet()  # 256-entry blue -> red colormap
+
+
+def overlay(preview, cam, alpha=HEATMAP_ALPHA):
+    """Blend a 0–1 heatmap over the 224x224 preview, opacity rising with the heat."""
+    from PIL import Image
+
+    heat = Image.fromarray(np.uint8(np.clip(cam, 0, 1) * 255), "L").resize(preview.size, Image.BICUBIC)
+    colored = Image.fromarray(JET[np.asarray(heat)], "RGB")
+    mask = heat.point(lambda v: int(v * alpha))
+    return Image.composite(colored, preview.convert("RGB"), mask)
+
+
+def image_key(data):
+    """Cache key for a scan: a digest of its file bytes, so re-opening the same image hits."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+# ---------- Benchmark ----------
+_naive_forwards = weakref.WeakKeyDictionary()
+
+
+def naive_gradcam(model, batch):
+    """Predict, then Grad-CAM as a second, separate forward pass plus backward pass (for comparison)."""
+    import tensorflow as tf
+    import mri_model
+
+    probs = mri_model.predict_batch(model, batch)
+    forward = _naive_forwards.get(model)
+    if forward is None:
+        forward = _naive_forwards[model] = _forward(model, head_pool(model))
+    with tf.GradientTape() as tape:
+        preds, conv, _ = forward(tf.constant(batch))
+        score = tf.gather(preds, np.argmax(probs, axis=1), axis=1, batch_dims=1)
+    grads = tape.gradient(score, conv)
+    cam = tf.nn.relu(tf.einsum("nhwc,nc->nhw", conv, tf.reduce_mean(grads, axis=(1, 2))))
+    return probs, np.asarray(cam)
+
+
+def benchmark(model, repeats=20, seed=0):
+    """Median ms per image for each way of getting a prediction (and heatmap), plus the overlay.
+
+    The heatmap's own cost is "heatmap, single pass" minus "forward only": both run the
+    same compiled graph, one without the tape and top-class gradient.
+    """
+    import tensorflow as tf
+    import case_index
+    import mri_model
+    from PIL import Image
+
+    batch = np.random.default_rng(seed).random((1,) + IMG_SIZE + (3,), dtype=np.float32)
+    dual = case_index.embedding_model(model)
+    fn = heatmap_model(model)
+    if fn is None:
+        raise ValueError("Heatmaps need a Keras model with a GlobalAveragePooling2D layer.")
+    forward_only = tf.function(_forward(model, head_pool(model)),
+                               input_signature=[tf.TensorSpec((None,) + IMG_SIZE + (3,), tf.float32)])
+    _, _, cams = predict_with_heatmaps(fn, batch)
+    preview = Image.fromarray(np.uint8(batch[0] * 255), "RGB")
+    cases = {
+        "predict": lambda: mri_model.predict_batch(model, batch),
+        "predict + embedding": lambda: case_index.predict_with_embeddings(dual, batch),
+        "forward only": lambda: [np.asarray(t) for t in forward_only(batch)],
+        "heatmap, single pass": lambda: predict_with_heatmaps(fn, batch),
+        "predict, then separate Grad-CAM": lambda: naive_gradcam(model, batch),
+        "overlay": lambda: overlay(preview, cams[0]),
+    }
+    out = {}
+    for name, call in cases.items():
+        for _ in range(2):
+            call()  # trace and warm up
+        samples = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - t0)
+        out[name] = float(np.median(samples) * 1e3)
+    return out
+
+
+def main(argv=None):
+    import mri_model
+
+    parser = argparse.ArgumentParser(description="Time how much the Grad-CAM heatmap adds to an MRI prediction.")
+    parser.add_argument("--model", default=mri_model.MODEL_PATH)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    try:
+        results = benchmark(mri_model.load_model(args.model), args.repeats)
+    except (OSError, ValueError) as e:
+        print(f"[gradcam] {e}", file=sys.stderr)
+        return 1
+    for name, ms in results.items():
+        print(f"{name:<34} {ms:8.2f} ms")
+    extra = results["heatmap, single pass"] - results["forward only"]
+    print(f"Heatmap overhead: {extra:+.2f} ms per image ({extra / results['forward only'] * 100:+.0f}%) "
+          f"+ {results['overlay']:.2f} ms overlay")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+import argparse
+import http.client
+import io
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import metrics
+import mri_model
+from attributions import top_contributors
+from model_reload import HotModel, load_mri, load_symptom, smoke_test_mri, smoke_test_symptom
+from mri_batcher import MicroBatcher
+from symptom_model import FEATURES, MODEL_PATH, invalid_rows
+
+HOST, PORT = "127.0.0.1", 5000
+SERVER_URL = os.environ.get("RESPIREX_SERVER", f"http://{HOST}:{PORT}")
+MAX_BODY = 32 * 1024 * 1024
+
+
+# ---------- Model Host ----------
+class ModelHost:
+    """Loads both models once and serves every request from the same instances.
+
+    Both are HotModels: a new model file is loaded and smoke-tested in the background
+    and swapped in between requests, so deploying a model needs no restart.
+    """
+
+    def __init__(self, symptom_path=MODEL_PATH, mri_path=mri_model.MODEL_PATH, max_batch_size=16, max_wait=0.005):
+        self.symptom_path = symptom_path
+        self.mri_path = mri_path
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.symptom = None
+        self.mri = None
+        self.batcher = None
+        self.errors = {}
+        self.started = time.time()
+
+    def load(self):
+        try:
+            self.symptom = HotModel("symptom", self.symptom_path, load_symptom, smoke_test_symptom).start()
+        except Exception as e:
+            self.errors["symptom"] = str(e)
+        try:
+            mri = HotModel("mri", self.mri_path, load_mri, smoke_test_mri)  # load_mri warms it up
+            # Each batch runs on whichever model is current when it is formed
+            self.batcher = MicroBatcher(lambda batch: mri_model.predict_batch(mri.current, batch),
+                                        self.max_batch_size, self.max_wait)
+            self.mri = mri.start()
+        except Exception as e:
+            self.errors["mri"] = str(e)
+
+    def _model(self, name):
+        if name not in ("symptom", "mri"):
+            raise ValueError(f"Unknown model: {name!r} (expected 'symptom' or 'mri').")
+        model = getattr(self, name)
+        if model is None:
+            raise RuntimeError(f"{name} model not loaded.")
+        return model
+
+    def models(self):
+        return {name: m.status() for name, m in (("symptom", self.symptom), ("mri", self.mri)) if m is not None}
+
+    def reload(self, name):
+        """Check the model file now instead of waiting for the watcher."""
+        model = self._model(name)
+        model.check()
+        return model.status()
+
+    def rollback(self, name):
+        model = self._model(name)
+        model.rollback()
+        return model.status()
+
+    def status(self):
+        return {
+            "symptom": "ready" if self.symptom else self.errors.get("symptom", "loading"),
+            "mri": "ready" if self.mri else self.errors.get("mri", "loading"),
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    def score_symptoms(self, rows, explain=0):
+        """Labels and probabilities; with `explain` > 0, also each row's top symptoms toward its label."""
+        if self.symptom is None:
+            raise RuntimeError("Symptom model not loaded.")
+        model = self.symptom.current
+        X = np.asarray(rows, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(FEATURES):
+            raise ValueError(f"Expected rows of {len(FEATURES)} values.")
+        bad = invalid_rows(X)
+        if bad.any():
+            raise ValueError(f"Row {int(np.argmax(bad)) + 1}: every feature must be a whole number between 0–9.")
+        proba = model.predict_proba(X)
+        predicted = np.argmax(proba, axis=1)
+        reply = {"labels": [model.classes[i] for i in predicted], "classes": model.classes,
+                 "probabilities": np.round(proba, 6).tolist()}
+        if explain:
+            attr = model.attributions
+            names, values = top_contributors(attr.contributions(X.astype(np.int8)), predicted, attr.features,
+                                             int(explain))
+            reply["explanations"] = [[[n, round(float(v), 6)] for n, v in zip(ns, vs) if v > 0]
+                                     for ns, vs in zip(names, values)]
+        return reply
+
+    def classify_image(self, data):
+        if self.mri is None:
+            raise RuntimeError("MRI model not loaded.")
+        try:
+            image = mri_model.preprocess(data)
+        except OSError as e:  # not an image, or truncated: the client's problem (400), not the server's
+            raise ValueError(f"Unreadable image: {e}") from None
+        # Concurrent requests are coalesced into one forward pass by the batcher
+        probs = self.batcher.predict(image)
+        label, conf = mri_model.top_class(probs)
+        return {"class": label, "confidence": conf,
+                "probabilities": dict(zip(mri_model.CLASS_NAMES, map(float, probs)))}
+
+
+# ---------- HTTP Layer ----------
+class InferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: InferenceClient sends all of a thread's requests on one connection
+    disable_nagle_algorithm = True  # headers and body go out in separate writes; don't hold the body back
+    host = None  # set on the class by make_server
+
+    def log_message(self, *_):
+        pass  # per-request stderr logging would dominate latency
+
+    def _reply(self, code, payload, content_type="application/json"):
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY:
+            raise ValueError("Request body too large.")
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self._reply(200, {"status": "ok"})
+        elif path == "/stats":
+            self._reply(200, {"mri_batching": self.host.batcher.stats() if self.host.batcher else None})
+        elif path == "/ready":
+            status = self.host.status()
+            ready = status["symptom"] == "ready" and status["mri"] == "ready"
+            self._reply(200 if ready else 503, status)
+        elif path == "/models":
+            self._reply(200, self.host.models())
+        elif path == "/metrics":
+            # Empty unless the server was started with RESPIREX_METRICS=1
+            self._reply(200, metrics.metrics.prometheus(), "text/plain; version=0.0.4")
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            data = self._body()
+            url = urlsplit(self.path)
+            if url.path == "/predict/symptoms":
+                payload = json.loads(data or b"{}")
+                if not isinstance(payload, dict):
+                    raise ValueError("Request body must be a JSON object.")
+                rows = payload["rows"] if "rows" in payload else [payload["values"]]
+                with metrics.span("server.symptoms"):
+                    reply = self.host.score_symptoms(rows, payload.get("explain", 0))
+                metrics.inc("server.symptom_rows", len(rows))
+                self._reply(200, reply)
+            elif url.path == "/predict/mri":
+                with metrics.span("server.mri"):
+                    reply = self.host.classify_image(data)
+                self._reply(200, reply)
+            elif url.path in ("/admin/reload", "/admin/rollback"):
+                name = parse_qs(url.query).get("model", [""])[0]
+                action = self.host.reload if url.path == "/admin/reload" else self.host.rollback
+                self._reply(200, action(name))
+            else:
+                self._reply(404, {"error": "not found"})
+        except (ValueError, KeyError) as e:
+            self._reply(400, {"error": str(e)})
+        except RuntimeError as e:
+            self._reply(503, {"error": str(e)})
+        except Exception as e:
+            self._reply(500, {"error": str(e)})
+
+
+def make_server(host, address=(HOST, PORT)):
+    handler = type("BoundInferenceHandler", (InferenceHandler,), {"host": host})
+    server = ThreadingHTTPServer(address, handler)
+    server.daemon_threads = True
+    return server
+
+
+# ---------- Client ----------
+class InferenceClient:
+    """Thin HTTP client used by the Tk screens and batch tools.
+
+    Each thread keeps one connection open to the server and sends every request on it,
+    so only the first call pays for the TCP handshake. Error replies raise
+    urllib.error.HTTPError, as urlopen would.
+    """
+
+    def __init__(self, url=SERVER_URL, timeout=30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        parts = urlsplit(self.url)
+        self._conn_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._netloc, self._base = parts.netloc, parts.path
+        self._local = threading.local()
+
+    @classmethod
+    def discover(cls, url=SERVER_URL, need=("symptom", "mri")):
+        """Return a client if a server at `url` has the needed models ready, else None."""
+        client = cls(url)
+        try:
+            status = client._request("GET", "/ready", timeout=0.3)
+        except urllib.error.HTTPError as e:
+            status = json.loads(e.read() or b"{}")
+        except (OSError, ValueError):
+            return None
+        return client if all(status.get(m) == "ready" for m in need) else None
+
+    def _request(self, method, path, body=None, content_type="application/json", timeout=None):
+        timeout = timeout or self.timeout
+        for attempt in (1, 2):
+            conn = getattr(self._local, "conn", None)
+            reused = conn is not None
+            if conn is None:
+                conn = self._local.conn = self._conn_class(self._netloc, timeout=timeout)
+            elif conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, self._base + path, body=body, headers={"Content-Type": content_type})
+                resp = conn.getresponse()
+                data = resp.read()
+            except Exception as e:
+                conn.close()
+                self._local.conn = None
+                # The server may have closed an idle kept-alive connection; retry once on a new one
+                if reused and attempt == 1 and isinstance(e, (http.client.RemoteDisconnected, ConnectionError)):
+                    continue
+                raise
+            break
+        if resp.will_close:
+            conn.close()
+            self._local.conn = None
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(self.url + path, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+        return json.loads(data)
+
+    def close(self):
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def predict_symptoms(self, rows, explain=0):
+        return self._request("POST", "/predict/symptoms", json.dumps({"rows": rows, "explain": explain}).encode())
+
+    def predict_one(self, values):
+        """Same call shape as SymptomPredictor.predict_one."""
+        return self.predict_symptoms([list(values)])["labels"][0]
+
+    def explain_one(self, values, top=3):
+        """Same call shape as SymptomPredictor.explain_one."""
+        reply = self.predict_symptoms([list(values)], explain=top)
+        return reply["labels"][0], [tuple(f) for f in reply["explanations"][0]]
+
+    def classify_image(self, data):
+        return self._request("POST", "/predict/mri", data, "application/octet-stream")
+
+    def models(self):
+        return self._request("GET", "/models")
+
+    def reload(self, model):
+        return self._request("POST", f"/admin/reload?model={model}", b"")
+
+    def rollback(self, model):
+        return self._request("POST", f"/admin/rollback?model={model}", b"")
+
+
+class RemoteSymptomPredictor:
+    """SymptomPredictor-shaped wrapper so batch tools can score through the server."""
+
+    def __init__(self, client, rows_per_request=10_000):
+        self.client = client
+        self.rows_per_request = rows_per_request
+        self.classes = None
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=int)
+        parts = []
+        for start in range(0, len(X), self.rows_per_request):
+            reply = self.client.predict_symptoms(X[start:start + self.rows_per_request].tolist())
+            self.classes = reply["classes"]
+            parts.append(np.asarray(reply["probabilities"], dtype=np.float64))
+        return np.concatenate(parts) if parts else np.empty((0, len(self.classes or ())))
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the symptom and MRI models from one resident process.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--symptom-model", default=MODEL_PATH)
+    parser.add_argument("--mri-model", default=mri_model.MODEL_PATH)
+    parser.add_argument("--max-batch", type=int, default=16, help="most MRI images per forward pass")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="how long the first queued image waits for others to join its batch")
+    args = parser.parse_args(argv)
+
+    metrics.metrics.configure_from_env()
+    host = ModelHost(args.symptom_model, args.mri_model, args.max_batch, args.max_wait_ms / 1e3)
+    server = make_server(host, (args.host, args.port))
+    # Start answering /health immediately; /ready flips once both models are loaded
+    threading.Thread(target=host.load, name="model-loader", daemon=True).start()
+    print(f"RespireX inference server on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import argparse
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+from inference_server import SERVER_URL, InferenceClient
+
+BACKOFF_FIRST, BACKOFF_MAX = 0.01, 1.0  # seconds to pause after a failed call, doubling per failure
+MAX_CONSECUTIVE_ERRORS = 20  # a worker stops after this many failures in a row: the target is down
+
+
+def run_load(call=None, concurrency=16, duration=10.0, setup=None):
+    """Hammer `call` from `concurrency` threads for `duration` seconds; returns latency stats.
+
+    `setup()`, if given, runs once on each thread before the clock starts and returns the
+    callable that thread hammers instead, e.g. one bound to the thread's own client.
+    """
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker(i):
+        rng = random.Random(i)
+        try:
+            fn = setup() if setup is not None else call
+        except Exception:
+            errors[i] += 1
+            ready.wait()
+            return
+        ready.wait()
+        failures = 0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                fn(rng)
+            except Exception:
+                errors[i] += 1
+                failures += 1
+                if failures >= MAX_CONSECUTIVE_ERRORS:
+                    return
+                pause = min(BACKOFF_FIRST * 2 ** (failures - 1), BACKOFF_MAX, deadline - time.perf_counter())
+                time.sleep(max(0.0, pause))
+                continue
+            failures = 0
+            latencies[i].append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    deadline = start + duration
+    ready.wait()  # every thread is set up; the clock starts now
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lat = np.concatenate([np.asarray(l) for l in latencies]) * 1e3 if any(latencies) else np.zeros(1)
+    return {
+        "requests": int(sum(len(l) for l in latencies)),
+        "errors": int(sum(errors)),
+        "throughput_rps": sum(len(l) for l in latencies) / elapsed,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "max_ms": float(lat.max()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test a running inference_server.py.")
+    parser.add_argument("--url", default=SERVER_URL)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--rows", type=int, default=1, help="patients per symptom request")
+    parser.add_argument("--mri", metavar="IMAGE", help="load-test /predict/mri with this image instead")
+    args = parser.parse_args(argv)
+
+    if args.mri:
+        with open(args.mri, "rb") as f:
+            image = f.read()
+        call_name = "mri"
+    else:
+        call_name = "symptoms"
+
+    def setup():
+        client = InferenceClient(args.url)  # one per thread, so each keeps its own connection
+        if args.mri:
+            return lambda rng: client.classify_image(image)
+        return lambda rng: client.predict_symptoms([[rng.randint(0, 9) for _ in range(10)] for _ in range(args.rows)])
+
+    if InferenceClient.discover(args.url, need=("mri",) if args.mri else ("symptom",)) is None:
+        print(f"No ready server at {args.url}; start it with `python inference_server.py`.", file=sys.stderr)
+        return 1
+
+    print(f"{'endpoint':10} {'conc':>5} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for c in args.concurrency:
+        r = run_load(concurrency=c, duration=args.duration, setup=setup)
+        print(f"{call_name:10} {c:5d} {r['throughput_rps']:10.1f} {r['p50_ms']:9.2f} "
+              f"{r['p99_ms']:9.2f} {r['errors']:7d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# RESPIREX_METRICS=1 turns instrumentation on; RESPIREX_METRICS_FILE=path also appends
+# a JSON-lines snapshot there every RESPIREX_METRICS_INTERVAL seconds (and at exit)
+ENABLED = os.environ.get("RESPIREX_METRICS", "").lower() not in ("", "0", "false", "no")
+WINDOW = 1024  # most recent observations kept per stage for percentiles
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+# ---------- Metric Types ----------
+class Histogram:
+    """Rolling latency window for one stage, plus lifetime count, sum and max."""
+
+    __slots__ = ("name", "window", "count", "total", "max")
+
+    def __init__(self, name, window=WINDOW):
+        self.name = name
+        self.window = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.window.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentiles(self, quantiles=QUANTILES):
+        values = sorted(self.window)
+        if not values:
+            return {q: 0.0 for q in quantiles}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in quantiles}
+
+    def last(self, n):
+        return list(self.window)[-n:]
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0)
+        if exc_type is not None:
+            self.metrics.inc(self.name + ".errors")
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+# ---------- Registry ----------
+class Metrics:
+    """Process-wide spans, histograms and counters.
+
+    `span(name)` times a block into the histogram `name`; `observe` records a duration
+    measured elsewhere and `inc` bumps a counter. When disabled, `span` hands back one
+    shared no-op object and `observe`/`inc` return at once, so instrumented code pays a
+    single attribute check per call.
+    """
+
+    def __init__(self, enabled=ENABLED, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    def span(self, name):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram(name, self.window)
+            hist.observe(seconds)
+
+    def inc(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    # ----- export -----
+    def snapshot(self):
+        with self._lock:
+            hists = {name: (h.percentiles(), h.count, h.total, h.max, len(h.window))
+                     for name, h in self.histograms.items()}
+            counters = dict(self.counters)
+        return hists, counters
+
+    def prometheus(self):
+        """Prometheus text exposition: one summary family for stages, one counter family."""
+        hists, counters = self.snapshot()
+        lines = ["# HELP respirex_stage_seconds Stage latency over the most recent observations.",
+                 "# TYPE respirex_stage_seconds summary"]
+        for name in sorted(hists):
+            quantiles, count, total, _, _ = hists[name]
+            for q, v in quantiles.items():
+                lines.append(f'respirex_stage_seconds{{stage="{name}",quantile="{q}"}} {v:.9g}')
+            lines.append(f'respirex_stage_seconds_sum{{stage="{name}"}} {total:.9g}')
+            lines.append(f'respirex_stage_seconds_count{{stage="{name}"}} {count}')
+        lines += ["# HELP respirex_events_total Events counted since the process started.",
+                  "# TYPE respirex_events_total counter"]
+        lines += [f'respirex_events_total{{name="{name}"}} {counters[name]}' for name in sorted(counters)]
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self):
+        """One JSON object per stage and per counter, all stamped with the same time."""
+        hists, counters = self.snapshot()
+        ts = round(time.time(), 3)
+        rows = []
+        for name in sorted(hists):
+            quantiles, count, total, peak, window = hists[name]
+            row = {"ts": ts, "pid": os.getpid(), "type": "stage", "name": name, "count": count,
+                   "sum_s": round(total, 6), "max_ms": round(peak * 1e3, 3), "window": window}
+            row.update({f"p{round(q * 100)}_ms": round(v * 1e3, 3) for q, v in quantiles.items()})
+            rows.append(row)
+        rows += [{"ts": ts, "pid": os.getpid(), "type": "counter", "name": n, "value": v}
+                 for n, v in sorted(counters.items())]
+        return "".join(json.dumps(r) + "\n" for r in rows)
+
+    def write_json_lines(self, path):
+        text = self.json_lines()
+        if text:
+            with open(path, "a") as f:
+                f.write(text)
+
+    def export_periodically(self, path, interval=10.0):
+        """Append a JSON-lines snapshot to `path` every `interval` seconds and once at exit."""
+        if self._exporter is not None:
+            return
+        import atexit
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_json_lines(path)
+                except OSError as e:
+                    print(f"[metrics] could not write {path}: {e}", file=sys.stderr)
+
+        self._exporter = threading.Thread(target=loop, name="metrics-export", daemon=True)
+        self._exporter.start()
+        atexit.register(self.write_json_lines, path)
+
+    def configure_from_env(self):
+        path = os.environ.get("RESPIREX_METRICS_FILE")
+        if self.enabled and path:
+            self.export_periodically(path, float(os.environ.get("RESPIREX_METRICS_INTERVAL", 10.0)))
+
+
+metrics = Metrics()
+span = metrics.span
+observe = metrics.observe
+inc = metrics.inc
+
+
+# ---------- In-App Overlay ----------
+class MetricsOverlay:
+    """A small panel over the bottom-right of a Tk window: last-N latencies and p50/p99 per stage.
+
+    Toggled with `key` (F2 by default) and refreshed only while it is visible.
+    """
+
+    def __init__(self, root, registry=metrics, last_n=5, refresh_ms=500, key="<F2>"):
+        import tkinter as tk
+
+        self.root = root
+        self.registry = registry
+        self.last_n = last_n
+        self.refresh_ms = refresh_ms
+        self.label = tk.Label(root, font=("Courier", 9), justify="left", anchor="nw",
+                              bg="#000", fg="#00f6ff", padx=8, pady=6)
+        self.visible = False
+        root.bind_all(key, self.toggle)
+
+    def toggle(self, *_):
+        self.visible = not self.visible
+        if self.visible:
+            self.label.place(relx=1.0, rely=1.0, anchor="se", x=-10, y=-10)
+            self._refresh()
+        else:
+            self.label.place_forget()
+
+    def _refresh(self):
+        if not self.visible:
+            return
+        with self.registry._lock:
+            rows = [(name, h.last(self.last_n), h.percentiles((0.5, 0.99)), h.count)
+                    for name, h in sorted(self.registry.histograms.items())]
+        lines = [f"{'stage':<22} {'p50':>7} {'p99':>7} {'n':>6}  last {self.last_n} (ms)"]
+        for name, last, pct, count in rows:
+            recent = " ".join(f"{v * 1e3:.1f}" for v in last)
+            lines.append(f"{name:<22} {pct[0.5] * 1e3:7.1f} {pct[0.99] * 1e3:7.1f} {count:>6}  {recent}")
+        if not rows:
+            lines.append("(no measurements yet)")
+        self.label.config(text="\n".join(lines))
+        self.label.lift()
+        self.root.after(self.refresh_ms, self._refresh)
+
+
+# ---------- Overhead Benchmark ----------
+def bench_overhead(n=1_000_000):
+    """Per-call cost of an instrumented empty block, disabled vs enabled."""
+    out = {}
+    for enabled in (False, True):
+        m = Metrics(enabled)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            with m.span("bench"):
+                pass
+        out["enabled" if enabled else "disabled"] = (time.perf_counter() - t0) / n * 1e9
+    t0 = time.perf_counter()
+    for _ in range(n):
+        pass
+    out["empty loop"] = (time.perf_counter() - t0) / n * 1e9
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RespireX instrumentation utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("bench", help="cost per span, with instrumentation disabled and enabled")
+    p.add_argument("-n", type=int, default=1_000_000)
+    p = sub.add_parser("summary", help="latest per-stage numbers from a JSON-lines metrics file")
+    p.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        for mode, ns in bench_overhead(args.n).items():
+            print(f"{mode:<11} {ns:7.1f} ns per span")
+        return 0
+
+    latest = {}
+    with open(args.path) as f:
+        for line in f:
+            row = json.loads(line)
+            latest[(row["pid"], row["type"], row["name"])] = row
+    print(f"{'pid':>7} {'stage':<24} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for (pid, kind, name), row in sorted(latest.items(), key=lambda kv: (kv[0][0], kv[0][1] != "stage", kv[0][2])):
+        if kind == "stage":
+            print(f"{pid:>7} {name:<24} {row['count']:>7} {row['p50_ms']:8.2f} {row['p90_ms']:8.2f} "
+                  f"{row['p99_ms']:8.2f} {row['max_ms']:8.2f}")
+        else:
+            print(f"{pid:>7} {name:<24} {row['value']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import subprocess
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from compiled_forest import COMPILER_VERSION, CompiledForest
+
+ARTIFACT_FORMAT = "respirex/symptom-model"
+FORMAT_VERSION = 1
+
+
+def _hash_forest(features, forest_arrays):
+    h = hashlib.sha256()
+    h.update(json.dumps(list(features)).encode())
+    for name in sorted(forest_arrays):
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(forest_arrays[name]).tobytes())
+    return h
+
+
+def content_hash(features, forest_arrays, sklearn_bytes):
+    """SHA-256 over everything that affects predictions, independent of how the file was written."""
+    h = _hash_forest(features, forest_arrays)
+    h.update(memoryview(np.ascontiguousarray(sklearn_bytes)))
+    return h.hexdigest()
+
+
+def forest_hash(features, forest_arrays):
+    """SHA-256 of the feature order and compiled arrays: the model's identity in logs, the
+    same whether it was loaded from a legacy pickle or from the artifact converted from it."""
+    return _hash_forest(features, forest_arrays).hexdigest()
+
+
+# ---------- Model Artifact ----------
+class ModelArtifact:
+    """The symptom model plus everything needed to use it safely, in one file.
+
+    Holds the feature order, the class codes, training metadata and a content hash next
+    to the compiled forest arrays and the pickled sklearn (scaler, forest) pair. The file
+    is an uncompressed joblib pickle, so `load()` memory-maps every array: the compiled
+    engine starts without importing sklearn or unpickling thousands of tree objects, and
+    several processes serving the same file share its pages through the OS page cache.
+    The sklearn pair (kept as raw pickle bytes) is only unpickled if something asks for it.
+
+    Plain `(scaler, model)` pickles from before this format still load; they are
+    converted in memory. So is an artifact whose forest came from an older
+    COMPILER_VERSION, from its own sklearn pair, since its cut points may disagree with it.
+    """
+
+    def __init__(self, forest, sklearn_bytes, features, metadata=None, hash=None, path=None, model_hash=None):
+        self.forest = forest
+        self.sklearn_bytes = sklearn_bytes
+        self.features = list(features)
+        self.metadata = dict(metadata or {})
+        self.hash = hash or content_hash(self.features, forest.arrays(), sklearn_bytes)
+        self.model_hash = model_hash or forest_hash(self.features, forest.arrays())
+        self.version = self.model_hash[:12]  # short id logged with predictions
+        self.path = path
+        self._pair = None
+
+    @property
+    def classes(self):
+        return self.forest.classes
+
+    def _sklearn_pair(self):
+        if self._pair is None:
+            self._pair = pickle.loads(memoryview(np.ascontiguousarray(self.sklearn_bytes)))
+        return self._pair
+
+    @property
+    def scaler(self):
+        return self._sklearn_pair()[0]
+
+    @property
+    def sklearn_model(self):
+        return self._sklearn_pair()[1]
+
+    @classmethod
+    def build(cls, scaler, model, features, metadata=None):
+        """Compile and package a fitted (scaler, RandomForestClassifier) pair."""
+        if model.n_features_in_ != len(features):
+            raise ValueError(f"Model expects {model.n_features_in_} features, got {len(features)} names")
+        pair = pickle.dumps((scaler, model), protocol=pickle.HIGHEST_PROTOCOL)
+        import sklearn
+
+        meta = {"created_at": datetime.now().isoformat(timespec="seconds"), "sklearn": sklearn.__version__}
+        meta.update(metadata or {})
+        artifact = cls(CompiledForest.compile(scaler, model), np.frombuffer(pair, dtype=np.uint8), features, meta)
+        artifact._pair = (scaler, model)
+        return artifact
+
+    def save(self, path):
+        """Write the artifact atomically (temp file + rename), so a reader never sees half of it."""
+        import joblib
+
+        payload = {
+            "format": ARTIFACT_FORMAT,
+            "format_version": FORMAT_VERSION,
+            "features": self.features,
+            "metadata": self.metadata,
+            "content_hash": self.hash,
+            "model_hash": self.model_hash,
+            "compiler_version": COMPILER_VERSION,
+            "forest": self.forest.arrays(),
+            "sklearn_bytes": np.asarray(self.sklearn_bytes),
+        }
+        tmp = path + ".tmp"
+        joblib.dump(payload, tmp, compress=0)
+        os.replace(tmp, path)
+        self.path = path
+
+    @classmethod
+    def load(cls, path, mmap=True, verify=False, features=None):
+        """Load an artifact (or a legacy (scaler, model) pickle).
+
+        `verify` recomputes the content hash, which reads every page. `features` is only
+        used for legacy pickles, which do not record their own order.
+        """
+        import joblib
+
+        payload = joblib.load(path, mmap_mode="r" if mmap else None)
+        if isinstance(payload, tuple) and len(payload) == 2:
+            if features is None:
+                raise ValueError(f"{path} is a legacy (scaler, model) pickle; pass its feature order")
+            artifact = cls.build(*payload, features, {"source": "legacy (scaler, model) pickle"})
+            artifact.path = path
+            return artifact
+        if not isinstance(payload, dict) or payload.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not a symptom model artifact")
+        if payload["format_version"] > FORMAT_VERSION:
+            raise ValueError(f"{path} uses artifact format v{payload['format_version']}; "
+                             f"this version of RespireX reads up to v{FORMAT_VERSION}")
+        if verify:
+            actual = content_hash(payload["features"], payload["forest"], payload["sklearn_bytes"])
+            if actual != payload["content_hash"]:
+                raise ValueError(f"{path} is corrupt: content hash {actual[:12]} "
+                                 f"!= recorded {payload['content_hash'][:12]}")
+        if payload.get("compiler_version", 1) != COMPILER_VERSION:
+            # Cut points from another compiler can disagree with the sklearn model they came from
+            pair = pickle.loads(memoryview(np.ascontiguousarray(payload["sklearn_bytes"])))
+            artifact = cls(CompiledForest.compile(*pair), payload["sklearn_bytes"], payload["features"],
+                           payload["metadata"], path=path)
+            artifact._pair = pair
+            print(f"[model] {path} was compiled by an older version; recompiled it in memory. "
+                  f"Run `python model_artifact.py convert {path}` to update the file.", file=sys.stderr)
+            return artifact
+        return cls(CompiledForest.from_arrays(payload["forest"]), payload["sklearn_bytes"], payload["features"],
+                   payload["metadata"], payload["content_hash"], path, payload["model_hash"])
+
+    def describe(self):
+        return {
+            "path": self.path,
+            "format": f"{ARTIFACT_FORMAT} v{FORMAT_VERSION}",
+            "content_hash": self.hash,
+            "model_hash": self.model_hash,
+            "compiler_version": COMPILER_VERSION,
+            "features": self.features,
+            "classes": [int(c) for c in self.classes],
+            "trees": self.forest.n_trees,
+            "nodes": int(len(self.forest.feature)),
+            "metadata": self.metadata,
+        }
+
+
+# ---------- Load Benchmark ----------
+_PROBE = r"""
+import os, sys, time
+t0 = time.perf_counter()
+mode, path, hold = sys.argv[1], sys.argv[2], float(sys.argv[3])
+import numpy as np
+from symptom_model import SymptomPredictor
+if mode == "pickle":
+    import pickle
+    with open(path, "rb") as f:
+        scaler, model = pickle.load(f)
+    predictor = SymptomPredictor(scaler, model)
+else:
+    predictor = SymptomPredictor.from_file(path)
+predictor.predict(np.zeros((1, 10)))
+load = time.perf_counter() - t0
+# Touch every array the compiled engine uses, as a long-running server eventually would
+predictor.predict(np.random.default_rng(0).integers(0, 10, (20000, 10)))
+mem = {}
+with open("/proc/self/smaps_rollup") as f:
+    for line in f:
+        key = line.split(":")[0]
+        if key in ("Rss", "Pss"):
+            mem[key] = int(line.split()[1]) / 1024
+print(f"{load:.4f} {mem.get('Rss', 0):.1f} {mem.get('Pss', 0):.1f}", flush=True)
+time.sleep(hold)
+"""
+
+
+def benchmark(pickle_path, artifact_path, processes=4):
+    """Start-to-first-prediction time and per-process RSS/PSS: legacy pickle vs mmap'd artifact.
+
+    Each mode runs `processes` fresh interpreters at once and keeps them alive until
+    all have reported, so PSS (RSS with shared pages split between the processes that
+    map them) shows how much of the model is actually shared. Linux only for memory.
+    """
+    results = {}
+    for mode, path in (("pickle", pickle_path), ("artifact", artifact_path)):
+        hold = 1.0 + 0.5 * processes
+        procs = [subprocess.Popen([sys.executable, "-c", _PROBE, mode, path, str(hold)], stdout=subprocess.PIPE,
+                                  text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+                 for _ in range(processes)]
+        rows = [tuple(map(float, p.stdout.readline().split())) for p in procs]
+        for p in procs:
+            p.wait()
+        load, rss, pss = (np.array(col) for col in zip(*rows))
+        results[mode] = {"load_s": float(np.median(load)), "rss_mb": float(rss.mean()), "pss_mb": float(pss.mean())}
+    return results
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    from symptom_model import FEATURES, MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Create, inspect and benchmark symptom model artifacts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("convert", help="turn a legacy (scaler, model) pickle, or an artifact from an "
+                                       "older compiler, into a current artifact")
+    p.add_argument("source", nargs="?", default=MODEL_PATH)
+    p.add_argument("-o", "--output", default=MODEL_PATH)
+    p = sub.add_parser("inspect", help="print the artifact's schema, metadata and hash")
+    p.add_argument("path", nargs="?", default=MODEL_PATH)
+    p.add_argument("--verify", action="store_true", help="recompute the content hash")
+    p = sub.add_parser("bench", help="load time and per-process memory: legacy pickle vs artifact")
+    p.add_argument("pickle", help="legacy (scaler, model) pickle")
+    p.add_argument("artifact")
+    p.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        artifact = ModelArtifact.load(args.source, features=FEATURES)
+        artifact.save(args.output)
+        print(f"Wrote {args.output} (version {artifact.version}, content hash {artifact.hash[:12]})")
+    elif args.command == "inspect":
+        print(json.dumps(ModelArtifact.load(args.path, verify=args.verify, features=FEATURES).describe(), indent=2))
+    else:
+        r = benchmark(args.pickle, args.artifact, args.processes)
+        print(f"{'format':<9} {'load s':>7} {'RSS MB':>7} {'PSS MB':>7}   ({args.processes} processes at once)")
+        for mode, row in r.items():
+            print(f"{mode:<9} {row['load_s']:7.3f} {row['rss_mb']:7.1f} {row['pss_mb']:7.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
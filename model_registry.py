@@ -0,0 +1,61 @@
+import threading
+
+import mri_model
+from model_reload import HotModel, load_mri, smoke_test_mri
+from prediction_cache import CachedPredictor
+from symptom_model import MODEL_PATH
+
+
+# ---------- Loaders ----------
+def _load_symptom():
+    return CachedPredictor.from_file(MODEL_PATH)
+
+
+def _load_mri():
+    # load_mri warms the model, so the first real prediction is not slow
+    return HotModel("mri", mri_model.MODEL_PATH, load_mri, smoke_test_mri).start()
+
+
+# ---------- Registry ----------
+class ModelRegistry:
+    """Process-wide home for loaded models: each one is loaded at most once.
+
+    `get(name)` blocks until the model is available (call it from a worker thread for
+    slow loaders); concurrent callers for the same name wait on one load instead of
+    starting their own. A failed load is not cached, so the next `get` tries again.
+    """
+
+    def __init__(self, loaders=None):
+        self.loaders = dict(loaders or {})
+        self._models = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def register(self, name, loader):
+        self.loaders[name] = loader
+
+    def _lock_for(self, name):
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock_for(name):
+            if name not in self._models:
+                self._models[name] = self.loaders[name]()
+            return self._models[name]
+
+    def peek(self, name):
+        """The model if it is already loaded, else None (never triggers a load)."""
+        return self._models.get(name)
+
+    def put(self, name, model):
+        self._models[name] = model
+
+    def evict(self, name):
+        self._models.pop(name, None)
+
+
+registry = ModelRegistry({"symptom": _load_symptom, "mri": _load_mri})
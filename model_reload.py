@@ -0,0 +1,348 @@
+import argparse
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+import metrics
+
+CHECK_INTERVAL = 2.0  # seconds between model file stat checks
+SETTLE_TIME = 0.5  # a new file must stop changing for this long before it is loaded
+HISTORY_DIR = ".respirex_cache/model_history"
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# ---------- Loaders & Smoke Tests ----------
+def load_symptom(path):
+    from symptom_model import SymptomPredictor
+    return SymptomPredictor.from_file(path)
+
+
+def smoke_test_symptom(new, old=None, rows=256, seed=0):
+    """Score a fixed batch (all 0s, all 9s, random rows) and check the output is usable.
+
+    Raises ValueError if not; returns agreement with the old model for the record.
+    """
+    from symptom_model import FEATURES, MAX_LEVEL, RISK_MAPPING
+
+    X = np.random.default_rng(seed).integers(0, MAX_LEVEL + 1, size=(rows, len(FEATURES)))
+    X[0], X[1] = 0, MAX_LEVEL
+    proba = new.predict_proba(X)
+    if proba.shape != (rows, len(new.classes)):
+        raise ValueError(f"Smoke test: expected {(rows, len(new.classes))} probabilities, got {proba.shape}")
+    if not np.all(np.isfinite(proba)) or not np.allclose(proba.sum(axis=1), 1.0, atol=1e-6):
+        raise ValueError("Smoke test: probabilities are not finite or do not sum to 1")
+    if any(int(c) not in RISK_MAPPING for c in new.class_codes):
+        raise ValueError(f"Smoke test: unknown class codes {list(new.class_codes)}")
+    report = {"rows": rows}
+    if old is not None:
+        try:
+            report["agreement"] = float(np.mean(new.predict(X) == old.predict(X)))
+        except Exception:
+            pass  # a broken old model must not block its replacement
+    return report
+
+
+def load_mri(path):
+    """Load the MRI model and warm it (and its similar-case and heatmap wrappers) so the first prediction is fast."""
+    import case_index
+    import gradcam
+    import mri_model
+
+    model = mri_model.load_model(path)
+    batch = mri_model.new_buffer()
+    batch[:] = 0
+    mri_model.predict_batch(model, batch)
+    dual = case_index.embedding_model(model)
+    if dual is not None:
+        case_index.predict_with_embeddings(dual, batch)
+    heatmaps = gradcam.heatmap_model(model)
+    if heatmaps is not None:
+        gradcam.predict_with_heatmaps(heatmaps, batch)
+    return model
+
+
+def smoke_test_mri(new, old=None, seed=0):
+    import mri_model
+
+    batch = np.random.default_rng(seed).random((2,) + mri_model.IMG_SIZE + (3,), dtype=np.float32)
+    probs = mri_model.predict_batch(new, batch)
+    if probs.shape != (2, len(mri_model.CLASS_NAMES)):
+        raise ValueError(f"Smoke test: expected {(2, len(mri_model.CLASS_NAMES))} probabilities, got {probs.shape}")
+    if not np.all(np.isfinite(probs)) or not np.allclose(probs.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("Smoke test: probabilities are not finite or do not sum to 1")
+    report = {"rows": 2}
+    if old is not None:
+        try:
+            report["agreement"] = float(np.mean(probs.argmax(axis=1) == mri_model.predict_batch(old, batch).argmax(axis=1)))
+        except Exception:
+            pass
+    return report
+
+
+# ---------- Hot-Swappable Model ----------
+class HotModel:
+    """A model that replaces itself when its file changes, without pausing predictions.
+
+    Callers read `current` once per prediction and use that object throughout, so a
+    prediction that started on the old model finishes on it. A background thread stats
+    the file every `check_interval` seconds; once a new file has stopped changing it is
+    loaded, warmed and smoke-tested on that thread, and only then swapped in with a
+    single reference assignment. Predictions never wait on a lock. A file that fails
+    to load or fails its smoke test is skipped (the running model stays) until it
+    changes again. `rollback()` swaps the previous model straight back in; callbacks in
+    `on_swap(new, old)` run after every swap (e.g. to clear prediction caches).
+
+    Replace model files with a rename (as `deploy`, train_symptom.py and
+    model_artifact.py do), never by writing over them: the symptom artifact is
+    memory-mapped, so rewriting the file in place changes the running model under it.
+    """
+
+    def __init__(self, name, path, load, smoke_test=None, check_interval=CHECK_INTERVAL, settle=SETTLE_TIME):
+        self.name = name
+        self.path = path
+        self.load = load
+        self.smoke_test = smoke_test
+        self.check_interval = check_interval
+        self.settle = settle
+        self.on_swap = []
+        self.history = deque(maxlen=50)
+        self._lock = threading.Lock()  # serializes reload/rollback, never taken by predictions
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.signature = file_signature(path)
+        with metrics.span(f"load.{name}"):
+            self.current = load(path)
+            if smoke_test is not None:
+                smoke_test(self.current)
+        self.previous = None
+        self.version = 1
+        self._rejected = None
+        self._record("loaded", signature=self.signature)
+
+    def _record(self, event, **info):
+        entry = {"time": datetime.now().isoformat(timespec="seconds"), "event": event, "version": self.version, **info}
+        self.history.append(entry)
+        print(f"[reload] {self.name}: {event} {info}", file=sys.stderr)
+
+    # ----- watching -----
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name=f"reload-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                self._record("watch error", error=str(e))
+
+    def check(self):
+        """Reload if the file changed (and has settled); returns True if a new model was swapped in."""
+        sig = file_signature(self.path)
+        if sig is None or sig == self.signature or sig == self._rejected:
+            return False
+        time.sleep(self.settle)
+        if file_signature(self.path) != sig:
+            return False  # still being written; look again next round
+        return self.reload(sig)
+
+    # ----- swapping -----
+    def reload(self, signature=None):
+        with self._lock:
+            sig = signature or file_signature(self.path)
+            t0 = time.perf_counter()
+            try:
+                with metrics.span(f"reload.{self.name}"):
+                    new = self.load(self.path)
+                    report = self.smoke_test(new, self.current) if self.smoke_test is not None else {}
+            except Exception as e:
+                metrics.inc(f"reload.{self.name}.rejected")
+                self._rejected = sig
+                self._record("rejected", error=str(e), signature=sig)
+                return False
+            self.signature = sig
+            self._swap(new, "reloaded", load_s=round(time.perf_counter() - t0, 3), signature=sig, **report)
+            return True
+
+    def rollback(self):
+        """Swap the previous model back in. The file on disk is not touched, so it is not reloaded either."""
+        with self._lock:
+            if self.previous is None:
+                raise RuntimeError(f"No previous {self.name} model to roll back to.")
+            self._swap(self.previous, "rolled back")
+
+    def _swap(self, new, event, **info):
+        old = self.current
+        self.current = new  # the swap itself: one reference assignment
+        self.previous = old
+        self.version += 1
+        for callback in list(self.on_swap):
+            try:
+                callback(new, old)
+            except Exception as e:
+                print(f"[reload] {self.name}: on_swap callback failed: {e}", file=sys.stderr)
+        self._record(event, **info)
+
+    def status(self):
+        return {
+            "path": self.path,
+            "version": self.version,
+            "can_roll_back": self.previous is not None,
+            "history": list(self.history)[-10:],
+        }
+
+
+# ---------- Deploy & Rollback (files) ----------
+def _history(target):
+    base = os.path.basename(target)
+    if not os.path.isdir(HISTORY_DIR):
+        return []
+    return sorted(os.path.join(HISTORY_DIR, f) for f in os.listdir(HISTORY_DIR) if f.endswith("-" + base))
+
+
+def deploy(source, target, load, smoke_test):
+    """Validate `source`, keep a copy of the current `target`, then atomically replace it.
+
+    Running processes pick the new file up through their HotModel watchers.
+    """
+    smoke_test(load(source))
+    if os.path.exists(target):
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        shutil.copy2(target, os.path.join(HISTORY_DIR, f"{stamp}-{os.path.basename(target)}"))
+    tmp = target + ".deploy.tmp"
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, target)
+
+
+def rollback_file(target):
+    """Restore the most recently replaced version of `target`; returns the file restored from."""
+    history = _history(target)
+    if not history:
+        raise RuntimeError(f"No earlier version of {target} in {HISTORY_DIR}")
+    latest = history[-1]
+    tmp = target + ".deploy.tmp"
+    shutil.copyfile(latest, tmp)
+    os.replace(tmp, target)
+    os.remove(latest)
+    return latest
+
+
+# ---------- Swap Latency Benchmark ----------
+def bench_swap(path, seconds=6.0, swaps=4):
+    """Predict single rows in a tight loop while the model is reloaded `swaps` times.
+
+    Compares per-prediction latency inside the reload windows with the rest of the run.
+    """
+    from prediction_cache import CachedPredictor
+
+    cached = CachedPredictor.from_file(path, watch=False)
+    model = cached.model
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, 10, size=(4096, 10)).tolist()
+    samples, windows = [], []
+    stop = threading.Event()
+
+    def predict_loop():
+        i = 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            model.current.predict_one(rows[i % len(rows)])  # uncached, so every call hits the model
+            samples.append((t0, time.perf_counter() - t0))
+            i += 1
+
+    worker = threading.Thread(target=predict_loop)
+    worker.start()
+    gap = seconds / (swaps + 1)
+    for _ in range(swaps):
+        time.sleep(gap)
+        t0 = time.perf_counter()
+        model.reload()
+        windows.append((t0, time.perf_counter()))
+    time.sleep(gap)
+    stop.set()
+    worker.join()
+
+    during = np.array([d for t, d in samples if any(a <= t <= b for a, b in windows)])
+    outside = np.array([d for t, d in samples if not any(a <= t <= b for a, b in windows)])
+
+    def summary(x):
+        if len(x) == 0:
+            return "no samples"
+        return (f"{len(x):7,} calls  p50 {np.percentile(x, 50) * 1e6:7.1f} µs  p99 {np.percentile(x, 99) * 1e6:7.1f} µs"
+                f"  max {x.max() * 1e3:6.2f} ms")
+
+    print(f"steady     : {summary(outside)}")
+    print(f"during swap: {summary(during)}   ({swaps} reloads, "
+          f"{np.mean([b - a for a, b in windows]) * 1e3:.0f} ms each)")
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deploy, roll back and benchmark hot model reloads.")
+    parser.add_argument("--model", choices=("symptom", "mri"), default="symptom")
+    parser.add_argument("--target", help="model file the app loads (default: the app's path)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("deploy", help="smoke-test a new model file and swap it in for running processes")
+    p.add_argument("source")
+    p = sub.add_parser("rollback", help="put the previously deployed model file back")
+    p.add_argument("--server", help="also roll back a running inference server in memory, e.g. http://127.0.0.1:5000")
+    p = sub.add_parser("bench", help="prediction latency while the symptom model is hot-reloaded")
+    p.add_argument("--seconds", type=float, default=6.0)
+    p.add_argument("--swaps", type=int, default=4)
+    args = parser.parse_args(argv)
+    if args.command == "bench" and args.model != "symptom":
+        parser.error("bench measures the symptom model only")
+
+    if args.model == "mri":
+        import mri_model  # PIL and TensorFlow only when the MRI model is involved
+        default_target, load, smoke_test = mri_model.MODEL_PATH, load_mri, smoke_test_mri
+    else:
+        from symptom_model import MODEL_PATH
+        default_target, load, smoke_test = MODEL_PATH, load_symptom, smoke_test_symptom
+    target = args.target or default_target
+    if args.command == "deploy":
+        try:
+            deploy(args.source, target, load, smoke_test)
+        except Exception as e:
+            print(f"Not deployed: {args.source} failed to load or its smoke test: {e}", file=sys.stderr)
+            return 1
+        print(f"Deployed {args.source} -> {target}; running processes will swap it in within "
+              f"{CHECK_INTERVAL + SETTLE_TIME:.1f}s")
+    elif args.command == "rollback":
+        if args.server:
+            from inference_server import InferenceClient
+            reply = InferenceClient(args.server).rollback(args.model)
+            print(f"Server {args.model} model rolled back to version {reply['version']}")
+        try:
+            restored = rollback_file(target)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Restored {target} from {restored}")
+    else:
+        bench_swap(target, args.seconds, args.swaps)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+_STOP = object()
+
+
+# ---------- Dynamic Micro-Batcher ----------
+class MicroBatcher:
+    """Coalesces single-image requests into one model call.
+
+    Callers `submit()` a (224, 224, 3) array and get a Future for its probability row.
+    The worker takes the first waiting request, then keeps collecting until it has
+    `max_batch_size` images or `max_wait` seconds have passed since that first one, and
+    runs the whole stack through `predict_fn` at once. Batch sizes and queue waits are
+    recorded so the throughput/latency tradeoff can be tuned from `stats()`.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait=0.005, history=10_000):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_sizes = Counter()
+        self.queue_waits = deque(maxlen=history)  # seconds from submit to batch start
+        self.batch_times = deque(maxlen=history)  # seconds spent in predict_fn
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="mri-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        fut = Future()
+        self._queue.put((np.asarray(image, dtype=np.float32), time.perf_counter(), fut))
+        return fut
+
+    def predict(self, image, timeout=None):
+        return self.submit(image).result(timeout)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = item[1] + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        start = time.perf_counter()
+        for _, submitted, _ in batch:
+            self.queue_waits.append(start - submitted)
+        self.batch_sizes[len(batch)] += 1
+        try:
+            probs = self.predict_fn(np.stack([img for img, _, _ in batch]))
+        except Exception as e:
+            for _, _, fut in batch:
+                fut.set_exception(e)
+            return
+        self.batch_times.append(time.perf_counter() - start)
+        for (_, _, fut), row in zip(batch, probs):
+            fut.set_result(row)
+
+    def stats(self):
+        waits = np.asarray(self.queue_waits) * 1e3
+        runs = np.asarray(self.batch_times) * 1e3
+        n_batches = sum(self.batch_sizes.values())
+        n_images = sum(size * n for size, n in self.batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1e3,
+            "batches": n_batches,
+            "images": n_images,
+            "mean_batch_size": n_images / n_batches if n_batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "queue_wait_ms": _percentiles(waits),
+            "batch_run_ms": _percentiles(runs),
+        }
+
+
+def _percentiles(values):
+    if not len(values):
+        return {}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(values.max())}
@@ -0,0 +1,214 @@
+import io
+import os
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+# ---------- Model Constants ----------
+# A quantized export from mri_quantize.py (.tflite) can be used in place of the Keras model
+MODEL_PATH = os.environ.get("RESPIREX_MRI_MODEL", "my_model.keras")
+CLASS_NAMES = ['Benign', 'Malignant', 'Normal']
+IMG_SIZE = (224, 224)
+CLASS_COLORS = {"Normal": "#00ff88", "Benign": "#ffe266", "Malignant": "#ff4c4c"}
+
+
+def load_model(path=MODEL_PATH, num_threads=None):
+    """Load the MRI classifier: a Keras model, or a TFLite export if `path` ends in .tflite.
+
+    TensorFlow is imported here, not at module import.
+    """
+    if path.endswith(".tflite"):
+        return TFLiteModel(path, num_threads)
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+class TFLiteModel:
+    """A TFLite export behind the same `model(batch, training=False)` call as the Keras model.
+
+    Uses the small tflite_runtime package when it is installed, else TensorFlow's bundled
+    interpreter. Quantized int8 inputs and outputs are converted with the scale and zero
+    point stored in the model, so callers always pass and receive float32. The interpreter
+    is not thread-safe, so calls are serialized.
+    """
+
+    def __init__(self, path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.path = path
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads or os.cpu_count())
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+    def __call__(self, batch, training=False):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape[0] != self._batch:
+                self.interpreter.resize_tensor_input(self._input["index"], list(batch.shape))
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+                self._batch = batch.shape[0]
+            self.interpreter.set_tensor(self._input["index"], self._quantize(batch))
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output["index"])
+        return self._dequantize(out)
+
+    def _quantize(self, batch):
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return batch
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, out):
+        if out.dtype == np.float32:
+            return out.copy()
+        scale, zero_point = self._output["quantization"]
+        return ((out.astype(np.float32) - zero_point) * scale).astype(np.float32)
+
+
+# ---------- Preprocessing ----------
+def load_image(source):
+    """Open a path, raw bytes or PIL image and return it resized to 224x224 RGB.
+
+    JPEGs are decoded in draft mode at the smallest DCT scale that still covers 224x224,
+    which skips most of the decode work on large scans.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    img = source if isinstance(source, Image.Image) else Image.open(source)
+    img.draft("RGB", IMG_SIZE)
+    return img.resize(IMG_SIZE).convert("RGB")
+
+
+def to_array(img, out=None):
+    """224x224 RGB image -> float32 (224, 224, 3) array scaled to 0–1, written into `out` if given."""
+    pixels = np.asarray(img, dtype=np.uint8)
+    if out is None:
+        out = np.empty(pixels.shape, np.float32)
+    np.divide(pixels, np.float32(255), out=out)
+    return out
+
+
+def preprocess(source):
+    return to_array(load_image(source))
+
+
+def new_buffer(n=1):
+    """An (n, 224, 224, 3) float32 batch to normalize into and reuse across images."""
+    return np.empty((n,) + IMG_SIZE + (3,), np.float32)
+
+
+class DecodedImage:
+    """One scan, decoded once: the raw bytes, the 224x224 preview and the model tensor."""
+
+    __slots__ = ("data", "preview", "tensor", "source_size", "format", "timings")
+
+    def __init__(self, data, preview, tensor, source_size, format, timings):
+        self.data = data  # file bytes, for sending to the inference server
+        self.preview = preview  # 224x224 RGB PIL image
+        self.tensor = tensor  # (1, 224, 224, 3) float32, ready for predict_batch
+        self.source_size = source_size
+        self.format = format
+        self.timings = timings  # stage -> milliseconds
+
+
+def decode_once(path, out=None):
+    """Read and decode `path` once, producing both the preview and the model tensor.
+
+    Pass a buffer from `new_buffer()` as `out` to reuse it instead of allocating; the
+    returned tensor is then a view of it, so don't reuse a buffer a prediction is
+    still reading.
+    """
+    timings = {}
+    t = time.perf_counter()
+
+    def stage(name):
+        nonlocal t
+        now = time.perf_counter()
+        timings[name] = (now - t) * 1e3
+        t = now
+
+    with open(path, "rb") as f:
+        data = f.read()
+    stage("read")
+    img = Image.open(io.BytesIO(data))
+    source_size, fmt = img.size, img.format
+    img.draft("RGB", IMG_SIZE)
+    img.load()
+    stage("decode")
+    preview = img.resize(IMG_SIZE).convert("RGB")
+    stage("resize")
+    tensor = out if out is not None else new_buffer()
+    to_array(preview, tensor[0])
+    stage("normalize")
+    return DecodedImage(data, preview, tensor, source_size, fmt, timings)
+
+
+def benchmark_decode(path, repeat=5):
+    """Median ms per stage for the old two-decode path and for decode_once on one file."""
+    def old_path():
+        # What the MRI screen did before: full decode for the preview, then a second
+        # full decode plus a float64 array for the prediction
+        Image.open(path).resize(IMG_SIZE)
+        img = Image.open(path).resize(IMG_SIZE).convert("RGB")
+        return np.expand_dims(np.array(img) / 255.0, axis=0)
+
+    def median(xs):
+        return sorted(xs)[len(xs) // 2]
+
+    old = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        old_path()
+        old.append((time.perf_counter() - t) * 1e3)
+
+    buf = new_buffer()
+    runs = [decode_once(path, buf).timings for _ in range(repeat)]
+    stages = {name: median([r[name] for r in runs]) for name in runs[0]}
+    return {"old_ms": median(old), "decode_once_ms": median([sum(r.values()) for r in runs]), "stages_ms": stages}
+
+
+# ---------- Inference ----------
+def predict_batch(model, batch):
+    """Run an (n, 224, 224, 3) batch through the model and return (n, 3) probabilities.
+
+    Calling the model directly skips the per-call setup of `model.predict`, which
+    dominates for the small batches the UI and server send.
+    """
+    batch = np.asarray(batch, dtype=np.float32)
+    if batch.ndim == 3:
+        batch = batch[None]
+    return np.asarray(model(batch, training=False))
+
+
+def top_class(probabilities):
+    i = int(np.argmax(probabilities))
+    return CLASS_NAMES[i], float(probabilities[i])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time the MRI image preprocessing stages on a scan.")
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for image in args.images:
+        r = benchmark_decode(image, args.repeat)
+        with Image.open(image) as img:
+            size = "x".join(map(str, img.size))
+        stages = ", ".join(f"{k} {v:.1f}" for k, v in r["stages_ms"].items())
+        print(f"{image} ({size}): two decodes {r['old_ms']:.1f} ms -> decode once {r['decode_once_ms']:.1f} ms "
+              f"[{stages}]")
@@ -0,0 +1,201 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+import mri_model
+from batch_classify import collect_images, iter_batches
+
+TRAIN_DIR = "lung_cancer_MRI_dataset/train"  # same layout as X-ray predictor.py
+HOLDOUT_DIR = "lung_cancer_MRI_dataset/validate"
+MODES = ("int8", "float16")
+
+
+def default_output(model_path, mode):
+    return os.path.splitext(model_path)[0] + f"_{mode}.tflite"
+
+
+# ---------- Export ----------
+def representative_data(paths, limit=200, seed=0):
+    """Calibration samples for int8 quantization: one preprocessed image per step."""
+    paths = list(paths)
+    random.Random(seed).shuffle(paths)
+
+    def gen():
+        for path in paths[:limit]:
+            try:
+                yield [mri_model.preprocess(path)[None]]
+            except Exception:
+                continue
+    return gen
+
+
+def export(model_path, output, mode="int8", calibration_paths=(), calibration_limit=200):
+    """Convert the Keras model to a post-training-quantized TFLite file; returns its size in bytes.
+
+    float16 halves the weights and keeps float math. int8 quantizes weights and
+    activations (calibrated on `calibration_paths`) so the whole graph runs in integer
+    kernels; its input and output stay int8 and TFLiteModel converts them.
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == "int8":
+        if not calibration_paths:
+            raise ValueError("int8 export needs calibration images")
+        converter.representative_dataset = representative_data(calibration_paths, calibration_limit)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    else:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+
+    data = converter.convert()
+    with open(output, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+# ---------- Parity Gate ----------
+def check_parity(reference, candidate, paths, batch_size=32):
+    """Run both models over held-out images; class agreement and probability drift."""
+    agree = n = 0
+    drift_sum = drift_max = 0.0
+    for _, batch, _ in iter_batches(paths, batch_size):
+        if batch is None:
+            continue
+        x = batch.astype(np.float32) / 255.0
+        ref = mri_model.predict_batch(reference, x)
+        got = mri_model.predict_batch(candidate, x)
+        diff = np.abs(ref - got).max(axis=1)
+        agree += int(np.sum(ref.argmax(axis=1) == got.argmax(axis=1)))
+        n += len(x)
+        drift_sum += float(diff.sum())
+        drift_max = max(drift_max, float(diff.max()))
+    if n == 0:
+        raise ValueError("No readable held-out images")
+    return {"images": n, "agreement": agree / n, "mean_drift": drift_sum / n, "max_drift": drift_max}
+
+
+# ---------- Benchmark ----------
+def rss_mb():
+    """Current resident set size in MB (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def benchmark(model_path, paths, batch_size=32, repeats=30):
+    """Load cost, single-image latency (p50/p95) and batch throughput for one backend.
+
+    Import TensorFlow before calling this so its own footprint is not charged to the
+    first model measured.
+    """
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+    model = mri_model.load_model(model_path)
+    load_s = time.perf_counter() - t0
+    memory = rss_mb() - rss0
+
+    images = np.stack([mri_model.preprocess(p) for p in paths[:batch_size]])
+    single = images[:1]
+    mri_model.predict_batch(model, single)  # warm-up / tracing
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        mri_model.predict_batch(model, single)
+        samples.append(time.perf_counter() - t0)
+
+    mri_model.predict_batch(model, images)
+    t0 = time.perf_counter()
+    rounds = max(1, repeats // 10)
+    for _ in range(rounds):
+        mri_model.predict_batch(model, images)
+    batch_s = (time.perf_counter() - t0) / rounds
+
+    return {
+        "file_mb": os.path.getsize(model_path) / 1e6,
+        "load_s": load_s,
+        "memory_mb": memory,
+        "p50_ms": float(np.percentile(samples, 50)) * 1e3,
+        "p95_ms": float(np.percentile(samples, 95)) * 1e3,
+        "images_per_sec": len(images) / batch_s,
+    }
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export a quantized TFLite MRI model, gate it on held-out parity and benchmark both backends.")
+    parser.add_argument("--model", default="my_model.keras", help="Keras model to quantize")
+    parser.add_argument("--mode", choices=MODES, default="int8")
+    parser.add_argument("-o", "--output", help="TFLite file to write (default: <model>_<mode>.tflite)")
+    parser.add_argument("--calibration", default=TRAIN_DIR, help="images for int8 calibration")
+    parser.add_argument("--calibration-images", type=int, default=200)
+    parser.add_argument("--holdout", default=HOLDOUT_DIR, help="held-out images for the parity check")
+    parser.add_argument("--min-agreement", type=float, default=0.99, help="required top-class agreement")
+    parser.add_argument("--max-drift", type=float, default=0.05, help="largest allowed mean |Δp| per image")
+    parser.add_argument("--keep-failed", action="store_true", help="keep the export even if parity fails")
+    parser.add_argument("--no-benchmark", action="store_true")
+    args = parser.parse_args(argv)
+
+    output = args.output or default_output(args.model, args.mode)
+    holdout = collect_images([args.holdout])
+    if not holdout:
+        print(f"No held-out images found in {args.holdout}", file=sys.stderr)
+        return 1
+    calibration = collect_images([args.calibration]) if args.mode == "int8" else []
+    if args.mode == "int8" and not calibration:
+        print(f"No calibration images found in {args.calibration}", file=sys.stderr)
+        return 1
+    overlap = set(map(os.path.abspath, calibration)) & set(map(os.path.abspath, holdout))
+    if overlap:
+        print(f"Warning: {len(overlap)} calibration images are also in the held-out set", file=sys.stderr)
+
+    import tensorflow  # noqa: F401  (loaded up front so the benchmark measures the models, not TF)
+
+    tmp = os.path.splitext(output)[0] + ".partial.tflite"  # must keep the suffix load_model dispatches on
+    t0 = time.perf_counter()
+    size = export(args.model, tmp, args.mode, calibration, args.calibration_images)
+    print(f"Exported {args.mode} model ({size / 1e6:.1f} MB) in {time.perf_counter() - t0:.1f}s")
+
+    parity = check_parity(mri_model.load_model(args.model), mri_model.load_model(tmp), holdout)
+    passed = parity["agreement"] >= args.min_agreement and parity["mean_drift"] <= args.max_drift
+    print(f"Parity on {parity['images']} held-out images: {parity['agreement'] * 100:.2f}% class agreement, "
+          f"probability drift mean {parity['mean_drift']:.4f} / max {parity['max_drift']:.4f} "
+          f"-> {'PASS' if passed else 'FAIL'}")
+    if passed or args.keep_failed:
+        os.replace(tmp, output)
+        print(f"Saved {output}" + ("" if passed else " (parity FAILED, kept by --keep-failed)"))
+    else:
+        os.remove(tmp)
+        print("Export discarded; loosen the gate with --min-agreement/--max-drift or try --mode float16")
+        return 1
+
+    if not args.no_benchmark:
+        rows = [("keras", benchmark(args.model, holdout)), (args.mode, benchmark(output, holdout))]
+        print(f"\n{'backend':<8} {'file MB':>8} {'load s':>7} {'RSS MB':>7} {'p50 ms':>7} {'p95 ms':>7} {'img/s':>8}")
+        for name, r in rows:
+            print(f"{name:<8} {r['file_mb']:8.1f} {r['load_s']:7.2f} {r['memory_mb']:7.0f} "
+                  f"{r['p50_ms']:7.1f} {r['p95_ms']:7.1f} {r['images_per_sec']:8.1f}")
+    print(f"\nUse it with: RESPIREX_MRI_MODEL={output} python Xray_predictor_ui.py "
+          f"(or --model / --mri-model on the batch and server tools)")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+from symptom_model import MODEL_PATH
+
+DEFAULT_MAXSIZE = 4096
+
+
+def pack_key(values):
+    """Pack ten 0–9 levels into one int, e.g. [3, 4, 5, ...] -> 345..."""
+    key = 0
+    for v in values:
+        key = key * 10 + v
+    return key
+
+
+def unpack_key(key, n_features=10):
+    values = []
+    for _ in range(n_features):
+        key, v = divmod(key, 10)
+        values.append(v)
+    return values[::-1]
+
+
+# ---------- LRU Cache ----------
+class PredictionCache:
+    """Size-bounded LRU of packed feature key -> prediction.
+
+    `clear()` bumps `generation`; a `put` tagged with an older generation is dropped,
+    so a prediction computed by a model that has since been swapped out never lands
+    in the cache.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# ---------- Cached Predictor ----------
+class CachedPredictor:
+    """SymptomPredictor.predict_one with an LRU in front of a hot-reloadable model.
+
+    The cache is cleared whenever the HotModel swaps in a new (or rolled-back) model.
+    """
+
+    def __init__(self, model, cache=None):
+        self.model = model
+        self.cache = cache if cache is not None else PredictionCache()
+        model.on_swap.append(lambda new, old: self.cache.clear())
+
+    @property
+    def predictor(self):
+        return self.model.current
+
+    @property
+    def version(self):
+        return self.model.current.version
+
+    @classmethod
+    def from_file(cls, path=MODEL_PATH, maxsize=DEFAULT_MAXSIZE, watch=True):
+        from model_reload import HotModel, load_symptom, smoke_test_symptom
+
+        model = HotModel("symptom", path, load_symptom, smoke_test_symptom)
+        if watch:
+            model.start()
+        return cls(model, PredictionCache(maxsize))
+
+    def predict_one(self, values):
+        key = pack_key(values)
+        result = self.cache.get(key)
+        if result is None:
+            generation = self.cache.generation  # read before predicting, so a swap mid-call is caught
+            result = self.model.current.predict_one(values)
+            self.cache.put(key, result, generation)
+        return result
+
+    def explain_one(self, values, top=3):
+        key = ("explain", top, pack_key(values))
+        result = self.cache.get(key)
+        if result is None:
+            generation = self.cache.generation
+            result = self.model.current.explain_one(values, top)
+            self.cache.put(key, result, generation)
+        return result
@@ -0,0 +1,174 @@
+import atexit
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from symptom_model import FEATURES, MODEL_PATH, model_version
+
+LOG_PATH = "prediction_log.csv"
+LOG_FIELDS = ["Timestamp", "Model Version"] + FEATURES + ["Predicted Risk"]
+
+_STOP = object()
+
+
+def rotated_name(path, when=None):
+    """prediction_log.csv -> prediction_log.20261018-153000.csv"""
+    root, ext = os.path.splitext(path)
+    stamp = (when or datetime.now()).strftime("%Y%m%d-%H%M%S")
+    candidate = f"{root}.{stamp}{ext}"
+    n = 1
+    while os.path.exists(candidate):
+        candidate = f"{root}.{stamp}-{n}{ext}"
+        n += 1
+    return candidate
+
+
+# ---------- Background Log Writer ----------
+class PredictionLogger:
+    """Appends prediction records to CSV from a background thread.
+
+    `log()` never touches the disk: it drops the record on a bounded queue and returns
+    at once (counting it in `dropped` if the queue is full). The writer thread batches
+    rows, flushes and fsyncs every `flush_interval` seconds, and rotates the file once it
+    passes `max_bytes` or is older than `rotate_seconds`. A file without the current
+    header (such as a log from before the schema had timestamps) is rotated aside on start.
+    Callables in `sinks` receive every written batch, e.g. PredictionStore.sink.
+    """
+
+    def __init__(self, path=LOG_PATH, model_path=MODEL_PATH, queue_size=10_000, batch_size=512,
+                 flush_interval=1.0, max_bytes=10 * 1024 * 1024, rotate_seconds=None, version=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.version = version or model_version(model_path)
+        self.dropped = 0
+        self.written = 0
+        self.sinks = []  # extra consumers of each written batch, run on the writer thread
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._file = None
+        self._writer = None
+        self._opened_at = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="prediction-logger", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def log(self, values, result, timestamp=None):
+        ts = timestamp or datetime.now().isoformat(timespec="milliseconds")
+        try:
+            self._queue.put_nowait([ts, self.version] + list(values) + [result])
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout=5.0):
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- Writer Thread ----------
+    def _run(self):
+        try:
+            self._open()
+        except Exception:
+            pass  # _write retries the open with the first batch and counts its rows as dropped
+        batch = []
+        next_flush = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            timeout = max(0.0, next_flush - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                    # Drain whatever else is already waiting without blocking
+                    while len(batch) < self.batch_size:
+                        item = self._queue.get_nowait()
+                        if item is _STOP:
+                            stopping = True
+                            break
+                        batch.append(item)
+            except queue.Empty:
+                pass
+
+            if batch and (len(batch) >= self.batch_size or stopping or time.monotonic() >= next_flush):
+                self._write(batch)
+                batch = []
+            if stopping or time.monotonic() >= next_flush:
+                self._sync()
+                next_flush = time.monotonic() + self.flush_interval
+        if self._file is not None:
+            self._file.close()
+
+    def _open(self):
+        needs_header = True
+        if os.path.isfile(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, newline="") as f:
+                first = next(csv.reader(f), [])
+            if first == LOG_FIELDS:
+                needs_header = False
+            else:
+                os.replace(self.path, rotated_name(self.path))
+        f = open(self.path, "a", newline="")
+        self._file, self._writer = f, csv.writer(f)
+        if needs_header:
+            self._writer.writerow(LOG_FIELDS)
+        self._opened_at = time.monotonic()
+
+    def _rotate_due(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.monotonic() - self._opened_at >= self.rotate_seconds
+
+    def _write(self, rows):
+        try:
+            with metrics.span("log.csv_write"):
+                if self._file is None:
+                    self._open()  # the last open failed; try again with every batch
+                elif self._rotate_due():
+                    self._sync()
+                    self._file.close()
+                    self._file = None
+                    os.replace(self.path, rotated_name(self.path))
+                    self._open()
+                self._writer.writerows(rows)
+            self.written += len(rows)
+            metrics.inc("log.rows", len(rows))
+        except Exception:  # a full disk, a bad path or an unwritable value must not kill the writer
+            self.dropped += len(rows)
+            metrics.inc("log.dropped", len(rows))
+        for sink in self.sinks:
+            try:
+                with metrics.span("log.sink"):
+                    sink(rows)
+            except Exception:
+                pass  # a failing sink must never stop the CSV log
+
+    def _sync(self):
+        if self._file is None:
+            return
+        try:
+            with metrics.span("log.fsync"):
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        except OSError:
+            pass
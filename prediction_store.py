@@ -0,0 +1,280 @@
+import argparse
+import csv
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from symptom_model import FEATURES, RISK_MAPPING
+
+STORE_PATH = "prediction_history.db"
+
+# "Coughing of Blood" -> "coughing_of_blood"
+FEATURE_COLUMNS = [f.lower().replace(" ", "_") for f in FEATURES]
+RISK_CODES = {label: code for code, label in RISK_MAPPING.items()}
+GROUPS = {"risk": "risk", "day": "date(ts, 'unixepoch', 'localtime')",
+          "hour": "strftime('%Y-%m-%d %H:00', ts, 'unixepoch', 'localtime')",
+          "model": "model_version"}
+GROUPS.update({c: c for c in FEATURE_COLUMNS})
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    ts REAL,
+    model_version TEXT,
+    {", ".join(f"{c} INTEGER NOT NULL" for c in FEATURE_COLUMNS)},
+    risk INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imported_files (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT,
+    n_rows INTEGER,
+    imported_at REAL
+);
+CREATE TABLE IF NOT EXISTS risk_counts (
+    risk INTEGER PRIMARY KEY,
+    n INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS predictions_count_insert AFTER INSERT ON predictions BEGIN
+    INSERT INTO risk_counts (risk, n) VALUES (NEW.risk, 1)
+        ON CONFLICT(risk) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS predictions_count_delete AFTER DELETE ON predictions BEGIN
+    UPDATE risk_counts SET n = n - 1 WHERE risk = OLD.risk;
+END;
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts);
+CREATE INDEX IF NOT EXISTS idx_predictions_risk_ts ON predictions (risk, ts);
+""" + "".join(
+    f"CREATE INDEX IF NOT EXISTS idx_predictions_{c} ON predictions ({c}, risk, ts);\n"
+    for c in FEATURE_COLUMNS
+)
+
+# A logged prediction is identified by its timestamp, model version and inputs, so the same
+# row arriving from the live logger and from an import is stored once. Rows without a
+# timestamp (very old logs) never collide: NULLs are distinct in a unique index.
+ROW_KEY = ["ts", "model_version"] + FEATURE_COLUMNS
+UNIQUE_INDEX = f"CREATE UNIQUE INDEX IF NOT EXISTS idx_predictions_row ON predictions ({', '.join(ROW_KEY)})"
+
+
+def parse_time(value):
+    """Accept epoch seconds, an ISO timestamp/date, or a relative span like '7d', '12h', '30m'."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    value = value.strip()
+    units = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+    if value[-1:] in units and value[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(value[:-1]) * units[value[-1]]
+    return datetime.fromisoformat(value).timestamp()
+
+
+# ---------- Store ----------
+class PredictionStore:
+    """SQLite (WAL mode) history of symptom predictions with per-feature indexes.
+
+    Each thread gets its own connection. `risk_counts` is kept up to date by triggers,
+    so `totals()` never scans the predictions table.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_predictions_row'").fetchone():
+            # Stores from before the unique key may hold rows imported twice; keep the first copy
+            with conn:
+                conn.execute(f"DELETE FROM predictions WHERE ts IS NOT NULL AND model_version IS NOT NULL "
+                             f"AND id NOT IN (SELECT MIN(id) FROM predictions GROUP BY {', '.join(ROW_KEY)})")
+                conn.execute(UNIQUE_INDEX)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache keeps index inserts in memory
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------- Writes ----------
+    def insert_many(self, records):
+        """Insert (ts, model_version, values, risk_label) tuples in one transaction.
+
+        Rows already in the store are skipped; returns how many were new.
+        """
+        sql = (f"INSERT OR IGNORE INTO predictions (ts, model_version, {', '.join(FEATURE_COLUMNS)}, risk) "
+               f"VALUES ({', '.join('?' * (len(FEATURE_COLUMNS) + 3))})")
+        rows = []
+        for ts, version, values, label in records:
+            rows.append((parse_time(ts), version, *values, RISK_CODES.get(label, -1)))
+        conn = self._conn()
+        with conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def sink(self, rows):
+        """PredictionLogger sink: rows are [timestamp, version, *features, label]."""
+        n = len(FEATURES)
+        self.insert_many((r[0], r[1], r[2:2 + n], r[2 + n]) for r in rows)
+
+    def import_csv(self, path, chunk_rows=50_000):
+        """Import a prediction log, with or without the timestamped header; returns the new rows.
+
+        Safe to repeat: a file whose contents were imported before is skipped (returns None),
+        and rows already stored, e.g. by the live logger's `sink`, are not added again.
+        """
+        digest = _file_digest(path)
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM imported_files WHERE sha256 = ?", (digest,)).fetchone():
+            return None
+        n = len(FEATURES)
+        total = 0
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            first = next(reader, None)
+            if first is None:
+                return 0
+            timestamped = first[:2] == ["Timestamp", "Model Version"]
+            if first[0] != "Timestamp" and first[0] not in FEATURES:
+                reader = _prepend(first, reader)  # headerless legacy log: first line is data
+
+            chunk = []
+            for row in reader:
+                if timestamped:
+                    chunk.append((row[0] or None, row[1] or None, [int(v) for v in row[2:2 + n]], row[2 + n]))
+                else:
+                    chunk.append((None, None, [int(v) for v in row[:n]], row[n]))
+                if len(chunk) >= chunk_rows:
+                    total += self.insert_many(chunk)
+                    chunk = []
+            if chunk:
+                total += self.insert_many(chunk)
+        with conn:
+            conn.execute("INSERT INTO imported_files (sha256, path, n_rows, imported_at) VALUES (?, ?, ?, ?)",
+                         (digest, os.path.abspath(path), total, time.time()))
+        return total
+
+    # ---------- Queries ----------
+    def totals(self):
+        """Counts per risk label, read from the trigger-maintained table."""
+        rows = self._conn().execute("SELECT risk, n FROM risk_counts ORDER BY risk").fetchall()
+        return {RISK_MAPPING.get(r, "Unknown"): n for r, n in rows if n}
+
+    def count(self, since=None, until=None, risk=None, group_by=None, **features):
+        """Count predictions matching the filters.
+
+        `risk` is a label ("High Risk") or code; feature filters use column names and take
+        a level or an inclusive (lo, hi) range, e.g. ``count(since="7d", risk="High Risk",
+        smoking=9)``. With `group_by` ("risk", "day", "hour", "model" or a feature column)
+        a {group: count} dict is returned instead of an int.
+        """
+        where, params = [], []
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(parse_time(since))
+        if until is not None:
+            where.append("ts < ?")
+            params.append(parse_time(until))
+        if risk is not None:
+            where.append("risk = ?")
+            params.append(RISK_CODES.get(risk, risk))
+        for col, level in features.items():
+            if col not in FEATURE_COLUMNS:
+                raise ValueError(f"Unknown feature column: {col}")
+            if isinstance(level, (tuple, list)):
+                where.append(f"{col} BETWEEN ? AND ?")
+                params.extend(level)
+            else:
+                where.append(f"{col} = ?")
+                params.append(level)
+
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        if group_by is None:
+            return self._conn().execute(f"SELECT COUNT(*) FROM predictions{clause}", params).fetchone()[0]
+        if group_by not in GROUPS:
+            raise ValueError(f"Cannot group by {group_by}; choose from {', '.join(GROUPS)}")
+        expr = GROUPS[group_by]
+        rows = self._conn().execute(
+            f"SELECT {expr} AS g, COUNT(*) FROM predictions{clause} GROUP BY g ORDER BY g", params
+        ).fetchall()
+        if group_by == "risk":
+            return {RISK_MAPPING.get(g, "Unknown"): n for g, n in rows}
+        return dict(rows)
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _prepend(first, reader):
+    yield first
+    yield from reader
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query and import the prediction history store.")
+    parser.add_argument("--db", default=STORE_PATH, help="path to the SQLite store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="import rotated prediction_log CSV files from before the store existed")
+    imp.add_argument("logs", nargs="+")
+
+    sub.add_parser("totals", help="counts per risk level (no table scan)")
+
+    cnt = sub.add_parser("count", help="count predictions matching filters")
+    cnt.add_argument("--since", help="'7d', '12h', an ISO date or epoch seconds")
+    cnt.add_argument("--until")
+    cnt.add_argument("--risk", choices=list(RISK_CODES))
+    cnt.add_argument("--where", action="append", default=[], metavar="FEATURE=LEVEL[-LEVEL]",
+                     help=f"feature filter, e.g. smoking=9 or air_pollution=5-9 ({', '.join(FEATURE_COLUMNS)})")
+    cnt.add_argument("--group-by", choices=list(GROUPS))
+    args = parser.parse_args(argv)
+
+    store = PredictionStore(args.db)
+    t0 = time.perf_counter()
+    if args.command == "import":
+        for path in args.logs:
+            n = store.import_csv(path)
+            if n is None:
+                print(f"Skipped {os.path.basename(path)}: already imported")
+            else:
+                print(f"Imported {n:,} new rows from {os.path.basename(path)}")
+    elif args.command == "totals":
+        for label, n in store.totals().items():
+            print(f"{label:12} {n:,}")
+    else:
+        filters = {}
+        for spec in args.where:
+            col, _, level = spec.partition("=")
+            lo, _, hi = level.partition("-")
+            filters[col.strip()] = (int(lo), int(hi)) if hi else int(lo)
+        try:
+            result = store.count(args.since, args.until, args.risk, args.group_by, **filters)
+        except ValueError as e:
+            print(f"Query Error: {e}", file=sys.stderr)
+            return 1
+        if isinstance(result, dict):
+            for g, n in result.items():
+                print(f"{g}\t{n:,}")
+        else:
+            print(f"{result:,}")
+    print(f"({(time.perf_counter() - t0) * 1e3:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
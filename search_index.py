@@ -0,0 +1,178 @@
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+from content import INFO_CARDS
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+TITLE_WEIGHT = 3.0  # a hit in a heading counts like three hits in the body
+PREFIX_WEIGHT = 0.7  # a term matched only by prefix ranks below an exact word match
+K1, B = 1.2, 0.75  # BM25 constants
+
+
+def tokenize(text):
+    """Yield (term, start, end) for every word in `text`, lower-cased."""
+    for m in TOKEN_RE.finditer(text):
+        yield m.group().lower(), m.start(), m.end()
+
+
+class Document:
+    __slots__ = ("doc_id", "source", "key", "title", "text", "length")
+
+    def __init__(self, doc_id, source, key, title, text):
+        self.doc_id = doc_id
+        self.source = source  # e.g. "dashboard" or "symptom"
+        self.key = key  # where the UI should jump: section index, card index, ...
+        self.title = title
+        self.text = text
+        self.length = 0
+
+
+class SearchResult:
+    __slots__ = ("doc", "score", "title_spans", "text_spans")
+
+    def __init__(self, doc, score, title_spans, text_spans):
+        self.doc = doc
+        self.score = score
+        self.title_spans = title_spans  # [(start, end)] character spans to highlight
+        self.text_spans = text_spans
+
+
+# ---------- Inverted Index ----------
+class SearchIndex:
+    """Inverted index with prefix lookup and BM25 ranking over short educational texts.
+
+    `postings` maps term -> {doc_id: weighted term frequency} (title hits count
+    TITLE_WEIGHT times) and `positions` keeps the character spans used for highlighting.
+    The vocabulary is kept sorted, so every term starting with a prefix is one bisect
+    away; the last word typed is always treated as a prefix, and all the terms it expands
+    to are scored together as one term. Queries that extend the previous one only
+    re-score the previous result set.
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.postings = defaultdict(dict)
+        self.positions = defaultdict(dict)
+        self.vocab = []
+        self._norm = []
+        self._last_query = None
+        self._last_ids = None
+
+    def add(self, source, key, title, text):
+        self.add_many([(source, key, title, text)])
+        return self.docs[-1]
+
+    def add_many(self, entries):
+        for source, key, title, text in entries:
+            doc = Document(len(self.docs), source, key, title, text)
+            for field, body in (("title", title), ("text", text)):
+                weight = TITLE_WEIGHT if field == "title" else 1.0
+                for term, start, end in tokenize(body):
+                    tf = self.postings[term]
+                    tf[doc.doc_id] = tf.get(doc.doc_id, 0.0) + weight
+                    self.positions[term].setdefault(doc.doc_id, []).append((field, start, end))
+                    doc.length += 1
+            self.docs.append(doc)
+        self._refresh()
+
+    def _refresh(self):
+        self.vocab = sorted(self.postings)
+        avg_len = sum(d.length for d in self.docs) / len(self.docs) if self.docs else 1.0
+        self._norm = [K1 * (1 - B + B * d.length / avg_len) for d in self.docs]
+        self._last_query = self._last_ids = None
+
+    def expand(self, prefix):
+        """All indexed terms that start with `prefix`."""
+        i = bisect_left(self.vocab, prefix)
+        out = []
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            out.append(self.vocab[i])
+            i += 1
+        return out
+
+    def search(self, query, limit=None):
+        """Ranked SearchResults for `query`; every query word must match (AND)."""
+        words = [t for t, _, _ in tokenize(query)]
+        if not words:
+            return []
+
+        # Incremental: typing more characters can only narrow an AND query
+        candidates = None
+        normalized = " ".join(words)
+        if self._last_query and normalized.startswith(self._last_query):
+            candidates = self._last_ids
+
+        n_docs = len(self.docs)
+        scores = defaultdict(float)
+        word_terms = []
+        matched = candidates
+        for i, word in enumerate(words):
+            is_last = i == len(words) - 1
+            terms = [word] if not is_last and word in self.postings else self.expand(word)
+            word_terms.append(terms)
+            tf = defaultdict(float)
+            for term in terms:
+                weight = 1.0 if term == word else PREFIX_WEIGHT
+                for doc_id, freq in self.postings[term].items():
+                    if matched is None or doc_id in matched:
+                        tf[doc_id] += weight * freq
+            matched = set(tf) if matched is None else matched & set(tf)
+            if not matched:
+                break
+            # Document frequency over the whole index, so narrowing never changes scores
+            df = len(self.postings[terms[0]]) if len(terms) == 1 else len(set().union(*(self.postings[t] for t in terms)))
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id in matched:
+                f = tf[doc_id]
+                scores[doc_id] += idf * f * (K1 + 1) / (f + self._norm[doc_id])
+
+        matched = matched or set()
+        self._last_query, self._last_ids = normalized, matched
+        ranked = sorted(matched, key=lambda d: (-scores[d], d))
+        if limit is not None:
+            ranked = ranked[:limit]
+
+        # Highlight spans are only gathered for the results actually returned
+        results = []
+        for doc_id in ranked:
+            hits = [h for terms in word_terms for t in terms for h in self.positions[t].get(doc_id, ())]
+            results.append(SearchResult(
+                self.docs[doc_id], scores[doc_id],
+                sorted({(s, e) for f, s, e in hits if f == "title"}),
+                sorted({(s, e) for f, s, e in hits if f == "text"}),
+            ))
+        return results
+
+
+def snippet(text, spans, width=140):
+    """Cut `text` around the first highlighted span; returns (snippet, shifted spans)."""
+    if len(text) <= width:
+        return text, spans
+    first = spans[0][0] if spans else 0
+    start = max(0, min(first - width // 3, len(text) - width))
+    end = start + width
+    prefix = "…" if start else ""
+    suffix = "…" if end < len(text) else ""
+    shift = len(prefix) - start
+    kept = [(s + shift, e + shift) for s, e in spans if s >= start and e <= end]
+    return prefix + text[start:end] + suffix, kept
+
+
+# ---------- App Corpus ----------
+_index = None
+
+
+def app_index(sections=None):
+    """Index over the dashboard sections and the symptom info cards, built on first use."""
+    global _index
+    if _index is None:
+        if sections is None:
+            from app import CONTENT_SECTIONS as sections
+
+        index = SearchIndex()
+        index.add_many([("dashboard", i, title, text) for i, (title, text) in enumerate(sections)])
+        index.add_many([("symptom", i, card["title"], card["text"]) for i, card in enumerate(INFO_CARDS)])
+        _index = index
+    return _index
@@ -0,0 +1,90 @@
+import sys
+import time
+
+import metrics
+from startup_timer import StartupTimer
+
+
+def default_screens():
+    # Imported on first use so the dashboard can paint before the screen modules load
+    def dashboard(parent, shell):
+        from app import Dashboard
+        return Dashboard(parent, shell)
+
+    def symptom(parent, shell):
+        from Symptom_predictor_ui import SymptomPredictorApp
+        return SymptomPredictorApp(parent, shell)
+
+    def mri(parent, shell):
+        from Xray_predictor_ui import MRIClassifierApp
+        return MRIClassifierApp(parent, shell)
+
+    return {"dashboard": dashboard, "symptom": symptom, "mri": mri}
+
+
+# ---------- Single-Process Shell ----------
+class Shell:
+    """Hosts the dashboard and both predictor screens as frames inside one Tk root.
+
+    Each screen is built the first time it is shown and then kept, so switching back is
+    just a pack/unpack. Models come from the process-wide `model_registry`, so nothing is
+    loaded twice. Switch times are printed and saved to startup_times.csv under the
+    "navigation" screen, next to the per-screen startup milestones.
+    """
+
+    def __init__(self, root, screens=None, timer=None):
+        self.root = root
+        self.factories = default_screens()
+        self.factories.update(screens or {})
+        self.screens = {}
+        self.current = None
+        self.timer = timer or StartupTimer("navigation")
+
+    def show(self, name):
+        t0 = time.perf_counter()
+        first_visit = name not in self.screens
+        if self.current is not None:
+            self.current.frame.pack_forget()
+        if first_visit:
+            self.screens[name] = self.factories[name](self.root, self)
+        screen = self.screens[name]
+        screen.on_show()
+        screen.frame.pack(fill="both", expand=True)
+        self.root.update_idletasks()
+
+        elapsed = time.perf_counter() - t0
+        label = f"{self.current_name or 'start'}->{name}" + (" (build)" if first_visit else "")
+        self.timer.marks.setdefault(label, elapsed)
+        metrics.observe(f"nav.{name}.build" if first_visit else f"nav.{name}", elapsed)
+        print(f"[nav] {label}: {elapsed * 1e3:.1f} ms", file=sys.stderr)
+        self.current = screen
+        return screen
+
+    @property
+    def current_name(self):
+        for name, screen in self.screens.items():
+            if screen is self.current:
+                return name
+        return None
+
+    def save_timings(self):
+        self.timer.save()
+        for screen in self.screens.values():
+            timer = getattr(screen, "timer", None)
+            if timer is not None:
+                timer.save()
+
+
+def run(start="dashboard", screens=None, timer=None):
+    """Entry point used by app.py and the standalone screen scripts."""
+    import tkinter as tk
+
+    root = tk.Tk()
+    shell = Shell(root, screens, timer)
+    if metrics.metrics.enabled:
+        metrics.metrics.configure_from_env()
+        shell.overlay = metrics.MetricsOverlay(root)  # F2 shows per-stage latencies
+    shell.show(start)
+    shell.timer.mark_first_paint(root)
+    root.mainloop()
+    shell.save_timings()
@@ -0,0 +1,56 @@
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+STARTUP_LOG = "startup_times.csv"
+# Milestone at which to end the process, e.g. "first_paint" (set by benchmarks.py for cold starts)
+EXIT_AFTER = os.environ.get("RESPIREX_EXIT_AFTER")
+
+
+class StartupTimer:
+    """Records named milestones (seconds since the timer was created) for one screen launch.
+
+    Create it as early as possible in the entry script, before heavy imports, then call
+    `mark()` at first paint, model ready, first prediction and so on. Each milestone is
+    kept only the first time it is reached. `save()` appends one row per launch to
+    startup_times.csv so the numbers can be tracked over time.
+    """
+
+    def __init__(self, screen, log_path=STARTUP_LOG, start=None):
+        self.screen = screen
+        self.log_path = log_path
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.start
+            print(f"[startup] {self.screen} {name}: {self.marks[name]:.3f}s", file=sys.stderr)
+            if name == EXIT_AFTER:
+                sys.stderr.flush()
+                os._exit(0)
+        return self.marks[name]
+
+    def mark_first_paint(self, root):
+        """Mark 'first_paint' once Tk has drawn the window and entered its event loop."""
+        def painted():
+            root.update_idletasks()
+            self.mark("first_paint")
+        root.after(0, painted)
+
+    def save(self):
+        if not self.marks:
+            return
+        exists = os.path.isfile(self.log_path)
+        try:
+            with open(self.log_path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if not exists:
+                    writer.writerow(["Timestamp", "Screen", "Milestone", "Seconds"])
+                stamp = datetime.now().isoformat(timespec="seconds")
+                for name, secs in self.marks.items():
+                    writer.writerow([stamp, self.screen, name, f"{secs:.4f}"])
+        except OSError:
+            pass
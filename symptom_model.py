@@ -0,0 +1,154 @@
+import numpy as np
+
+from compiled_forest import CompiledForest
+from model_artifact import ModelArtifact
+
+# ---------- Model Constants ----------
+MODEL_PATH = "model.pkl"
+
+FEATURES = [
+    "Coughing of Blood", "Chest Pain", "Weight Loss", "Shortness of Breath",
+    "Smoking", "Genetic Risk", "Wheezing", "Fatigue", "Air Pollution", "Passive Smoker"
+]
+
+RISK_MAPPING = {0: "Low Risk", 1: "Medium Risk", 2: "High Risk"}
+RISK_COLORS = {"Low Risk": "#00ff88", "Medium Risk": "#ffe266", "High Risk": "#ff4c4c"}
+
+MIN_LEVEL, MAX_LEVEL = 0, 9
+ENGINES = ("auto", "compiled", "sklearn")
+SKLEARN_MIN_ROWS = 8192  # "auto" hands batches this large to sklearn, whose tree walk is faster there
+
+
+def model_version(path=MODEL_PATH):
+    """Short content hash of the model at `path`, recorded with every logged prediction.
+
+    Same value as `SymptomPredictor.version` for a model loaded from that file; an
+    artifact records its hash, so nothing is re-read to compute it.
+    """
+    try:
+        return load_artifact(path).version
+    except Exception:  # missing, truncated or not a model file
+        return "unknown"
+
+
+def load_artifact(path=MODEL_PATH, verify=False):
+    """Load model.pkl (a ModelArtifact, or a legacy (scaler, model) pickle) and check its feature order."""
+    artifact = ModelArtifact.load(path, verify=verify, features=FEATURES)
+    if artifact.features != FEATURES:
+        raise ValueError(f"{path} was trained on features {artifact.features}, expected {FEATURES}")
+    return artifact
+
+
+def load_model(path=MODEL_PATH):
+    """Return the fitted (scaler, sklearn model) pair from model.pkl."""
+    artifact = load_artifact(path)
+    return artifact.scaler, artifact.sklearn_model
+
+
+# ---------- Input Validation ----------
+def validate_values(values, features=FEATURES):
+    """Turn one patient's raw entries into ten ints in 0–9, or raise ValueError."""
+    clean = []
+    for feature, val in zip(features, values):
+        try:
+            num = int(str(val).strip())
+            if not (MIN_LEVEL <= num <= MAX_LEVEL):
+                raise ValueError
+            clean.append(num)
+        except ValueError:
+            raise ValueError(f"Invalid input for {feature}. Enter a whole number between 0–9.")
+    if len(clean) != len(features):
+        raise ValueError(f"Expected {len(features)} values, got {len(values)}.")
+    return clean
+
+
+def invalid_rows(X):
+    """Boolean mask of rows in a 2-D array that fail the 0–9 whole-number check."""
+    X = np.asarray(X, dtype=float)
+    bad = ~np.isfinite(X) | (X != np.floor(X)) | (X < MIN_LEVEL) | (X > MAX_LEVEL)
+    return bad.any(axis=1)
+
+
+# ---------- Predictor ----------
+class SymptomPredictor:
+    """Holds the scaler and forest once and scores single rows or whole arrays.
+
+    With engine="compiled" rows go through a CompiledForest that has the scaler folded
+    into its split points; engine="sklearn" keeps the original path. engine="auto" (the
+    default) uses the compiled forest for single rows and small batches, where it is far
+    faster, and sklearn for batches of SKLEARN_MIN_ROWS or more, where sklearn is
+    (measured by `python compiled_forest.py`).
+    Built from a ModelArtifact, the sklearn scaler and forest are only unpickled (and
+    sklearn imported) if the sklearn engine actually needs them.
+    """
+
+    def __init__(self, scaler, model, engine="auto", forest=None, artifact=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        self._scaler = scaler
+        self._model = model
+        self.engine = engine
+        self.artifact = artifact
+        if engine != "sklearn":
+            self.forest = forest if forest is not None else CompiledForest.compile(self.scaler, self.model)
+        else:
+            self.forest = None
+        self.class_codes = np.asarray(self.forest.classes if self.forest is not None else self.model.classes_)
+        self.classes = [RISK_MAPPING.get(int(c), "Unknown") for c in self.class_codes]
+        self._attributions = None
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            self._scaler = self.artifact.scaler
+        return self._scaler
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.artifact.sklearn_model
+        return self._model
+
+    @property
+    def version(self):
+        """Short content hash of the loaded model, as logged with its predictions."""
+        return self.artifact.version if self.artifact is not None else "unknown"
+
+    @property
+    def attributions(self):
+        """Per-feature attributions (ForestAttributions), precomputed on first use."""
+        if self._attributions is None:
+            from attributions import ForestAttributions
+
+            forest = self.forest if self.forest is not None else CompiledForest.compile(self.scaler, self.model)
+            features = self.artifact.features if self.artifact is not None else FEATURES
+            self._attributions = ForestAttributions(forest, features)
+        return self._attributions
+
+    @classmethod
+    def from_artifact(cls, artifact, engine="auto"):
+        return cls(None, None, engine, artifact.forest, artifact)
+
+    @classmethod
+    def from_file(cls, path=MODEL_PATH, engine="auto"):
+        return cls.from_artifact(load_artifact(path), engine)
+
+    def predict_proba(self, X):
+        if self.forest is not None and (self.engine == "compiled" or len(X) < SKLEARN_MIN_ROWS):
+            return self.forest.predict_proba(X)
+        X = np.asarray(X, dtype=np.float64)
+        return self.model.predict_proba(self.scaler.transform(X))
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        return self.class_codes[np.argmax(proba, axis=1)]
+
+    def predict_one(self, values):
+        """Return the risk label for one already-validated row of ten ints."""
+        pred = self.predict([values])[0]
+        return RISK_MAPPING.get(int(pred), "Unknown")
+
+    def explain_one(self, values, top=3):
+        """Return (risk label, [(symptom, contribution), ...]): the symptoms that raised that risk most."""
+        k, _, factors = self.attributions.explain_one(values, top)
+        return self.classes[k], factors
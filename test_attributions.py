@@ -0,0 +1,28 @@
+import numpy as np
+
+from attributions import ForestAttributions, check_additivity, format_factors, top_contributors
+from compiled_forest import CompiledForest
+
+
+def test_contributions_add_up_to_probabilities(fitted_forest):
+    attr = ForestAttributions(CompiledForest.compile(*fitted_forest))
+    assert check_additivity(attr, n_rows=2_000) < 1e-5
+
+
+def test_explain_one_agrees_with_the_batch_path(fitted_forest):
+    forest = CompiledForest.compile(*fitted_forest)
+    attr = ForestAttributions(forest, features=[f"f{i}" for i in range(10)])
+    row = np.array([9, 2, 3, 1, 8, 0, 4, 5, 6, 9])
+    k, proba, factors = attr.explain_one(row, top=3)
+
+    np.testing.assert_allclose(proba, forest.predict_proba(row)[0])
+    assert k == int(np.argmax(proba))
+    names, values = top_contributors(attr.contributions(row), k, attr.features, top=3)
+    expected = [(n, float(v)) for n, v in zip(names[0], values[0]) if v > 0]
+    assert [n for n, _ in factors] == [n for n, _ in expected]
+    np.testing.assert_allclose([v for _, v in factors], [v for _, v in expected], atol=1e-6)
+    assert all(v > 0 for _, v in factors)
+
+
+def test_format_factors():
+    assert format_factors([("Smoking", 0.214), ("Fatigue", 0.001)]) == "Smoking +21%"
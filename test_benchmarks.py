@@ -0,0 +1,31 @@
+from benchmarks import compare, gated, higher_is_better
+
+
+def doc(**results):
+    return {"results": results}
+
+
+def regressions(rows):
+    return {(r["benchmark"], r["metric"]) for r in rows if r["regression"]}
+
+
+def test_slower_latency_is_a_regression():
+    base = doc(symptom_single={"p50_us": 100.0, "mean_us": 100.0})
+    current = doc(symptom_single={"p50_us": 115.0, "mean_us": 105.0})
+    assert regressions(compare(base, current)) == {("symptom_single", "p50_us")}
+    assert regressions(compare(base, current, threshold=0.2)) == set()
+
+
+def test_lower_throughput_is_a_regression():
+    assert higher_is_better("rows_per_s")
+    base = doc(log_write={"rows_per_s": 1000.0})
+    assert regressions(compare(base, doc(log_write={"rows_per_s": 850.0}))) == {("log_write", "rows_per_s")}
+    assert regressions(compare(base, doc(log_write={"rows_per_s": 2000.0}))) == set()
+
+
+def test_tail_latency_and_missing_metrics_are_not_gated():
+    assert not gated("p99_ms") and not gated("worst_ms") and not gated("rows")
+    base = doc(mri_inference={"p99_ms": 10.0, "rows": 5})
+    current = doc(mri_inference={"p99_ms": 50.0, "rows": 9, "p50_ms": 1.0}, new_bench={"p50_ms": 1.0})
+    rows = compare(base, current)
+    assert [(r["metric"], r["regression"]) for r in rows] == [("p99_ms", False)]
@@ -0,0 +1,39 @@
+import numpy as np
+
+from compiled_forest import CompiledForest, check_parity
+
+
+def test_matches_sklearn(fitted_forest):
+    scaler, model = fitted_forest
+    forest = CompiledForest.compile(scaler, model)
+    agreement, max_diff = check_parity(forest, scaler, model, n_rows=5_000)
+    assert agreement == 1.0
+    assert max_diff < 1e-9
+
+
+def test_every_level_combination_on_one_feature(fitted_forest):
+    # Cut points sit between integer levels, so every level 0–9 must land on the same side as sklearn
+    scaler, model = fitted_forest
+    forest = CompiledForest.compile(scaler, model)
+    X = np.tile(np.arange(10)[:, None], (1, 10))
+    ref = model.predict(scaler.transform(X.astype(np.float64)))
+    assert (forest.predict(X) == ref).all()
+
+
+def test_save_and_load_round_trip(fitted_forest, tmp_path):
+    forest = CompiledForest.compile(*fitted_forest)
+    path = tmp_path / "forest.npz"
+    forest.save(path)
+    loaded = CompiledForest.load(path)
+    X = np.random.default_rng(1).integers(0, 10, size=(200, 10))
+    np.testing.assert_array_equal(loaded.predict_proba(X), forest.predict_proba(X))
+
+
+def test_auto_engine_agrees_on_both_sides_of_the_crossover(fitted_forest):
+    from symptom_model import SKLEARN_MIN_ROWS, SymptomPredictor
+
+    auto = SymptomPredictor(*fitted_forest)
+    reference = SymptomPredictor(*fitted_forest, engine="sklearn")
+    X = np.random.default_rng(2).integers(0, 10, size=(SKLEARN_MIN_ROWS + 1, 10))
+    for rows in (X[:10], X):
+        np.testing.assert_allclose(auto.predict_proba(rows), reference.predict_proba(rows), atol=1e-9)
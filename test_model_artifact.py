@@ -0,0 +1,29 @@
+import joblib
+import numpy as np
+
+from compiled_forest import check_parity
+from model_artifact import ModelArtifact
+from symptom_model import FEATURES
+
+
+def test_legacy_pickle_and_converted_artifact_share_a_version(fitted_forest, tmp_path):
+    legacy = tmp_path / "legacy.pkl"
+    joblib.dump(fitted_forest, legacy)
+    from_pickle = ModelArtifact.load(str(legacy), features=FEATURES)
+    from_pickle.save(str(tmp_path / "model.pkl"))
+    converted = ModelArtifact.load(str(tmp_path / "model.pkl"), verify=True)
+    assert converted.version == from_pickle.version
+
+
+def test_forest_from_an_older_compiler_is_recompiled(fitted_forest, tmp_path, capsys):
+    path = str(tmp_path / "model.pkl")
+    ModelArtifact.build(*fitted_forest, FEATURES).save(path)
+    payload = joblib.load(path)
+    del payload["compiler_version"]
+    payload["forest"]["cut"] = np.where(payload["forest"]["cut"] > 0, payload["forest"]["cut"] - 1, 0)
+    joblib.dump(payload, path, compress=0)
+
+    artifact = ModelArtifact.load(path)
+    assert "compiled by an older version" in capsys.readouterr().err
+    assert check_parity(artifact.forest, *fitted_forest, n_rows=2_000)[0] == 1.0
+    assert artifact.version == ModelArtifact.build(*fitted_forest, FEATURES).version
@@ -0,0 +1,45 @@
+import threading
+
+import numpy as np
+import pytest
+
+from mri_batcher import MicroBatcher
+
+
+def identity_model(batch):
+    """One output row per image, holding the value the image was filled with."""
+    return batch[:, 0, 0, :1].copy()
+
+
+def test_each_caller_gets_its_own_row():
+    gate = threading.Event()
+
+    def slow_model(batch):
+        gate.wait(1.0)  # hold the first batch so the rest queue up and coalesce
+        return identity_model(batch)
+
+    batcher = MicroBatcher(slow_model, max_batch_size=8, max_wait=0.05)
+    try:
+        futures = [batcher.submit(np.full((4, 4, 3), i, dtype=np.float32)) for i in range(40)]
+        gate.set()
+        assert [float(f.result(5)[0]) for f in futures] == list(range(40))
+        stats = batcher.stats()
+        assert stats["images"] == 40
+        assert stats["batches"] < 40  # requests were actually batched
+        assert max(int(k) for k in stats["batch_size_histogram"]) <= 8
+    finally:
+        batcher.close()
+
+
+def test_model_errors_reach_every_caller_in_the_batch():
+    def broken(batch):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(broken, max_batch_size=4, max_wait=0.05)
+    try:
+        futures = [batcher.submit(np.zeros((4, 4, 3))) for _ in range(3)]
+        for f in futures:
+            with pytest.raises(RuntimeError):
+                f.result(5)
+    finally:
+        batcher.close()
@@ -1,15 +1,22 @@
-import pickle
 import numpy as np
 
-# Load model
-with open("model.pkl", "rb") as f:
-    model = pickle.load(f)
+from symptom_model import MODEL_PATH, SymptomPredictor, load_artifact
+
+# Load model (model.pkl holds the scaler and the forest together; never call .predict on the raw pickle)
+artifact = load_artifact(MODEL_PATH, verify=True)
+predictor = SymptomPredictor.from_artifact(artifact)
+print("Model:", artifact.hash[:12], artifact.metadata)
 
 # Test inputs
 all_nines = np.array([[9]*10])
 all_zeros = np.array([[0]*10])
 medium_case = np.array([[4, 5, 3, 6, 3, 2, 5, 5, 4, 3]])
 
-print("All 9s prediction:", model.predict(all_nines))
-print("All 0s prediction:", model.predict(all_zeros))
-print("Medium case prediction:", model.predict(medium_case))
+print("All 9s prediction:", predictor.predict_one(all_nines[0]))
+print("All 0s prediction:", predictor.predict_one(all_zeros[0]))
+print("Medium case prediction:", predictor.predict_one(medium_case[0]))
+
+# Compiled engine and the original sklearn path must agree
+sklearn_predictor = SymptomPredictor.from_artifact(artifact, engine="sklearn")
+for case in (all_nines, all_zeros, medium_case):
+    assert predictor.predict(case)[0] == sklearn_predictor.predict(case)[0]
@@ -0,0 +1,60 @@
+from model_reload import HotModel
+from prediction_cache import CachedPredictor, PredictionCache, pack_key, unpack_key
+
+
+class LabelModel:
+    """Stands in for a SymptomPredictor: predicts its file's contents for every row."""
+
+    def __init__(self, label):
+        self.label = label
+        self.calls = 0
+
+    def predict_one(self, values):
+        self.calls += 1
+        return self.label
+
+
+def test_pack_key_round_trip():
+    values = [0, 9, 3, 4, 0, 0, 7, 1, 2, 9]
+    assert unpack_key(pack_key(values)) == values
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(maxsize=2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"  # 1 is now the most recent
+    cache.put(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a" and cache.get(3) == "c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_put_from_an_older_generation_is_dropped():
+    cache = PredictionCache()
+    generation = cache.generation
+    cache.clear()  # a model swap happened while the prediction was running
+    cache.put(1, "stale", generation)
+    assert cache.get(1) is None
+    cache.put(1, "fresh", cache.generation)
+    assert cache.get(1) == "fresh"
+
+
+def test_swap_and_rollback_invalidate_cached_predictions(tmp_path):
+    path = tmp_path / "model.txt"
+    path.write_text("v1")
+    model = HotModel("test", str(path), lambda p: LabelModel(open(p).read()))
+    cached = CachedPredictor(model)
+    row = [1] * 10
+
+    assert cached.predict_one(row) == "v1"
+    assert cached.predict_one(row) == "v1"
+    assert model.current.calls == 1
+
+    path.write_text("v2")
+    assert model.reload()
+    assert cached.predict_one(row) == "v2"
+
+    model.rollback()
+    assert cached.predict_one(row) == "v1"
+    assert cached.cache.stats()["invalidations"] == 2
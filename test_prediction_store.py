@@ -0,0 +1,74 @@
+import pytest
+
+from prediction_store import PredictionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = PredictionStore(str(tmp_path / "history.db"))
+    yield s
+    s.close()
+
+
+def record(ts, risk, smoking=0):
+    values = [0] * 10
+    values[4] = smoking  # "Smoking" column
+    return ts, "abc123", values, risk
+
+
+def test_triggers_keep_totals_in_step(store):
+    store.insert_many([record(1000.0, "High Risk"), record(1001.0, "High Risk"), record(1002.0, "Low Risk")])
+    assert store.totals() == {"Low Risk": 1, "High Risk": 2}
+
+    conn = store._conn()
+    with conn:
+        conn.execute("DELETE FROM predictions WHERE risk = 2")
+    assert store.totals() == {"Low Risk": 1}
+
+
+def test_count_filters(store):
+    store.insert_many([
+        record(1000.0, "High Risk", smoking=9),
+        record(2000.0, "High Risk", smoking=3),
+        record(3000.0, "Medium Risk", smoking=9),
+    ])
+    assert store.count() == 3
+    assert store.count(risk="High Risk") == 2
+    assert store.count(smoking=9) == 2
+    assert store.count(smoking=(3, 8)) == 1
+    assert store.count(since=1500.0, until=3000.0) == 1
+    assert store.count(group_by="risk") == {"Medium Risk": 1, "High Risk": 2}
+    with pytest.raises(ValueError):
+        store.count(not_a_column=1)
+
+
+def test_sink_takes_logger_rows(store):
+    store.sink([["2026-10-18T12:00:00.000", "abc123"] + [5] * 10 + ["Medium Risk"]])
+    assert store.count(risk="Medium Risk", fatigue=5) == 1
+
+
+def test_imports_are_idempotent(store, tmp_path):
+    log = tmp_path / "prediction_log.20261018-120000.csv"
+    header = "Timestamp,Model Version," + ",".join(["x"] * 10) + ",Predicted Risk\n"
+    log.write_text(header + "2026-10-18T12:00:00.000,abc123," + ",".join(["1"] * 10) + ",Low Risk\n"
+                   + "2026-10-18T12:00:01.000,abc123," + ",".join(["2"] * 10) + ",High Risk\n")
+    # The live logger already stored the first row
+    store.sink([["2026-10-18T12:00:00.000", "abc123"] + [1] * 10 + ["Low Risk"]])
+
+    assert store.import_csv(str(log)) == 1
+    assert store.import_csv(str(log)) is None
+    assert store.totals() == {"Low Risk": 1, "High Risk": 1}
+
+
+def test_duplicates_in_an_old_store_are_removed(tmp_path):
+    path = str(tmp_path / "history.db")
+    s = PredictionStore(path)
+    conn = s._conn()
+    with conn:
+        conn.execute("DROP INDEX idx_predictions_row")
+    s.insert_many([record(1000.0, "High Risk")] * 2 + [record(None, "Low Risk")] * 2)
+    s.close()
+
+    s = PredictionStore(path)
+    assert s.totals() == {"Low Risk": 2, "High Risk": 1}  # rows without a timestamp are never merged
+    s.close()
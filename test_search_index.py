@@ -0,0 +1,59 @@
+from search_index import SearchIndex, snippet
+
+
+def make_index():
+    index = SearchIndex()
+    index.add_many([
+        ("dashboard", 0, "Smoking and lung health", "Tobacco smoke damages the airways."),
+        ("dashboard", 1, "Air pollution", "Long exposure to polluted air and second-hand smoking raise risk."),
+        ("symptom", 0, "Fatigue", "Feeling tired for weeks can be a symptom; smokers report it more often."),
+        ("symptom", 1, "Chest pain", "Pain in the chest that gets worse with coughing."),
+    ])
+    return index
+
+
+def keys(results):
+    return [(r.doc.source, r.doc.key) for r in results]
+
+
+def test_title_hit_outranks_body_hit():
+    assert keys(make_index().search("smoking")) == [("dashboard", 0), ("dashboard", 1)]
+
+
+def test_last_word_is_a_prefix_and_exact_words_rank_first():
+    index = make_index()
+    assert index.expand("smok") == ["smoke", "smokers", "smoking"]
+    results = index.search("smok")
+    assert set(keys(results)) == {("dashboard", 0), ("dashboard", 1), ("symptom", 0)}
+
+    same_length = SearchIndex()
+    same_length.add_many([("symptom", 0, "Note", "heavy smokers"), ("symptom", 1, "Note", "heavy smoke")])
+    assert keys(same_length.search("smoke")) == [("symptom", 1), ("symptom", 0)]
+
+
+def test_all_words_must_match():
+    index = make_index()
+    assert keys(index.search("chest coughing")) == [("symptom", 1)]
+    assert index.search("chest pollution") == []
+
+
+def test_incremental_queries_match_a_fresh_search():
+    typed = make_index()
+    for partial in ("a", "ai", "air", "air p", "air po", "air pollution"):
+        incremental = typed.search(partial)
+    fresh = make_index().search("air pollution")
+    assert keys(incremental) == keys(fresh)
+    assert [r.score for r in incremental] == [r.score for r in fresh]
+
+
+def test_highlight_spans_cover_the_matched_words():
+    result = make_index().search("chest")[0]
+    assert [result.doc.title[s:e] for s, e in result.title_spans] == ["Chest"]
+    assert [result.doc.text[s:e] for s, e in result.text_spans] == ["chest"]
+
+
+def test_snippet_keeps_the_highlight():
+    text = "x" * 300 + " target " + "y" * 300
+    start = text.index("target")
+    cut, spans = snippet(text, [(start, start + 6)])
+    assert [cut[s:e] for s, e in spans] == ["target"]
@@ -0,0 +1,231 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import multiprocessing as mp
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from model_artifact import ModelArtifact
+from symptom_model import FEATURES, MAX_LEVEL, MIN_LEVEL, MODEL_PATH, SymptomPredictor
+
+DATASET_CACHE_DIR = ".respirex_cache/datasets"
+LEVELS = {"Low": 0, "Medium": 1, "High": 2}
+RESULT_FIELDS = ["rank", "n_estimators", "max_depth", "min_samples_leaf", "max_features",
+                 "cv_accuracy", "cv_std", "fit_seconds", "model_kb", "latency_us", "sklearn_latency_us"]
+
+
+# ---------- Dataset ----------
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_dataset(csv_path, cache_dir=DATASET_CACHE_DIR):
+    """Parsed and encoded (X int8, y int8) for the patient CSV, cached by content hash.
+
+    Rows with a missing or out-of-range symptom level or an unknown Level are dropped,
+    since the app only ever scores whole numbers 0–9. Returns (X, y, from_cache).
+    """
+    cache_path = os.path.join(cache_dir, f"symptoms-{file_sha256(csv_path)[:16]}.npz")
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as data:
+            return data["X"], data["y"], True
+
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, usecols=FEATURES + ["Level"])
+    X = df[FEATURES].apply(pd.to_numeric, errors="coerce")
+    y = df["Level"].map(LEVELS)
+    keep = X.notna().all(axis=1) & X.ge(MIN_LEVEL).all(axis=1) & X.le(MAX_LEVEL).all(axis=1) & y.notna()
+    X = X[keep].to_numpy(dtype=np.int8)
+    y = y[keep].to_numpy(dtype=np.int8)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = cache_path + ".tmp.npz"
+    np.savez(tmp, X=X, y=y)
+    os.replace(tmp, cache_path)
+    return X, y, False
+
+
+# ---------- Candidates ----------
+def candidate_grid(n_estimators, max_depth, min_samples_leaf, max_features):
+    return [dict(n_estimators=n, max_depth=d, min_samples_leaf=l, max_features=f)
+            for n, d, l, f in itertools.product(n_estimators, max_depth, min_samples_leaf, max_features)]
+
+
+def _fit(params, X, y, seed):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler().fit(X.astype(np.float64))
+    model = RandomForestClassifier(**params, random_state=seed, n_jobs=1)
+    model.fit(scaler.transform(X.astype(np.float64)), y)
+    return scaler, model
+
+
+def _median_us(fn, repeats):
+    fn()
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples)) * 1e6
+
+
+def evaluate_candidate(params, X, y, folds=5, seed=42, latency_repeats=200):
+    """Runs in a worker process: k-fold accuracy plus the costs of the model the app would load.
+
+    Each worker uses one core (n_jobs=1) and fixed seeds, so results do not depend on
+    how many workers run alongside it. Latency is one row through the same compiled
+    engine the app uses (and through sklearn for reference).
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    scores, fit_times = [], []
+    for train, test in StratifiedKFold(folds, shuffle=True, random_state=seed).split(X, y):
+        t0 = time.perf_counter()
+        scaler, model = _fit(params, X[train], y[train], seed)
+        fit_times.append(time.perf_counter() - t0)
+        pred = model.predict(scaler.transform(X[test].astype(np.float64)))
+        scores.append(float(np.mean(pred == y[test])))
+
+    scaler, model = _fit(params, X, y, seed)
+    predictor = SymptomPredictor(scaler, model)
+    row = X[:1]
+    return {
+        **params,
+        "cv_accuracy": float(np.mean(scores)),
+        "cv_std": float(np.std(scores)),
+        "fit_seconds": float(np.mean(fit_times)),
+        "model_kb": len(pickle.dumps((scaler, model), protocol=pickle.HIGHEST_PROTOCOL)) / 1024,
+        "latency_us": _median_us(lambda: predictor.predict(row), latency_repeats),
+        "sklearn_latency_us": _median_us(lambda: model.predict(scaler.transform(row.astype(np.float64))),
+                                         latency_repeats // 4),
+    }
+
+
+def search(candidates, X, y, folds=5, seed=42, workers=None, progress=None):
+    """Evaluate every candidate over a process pool; returns results in candidate order."""
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(candidates)
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+        futures = {pool.submit(evaluate_candidate, c, X, y, folds, seed): i for i, c in enumerate(candidates)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            results[futures[fut]] = fut.result()
+            if progress:
+                progress(done, len(candidates))
+    return results
+
+
+def rank(results, latency_budget_us=None, max_model_kb=None):
+    """Candidates within budget, best CV accuracy first (ties: faster, then smaller)."""
+    ok = [r for r in results
+          if (latency_budget_us is None or r["latency_us"] <= latency_budget_us)
+          and (max_model_kb is None or r["model_kb"] <= max_model_kb)]
+    return sorted(ok, key=lambda r: (-round(r["cv_accuracy"], 4), r["latency_us"], r["model_kb"]))
+
+
+def save_model(scaler, model, path=MODEL_PATH, metadata=None):
+    """Write the model artifact the app loads; replaced atomically so readers never see half a file."""
+    artifact = ModelArtifact.build(scaler, model, FEATURES, metadata)
+    artifact.save(path)
+    return artifact
+
+
+# ---------- CLI ----------
+def _depth(value):
+    return None if value.lower() == "none" else int(value)
+
+
+def _features(value):
+    if value.lower() == "none":
+        return None
+    try:
+        return float(value) if "." in value else int(value)
+    except ValueError:
+        return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the symptom model.")
+    parser.add_argument("dataset", help="patient CSV with the ten symptom columns and Level (Low/Medium/High)")
+    parser.add_argument("-o", "--output", default=MODEL_PATH, help="where to write the chosen (scaler, model)")
+    parser.add_argument("--results", default="symptom_search_results.csv", help="per-candidate results CSV")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--max-depth", type=_depth, nargs="+", default=[None, 8, 12, 16])
+    parser.add_argument("--min-samples-leaf", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-features", type=_features, nargs="+", default=["sqrt", None])
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--test-size", type=float, default=0.2, help="held-out share for the final check")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--latency-budget-us", type=float, default=None,
+                        help="only pick models whose single-row latency in the app is within this")
+    parser.add_argument("--max-model-kb", type=float, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="search and report, but don't write the model")
+    args = parser.parse_args(argv)
+
+    from sklearn.model_selection import train_test_split
+
+    t0 = time.perf_counter()
+    X, y, cached = load_dataset(args.dataset)
+    print(f"Dataset: {len(X):,} rows ({'cached' if cached else 'parsed'} in {time.perf_counter() - t0:.2f}s)",
+          file=sys.stderr)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=args.test_size,
+                                                        random_state=args.seed, stratify=y)
+
+    candidates = candidate_grid(args.n_estimators, args.max_depth, args.min_samples_leaf, args.max_features)
+    t0 = time.perf_counter()
+    results = search(candidates, X_train, y_train, args.folds, args.seed, args.workers,
+                     progress=lambda d, t: print(f"\r{d}/{t} candidates", end="", file=sys.stderr))
+    print(f"\nSearched {len(candidates)} candidates x {args.folds} folds in {time.perf_counter() - t0:.1f}s",
+          file=sys.stderr)
+
+    ranked = rank(results, args.latency_budget_us, args.max_model_kb)
+    order = {id(r): i + 1 for i, r in enumerate(ranked)}
+    with open(args.results, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for r in sorted(results, key=lambda r: order.get(id(r), len(results) + 1)):
+            row = {k: round(v, 4) if isinstance(v, float) else v for k, v in r.items()}
+            writer.writerow({**row, "rank": order.get(id(r), "over budget")})
+
+    print(f"\n{'trees':>5} {'depth':>5} {'leaf':>4} {'feat':>5} {'cv acc':>8} {'fit s':>6} {'KB':>7} "
+          f"{'µs/row':>7} {'sk µs':>7}")
+    for r in ranked[:10]:
+        print(f"{r['n_estimators']:>5} {str(r['max_depth']):>5} {r['min_samples_leaf']:>4} "
+              f"{str(r['max_features']):>5} {r['cv_accuracy'] * 100:7.2f}% {r['fit_seconds']:6.2f} "
+              f"{r['model_kb']:7.0f} {r['latency_us']:7.1f} {r['sklearn_latency_us']:7.0f}")
+    print(f"Full results in {args.results}")
+    if not ranked:
+        print("No candidate meets the latency/size budget.", file=sys.stderr)
+        return 1
+
+    best = ranked[0]
+    params = {k: best[k] for k in ("n_estimators", "max_depth", "min_samples_leaf", "max_features")}
+    scaler, model = _fit(params, X_train, y_train, args.seed)
+    test_acc = float(np.mean(model.predict(scaler.transform(X_test.astype(np.float64))) == y_test))
+    print(f"Chosen {params}: held-out accuracy {test_acc * 100:.2f}%")
+    if not args.dry_run:
+        artifact = save_model(scaler, model, args.output, {
+            "params": params, "cv_accuracy": best["cv_accuracy"], "cv_std": best["cv_std"],
+            "test_accuracy": test_acc, "latency_us": best["latency_us"], "folds": args.folds, "seed": args.seed,
+            "dataset": os.path.basename(args.dataset), "dataset_sha256": file_sha256(args.dataset),
+            "train_rows": int(len(X_train)), "test_rows": int(len(X_test)),
+        })
+        print(f"Saved {args.output} (content hash {artifact.hash[:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    """Handle given to the worker function for cooperative cancellation and progress."""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._progress = queue.Queue()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def report(self, *progress):
+        self._progress.put(progress)
+
+
+# ---------- Tk Background Runner ----------
+class TaskRunner:
+    """Runs one slow job at a time off the Tk thread and hands results back via `root.after`.
+
+    `submit(fn, on_done, ...)` calls ``fn(task)`` on a worker thread; while it runs a second
+    submit is rejected (returns None), which is how duplicate clicks are ignored. The
+    callbacks `on_done(result)`, `on_error(exc)` and `on_progress(*args)` always run on the
+    Tk thread, so they may touch widgets. `cancel()` flags the task (batch jobs check
+    `task.cancelled()`) and drops its result; a single forward pass cannot be interrupted,
+    but the UI is released immediately.
+    """
+
+    def __init__(self, root, poll_ms=30, on_busy=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy  # called with True/False when a job starts/ends
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ui-task")
+        self._current = None
+
+    @property
+    def busy(self):
+        return self._current is not None
+
+    def submit(self, fn, on_done, on_error=None, on_progress=None):
+        if self.busy:
+            return None
+        task = Task()
+        future = self._pool.submit(fn, task)
+        self._current = (task, future, on_done, on_error, on_progress)
+        self._set_busy(True)
+        self.root.after(self.poll_ms, self._poll)
+        return task
+
+    def cancel(self):
+        if self._current is None:
+            return
+        self._current[0].cancel()
+        self._current = None
+        self._set_busy(False)
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False)
+
+    def _set_busy(self, busy):
+        if self.on_busy:
+            self.on_busy(busy)
+
+    def _poll(self):
+        if self._current is None:
+            return  # cancelled; the finished future is simply dropped
+        task, future, on_done, on_error, on_progress = self._current
+        finished = future.done()  # checked before draining so no late progress is lost
+        if on_progress:
+            try:
+                while True:
+                    on_progress(*task._progress.get_nowait())
+            except queue.Empty:
+                pass
+        if not finished:
+            self.root.after(self.poll_ms, self._poll)
+            return
+
+        self._current = None
+        self._set_busy(False)
+        exc = future.exception()
+        if exc is not None:
+            if on_error:
+                on_error(exc)
+            else:
+                raise exc
+        else:
+            on_done(future.result())
@@ -0,0 +1,363 @@
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Set RESPIREX_DB=sqlite:users.db to run login/registration against a local SQLite file
+DB_URL = os.environ.get("RESPIREX_DB", "mysql")
+MYSQL_CONFIG = dict(host="localhost", user="Ashraf", password="miniproject", database="respirex_db",
+                    auth_plugin="mysql_native_password")
+POOL_SIZE = 4
+PING_AFTER = 60.0  # seconds idle before a pooled connection is checked before use
+
+# Statements use ? placeholders; the MySQL backend rewrites them to %s
+LOGIN_SQL = "SELECT email FROM users WHERE email = ? AND password = ? LIMIT 1"
+EXISTS_SQL = "SELECT 1 FROM users WHERE email = ? LIMIT 1"
+REGISTER_SQL = "INSERT INTO users (email, password) VALUES (?, ?)"
+
+
+# ---------- Backends ----------
+class SQLiteBackend:
+    """Local stand-in for the MySQL users table, for tests and benchmarks."""
+
+    name = "sqlite"
+
+    def __init__(self, path="users.db"):
+        self.path = path
+        self.integrity_error = sqlite3.IntegrityError
+        self.error = sqlite3.Error
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def cursor(self, conn):
+        # sqlite3 keeps compiled statements per connection, keyed by SQL text
+        return conn.cursor()
+
+    def sql(self, statement):
+        return statement
+
+    def ping(self, conn):
+        return True
+
+    def ensure_schema(self, conn):
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                email TEXT NOT NULL,
+                password TEXT NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email);
+        """)
+
+    def drop_email_index(self, conn):
+        conn.execute("DROP INDEX IF EXISTS idx_users_email")
+        conn.commit()
+
+
+class MySQLBackend:
+    name = "mysql"
+
+    def __init__(self, **config):
+        import mysql.connector
+
+        self.connector = mysql.connector
+        self.config = config or MYSQL_CONFIG
+        self.integrity_error = mysql.connector.IntegrityError
+        self.error = mysql.connector.Error
+
+    def connect(self):
+        # Autocommit: under InnoDB's REPEATABLE READ a pooled connection that never commits
+        # keeps reading its first snapshot, so users registered since then could not log in
+        return self.connector.connect(**{**self.config, "autocommit": True})
+
+    def cursor(self, conn):
+        # Server-side prepared statement: parsed once per connection, re-executed with new parameters
+        return conn.cursor(prepared=True)
+
+    def sql(self, statement):
+        return statement.replace("?", "%s")
+
+    def ping(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except self.error:
+            return False
+
+    def ensure_schema(self, conn):
+        """Add a unique index on users.email if the table has none (MySQL lacks CREATE INDEX IF NOT EXISTS)."""
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = 'users' "
+                    "AND column_name = 'email' AND seq_in_index = 1")
+        if cur.fetchone()[0] == 0:
+            cur.execute("CREATE UNIQUE INDEX idx_users_email ON users (email)")
+            conn.commit()
+        cur.close()
+
+    def drop_email_index(self, conn):
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = 'users' AND index_name = 'idx_users_email'")
+        if cur.fetchone()[0]:
+            cur.execute("DROP INDEX idx_users_email ON users")
+            conn.commit()
+        cur.close()
+
+
+def backend_from_url(url=DB_URL):
+    """'mysql' (the configured server) or 'sqlite:<path>'."""
+    if url.startswith("sqlite:"):
+        return SQLiteBackend(url[len("sqlite:"):] or "users.db")
+    if url == "mysql":
+        return MySQLBackend()
+    raise ValueError(f"Unknown database {url!r}; use 'mysql' or 'sqlite:<path>'.")
+
+
+# ---------- Connection Pool ----------
+class _Pooled:
+    __slots__ = ("conn", "cursors", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursors = {}  # statement -> cursor, so each statement is prepared once per connection
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Up to `size` open connections, handed out one caller at a time.
+
+    Connections are opened lazily (or ahead of time with `warm()`) and kept open, so
+    a login pays for a query, not for a TCP connect and auth handshake. A connection
+    idle longer than PING_AFTER is pinged before use and replaced if it has died; one
+    that raised a database error is closed rather than returned to the pool.
+    """
+
+    def __init__(self, backend, size=POOL_SIZE, timeout=10.0):
+        self.backend = backend
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()  # most recently used first: likeliest to still be alive
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            item = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._open < self.size
+                if grow:
+                    self._open += 1
+            if not grow:
+                try:
+                    item = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No database connection free after {self.timeout:.0f}s") from None
+            else:
+                try:
+                    return _Pooled(self.backend.connect())
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+        if time.monotonic() - item.last_used > PING_AFTER and not self.backend.ping(item.conn):
+            self._discard(item)
+            return self._acquire()
+        return item
+
+    def _discard(self, item):
+        with self._lock:
+            self._open -= 1
+        try:
+            item.conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        item = self._acquire()
+        try:
+            yield item
+        except self.backend.error as e:
+            if isinstance(e, self.backend.integrity_error):
+                item.conn.rollback()
+                self._release(item)
+            else:
+                self._discard(item)
+            raise
+        except BaseException:
+            self._discard(item)
+            raise
+        else:
+            self._release(item)
+
+    def _release(self, item):
+        item.last_used = time.monotonic()
+        self._idle.put(item)
+
+    def execute(self, statement, params=(), fetch=True, commit=False):
+        """Run one statement on a pooled connection, reusing its prepared cursor."""
+        with self.connection() as item:
+            cur = item.cursors.get(statement)
+            if cur is None:
+                cur = item.cursors[statement] = self.backend.cursor(item.conn)
+            cur.execute(self.backend.sql(statement), params)
+            # fetchall, not fetchone: MySQL won't reuse a cursor with rows left unread
+            row = next(iter(cur.fetchall()), None) if fetch else None
+            if commit:
+                item.conn.commit()
+            return row
+
+    def warm(self, n=1):
+        """Open up to `n` connections now (e.g. while the start screen is showing)."""
+        items = [self._acquire() for _ in range(min(n, self.size))]
+        for item in items:
+            self._release(item)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+# ---------- User Store ----------
+class UserStore:
+    """Login and registration queries over a connection pool.
+
+    Both look users up by email, which the unique index on users.email answers
+    without scanning the table, and fetch only the column they need.
+    """
+
+    def __init__(self, backend=None, pool_size=POOL_SIZE):
+        self.backend = backend or backend_from_url()
+        self.pool = ConnectionPool(self.backend, pool_size)
+
+    def ensure_schema(self):
+        with self.pool.connection() as item:
+            self.backend.ensure_schema(item.conn)
+
+    def authenticate(self, email, password):
+        return self.pool.execute(LOGIN_SQL, (email, password)) is not None
+
+    def register(self, email, password):
+        """Add a user; raises ValueError if the email is already registered."""
+        if self.pool.execute(EXISTS_SQL, (email,)) is not None:
+            raise ValueError("Email already exists!")
+        try:
+            self.pool.execute(REGISTER_SQL, (email, password), fetch=False, commit=True)
+        except self.backend.integrity_error:
+            raise ValueError("Email already exists!") from None  # lost a race with another registration
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def user_store():
+    """The process-wide UserStore for RESPIREX_DB, created on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UserStore()
+        return _store
+
+
+# ---------- Login Benchmark ----------
+def naive_login(backend, email, password):
+    """The old login path: new connection per call, SELECT *, then close."""
+    conn = backend.connect()
+    try:
+        cur = conn.cursor()
+        cur.execute(backend.sql("SELECT * FROM users WHERE email = ? AND password = ?"), (email, password))
+        row = cur.fetchone()
+        cur.close()
+        return row is not None
+    finally:
+        conn.close()
+
+
+def seed_users(backend, n):
+    conn = backend.connect()
+    backend.ensure_schema(conn)
+    have = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    if have < n:
+        conn.executemany("INSERT OR IGNORE INTO users (email, password) VALUES (?, ?)",
+                         ((f"user{i}@respirex.test", f"pw{i}") for i in range(have, n)))
+        conn.commit()
+    conn.close()
+
+
+def bench(path, users=50_000, concurrency=(1, 8, 32), duration=5.0, pool_size=POOL_SIZE):
+    """Login latency under concurrent load on a SQLite stand-in: old path vs pooled store."""
+    from load_test import run_load
+
+    backend = SQLiteBackend(path)
+    seed_users(backend, users)
+
+    def login(call):
+        def one(rng):
+            i = rng.randrange(users)
+            if not call(f"user{i}@respirex.test", f"pw{i}"):
+                raise AssertionError("login failed")
+        return one
+
+    store = UserStore(backend, pool_size)
+    cases = [
+        ("connect per call, SELECT *, no index", "drop", lambda e, p: naive_login(backend, e, p)),
+        ("connect per call, SELECT *, indexed", "index", lambda e, p: naive_login(backend, e, p)),
+        (f"pool of {pool_size}, prepared, indexed", "index", store.authenticate),
+    ]
+    results = []
+    for label, index, call in cases:
+        conn = backend.connect()
+        if index == "drop":
+            backend.drop_email_index(conn)
+        else:
+            backend.ensure_schema(conn)
+        conn.close()
+        for c in concurrency:
+            results.append((label, c, run_load(login(call), c, duration)))
+    store.pool.close()
+    return results
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Users database: schema check and login benchmark.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("migrate", help="create the users table (SQLite) or add the email index (MySQL)")
+    p.add_argument("--db", default=DB_URL, help="'mysql' or 'sqlite:<path>' (default: $RESPIREX_DB or mysql)")
+    p = sub.add_parser("bench", help="login latency under concurrent load, on a SQLite stand-in")
+    p.add_argument("--path", default="users_bench.db")
+    p.add_argument("--users", type=int, default=50_000)
+    p.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    p.add_argument("--duration", type=float, default=5.0, help="seconds per case and concurrency level")
+    p.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        UserStore(backend_from_url(args.db)).ensure_schema()
+        print("users table and email index are in place")
+        return 0
+
+    results = bench(args.path, args.users, args.concurrency, args.duration, args.pool_size)
+    print(f"{'login path':<38} {'threads':>7} {'logins/s':>9} {'p50 ms':>7} {'p99 ms':>7} {'errors':>6}")
+    for label, c, r in results:
+        print(f"{label:<38} {c:>7} {r['throughput_rps']:9.0f} {r['p50_ms']:7.2f} {r['p99_ms']:7.2f} {r['errors']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())